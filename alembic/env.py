@@ -4,7 +4,7 @@ from sqlalchemy import engine_from_config, pool
 from sqlmodel import SQLModel
 
 from alembic import context  # type: ignore[attr-defined]
-from warehouse_bot.core.config import settings
+from warehouse_bot.core.config import get_settings
 from warehouse_bot.db import models  # noqa: F401
 
 # это объект конфигурации Alembic, который предоставляет
@@ -40,7 +40,7 @@ def run_migrations_offline() -> None:
     в выходной файл скрипта.
     """
     # Эта строка обновлена: убран вызов .unicode_string()
-    url = settings.database_url
+    url = get_settings().database_url
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -62,7 +62,7 @@ def run_migrations_online() -> None:
     # Эта строка обновлена, чтобы использовать наши настройки из .env
     configuration = config.get_section(config.config_ini_section)
     # Эта строка обновлена: убран вызов .unicode_string()
-    configuration["sqlalchemy.url"] = settings.database_url
+    configuration["sqlalchemy.url"] = get_settings().database_url
 
     connectable = engine_from_config(
         configuration,
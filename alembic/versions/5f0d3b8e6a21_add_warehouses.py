@@ -0,0 +1,79 @@
+"""Add warehouses and scope products by warehouse
+
+Revision ID: 5f0d3b8e6a21
+Revises: c4e1a7d92f3b
+Create Date: 2026-10-17 14:22:51.904317
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0d3b8e6a21"
+down_revision: str | Sequence[str] | None = "c4e1a7d92f3b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "warehouse",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "name",
+            sqlmodel.sql.sqltypes.AutoString(length=100),  # type: ignore[attr-defined]
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    # Существующие товары переходят на склад по умолчанию
+    op.execute("INSERT INTO warehouse (id, name) VALUES (1, 'Основной склад')")
+    op.execute("SELECT setval(pg_get_serial_sequence('warehouse', 'id'), 1)")
+    op.add_column(  # type: ignore[attr-defined]
+        "product",
+        sa.Column("warehouse_id", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.create_foreign_key(  # type: ignore[attr-defined]
+        "product_warehouse_id_fkey", "product", "warehouse", ["warehouse_id"], ["id"]
+    )
+    op.drop_index("ix_product_name", table_name="product")  # type: ignore[attr-defined]
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_product_warehouse_id_name",
+        "product",
+        ["warehouse_id", "name"],
+        unique=True,
+    )
+    op.drop_index("ix_product_low_stock", table_name="product")  # type: ignore[attr-defined]
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_product_low_stock",
+        "product",
+        ["warehouse_id", "name"],
+        unique=False,
+        postgresql_where=sa.text("quantity < min_quantity"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_product_low_stock", table_name="product")  # type: ignore[attr-defined]
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_product_low_stock",
+        "product",
+        ["name"],
+        unique=False,
+        postgresql_where=sa.text("quantity < min_quantity"),
+    )
+    op.drop_index("ix_product_warehouse_id_name", table_name="product")  # type: ignore[attr-defined]
+    op.create_index("ix_product_name", "product", ["name"], unique=True)  # type: ignore[attr-defined]
+    op.drop_constraint(  # type: ignore[attr-defined]
+        "product_warehouse_id_fkey", "product", type_="foreignkey"
+    )
+    op.drop_column("product", "warehouse_id")  # type: ignore[attr-defined]
+    op.drop_table("warehouse")  # type: ignore[attr-defined]
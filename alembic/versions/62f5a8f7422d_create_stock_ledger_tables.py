@@ -0,0 +1,83 @@
+"""Create stock ledger tables
+
+Revision ID: 62f5a8f7422d
+Revises: 8b5de4401d5e
+Create Date: 2026-10-17 10:03:27.114905
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "62f5a8f7422d"
+down_revision: str | Sequence[str] | None = "8b5de4401d5e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stock_movement",  # type: ignore[attr-defined]
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("delta", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=True),
+        sa.Column("update_id", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["product.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_stock_movement_created_at_brin",
+        "stock_movement",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_stock_movement_product_id_id",
+        "stock_movement",
+        ["product_id", "id"],
+        unique=False,
+    )
+    op.create_table(
+        "stock_snapshot",  # type: ignore[attr-defined]
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("movement_id", sa.Integer(), nullable=False),
+        sa.Column("taken_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["product.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_stock_snapshot_product_id_movement_id",
+        "stock_snapshot",
+        ["product_id", "movement_id"],
+        unique=False,
+    )
+    # Текущие остатки становятся начальными снимками: истории до журнала нет.
+    op.execute(
+        "INSERT INTO stock_snapshot (product_id, quantity, movement_id, taken_at) "
+        "SELECT id, quantity, 0, now() FROM product"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(  # type: ignore[attr-defined]
+        "ix_stock_snapshot_product_id_movement_id", table_name="stock_snapshot"
+    )
+    op.drop_table("stock_snapshot")  # type: ignore[attr-defined]
+    op.drop_index(  # type: ignore[attr-defined]
+        "ix_stock_movement_product_id_id", table_name="stock_movement"
+    )
+    op.drop_index(  # type: ignore[attr-defined]
+        "ix_stock_movement_created_at_brin", table_name="stock_movement"
+    )
+    op.drop_table("stock_movement")  # type: ignore[attr-defined]
@@ -0,0 +1,35 @@
+"""Add product name trigram index
+
+Revision ID: 8b5de4401d5e
+Revises: 9b9bd52bce62
+Create Date: 2026-10-17 09:12:41.508213
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "8b5de4401d5e"
+down_revision: str | Sequence[str] | None = "9b9bd52bce62"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_product_name_trgm",
+        "product",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_product_name_trgm", table_name="product")  # type: ignore[attr-defined]
@@ -0,0 +1,68 @@
+"""Add daily stock movement rollup
+
+Revision ID: a3c9e5d17b48
+Revises: 5f0d3b8e6a21
+Create Date: 2026-10-17 16:05:12.418230
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c9e5d17b48"
+down_revision: str | Sequence[str] | None = "5f0d3b8e6a21"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stock_daily_rollup",  # type: ignore[attr-defined]
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("inflow", sa.Integer(), nullable=False),
+        sa.Column("outflow", sa.Integer(), nullable=False),
+        sa.Column("movement_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["product.id"]),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouse.id"]),
+        sa.PrimaryKeyConstraint("product_id", "day"),
+    )
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_stock_daily_rollup_warehouse_id_day",
+        "stock_daily_rollup",
+        ["warehouse_id", "day"],
+        unique=False,
+    )
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_stock_daily_rollup_movement_id",
+        "stock_daily_rollup",
+        ["movement_id"],
+        unique=False,
+    )
+    # Существующий журнал сворачивается один раз при миграции
+    op.execute(
+        "INSERT INTO stock_daily_rollup "
+        "(product_id, day, warehouse_id, inflow, outflow, movement_id) "
+        "SELECT m.product_id, date(m.created_at), p.warehouse_id, "
+        "sum(CASE WHEN m.delta > 0 THEN m.delta ELSE 0 END), "
+        "sum(CASE WHEN m.delta < 0 THEN -m.delta ELSE 0 END), max(m.id) "
+        "FROM stock_movement m JOIN product p ON p.id = m.product_id "
+        "GROUP BY m.product_id, date(m.created_at), p.warehouse_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(  # type: ignore[attr-defined]
+        "ix_stock_daily_rollup_movement_id", table_name="stock_daily_rollup"
+    )
+    op.drop_index(  # type: ignore[attr-defined]
+        "ix_stock_daily_rollup_warehouse_id_day", table_name="stock_daily_rollup"
+    )
+    op.drop_table("stock_daily_rollup")  # type: ignore[attr-defined]
@@ -0,0 +1,40 @@
+"""Add product min quantity and low stock index
+
+Revision ID: c4e1a7d92f3b
+Revises: 62f5a8f7422d
+Create Date: 2026-10-17 12:41:08.365120
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e1a7d92f3b"
+down_revision: str | Sequence[str] | None = "62f5a8f7422d"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(  # type: ignore[attr-defined]
+        "product",
+        sa.Column("min_quantity", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_index(  # type: ignore[attr-defined]
+        "ix_product_low_stock",
+        "product",
+        ["name"],
+        unique=False,
+        postgresql_where=sa.text("quantity < min_quantity"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_product_low_stock", table_name="product")  # type: ignore[attr-defined]
+    op.drop_column("product", "min_quantity")  # type: ignore[attr-defined]
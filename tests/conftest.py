@@ -11,6 +11,8 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlmodel import SQLModel
 
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID, Warehouse
+
 # Используем асинхронный драйвер для SQLite для тестов
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -23,6 +25,12 @@ async def engine() -> AsyncGenerator[AsyncEngine, None]:
     async_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
     async with async_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        # Склад по умолчанию, как после миграции
+        await conn.execute(
+            Warehouse.__table__.insert().values(  # type: ignore[attr-defined]
+                id=DEFAULT_WAREHOUSE_ID, name="Основной склад"
+            )
+        )
 
     yield async_engine
 
@@ -0,0 +1,100 @@
+"""Тесты для метрик в формате Prometheus."""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from warehouse_bot import main
+from warehouse_bot.core.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    UpdateCounters,
+    current_update,
+)
+from warehouse_bot.db.instrumentation import instrument_engine
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_registry_renders_prometheus_text() -> None:
+    """
+    Тест: счетчики, gauge с callback и гистограммы выводятся в формате
+    Prometheus, включая накопительные корзины и экранирование меток.
+    """
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests.", ["method"]))
+    registry.register(Gauge("queue_depth", "Depth.", callback=lambda: [({}, 3)]))
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latency.", ["handler"], buckets=(0.1, 1.0))
+    )
+
+    counter.inc(method='say "hi"')
+    counter.inc(2, method='say "hi"')
+    histogram.observe(0.05, handler="list")
+    histogram.observe(0.5, handler="list")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{method="say \\"hi\\""} 3' in lines
+    assert "queue_depth 3" in lines
+    assert 'latency_seconds_bucket{handler="list",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{handler="list",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{handler="list",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{handler="list"} 2' in lines
+    with pytest.raises(ValueError):
+        counter.inc(handler="list")
+
+
+async def test_instrumented_engine_counts_queries_per_update() -> None:
+    """
+    Тест: запросы через инструментированный движок попадают в счетчики
+    текущего обновления.
+    """
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    counters = UpdateCounters()
+    token = current_update.set(counters)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+    finally:
+        current_update.reset(token)
+        await engine.dispose()
+
+    assert counters.db_queries == 2
+
+
+async def test_metrics_endpoint_requires_token(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Тест: /metrics отключен без METRICS_TOKEN и отдает метрики только
+    с правильным токеном.
+    """
+    settings = SimpleNamespace(METRICS_TOKEN="")  # nosec B106
+    monkeypatch.setattr(main, "get_settings", lambda: settings)
+    app = FastAPI()
+    app.add_api_route("/metrics", main.metrics_handler, methods=["GET"])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/metrics")).status_code == 404
+
+        settings.METRICS_TOKEN = "scrape"  # nosec B105
+        assert (await client.get("/metrics")).status_code == 403
+        response = await client.get(
+            "/metrics", headers={"Authorization": "Bearer wrong"}
+        )
+        assert response.status_code == 403
+        response = await client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape"}
+        )
+        assert response.status_code == 200
+        assert "bot_update_duration_seconds" in response.text
@@ -0,0 +1,61 @@
+"""Тесты для планировщика исходящих запросов."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from warehouse_bot.core.send_scheduler import (
+    SendPriority,
+    SendScheduler,
+    TokenBucket,
+    bulk_sends,
+)
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_bucket_serves_interactive_before_bulk() -> None:
+    """
+    Тест: когда токены закончились, первым токен получает интерактивный
+    запрос, даже если массовый встал в очередь раньше.
+    """
+    bucket = TokenBucket(rate=50, capacity=1)
+    await bucket.acquire()
+    order: list[str] = []
+
+    async def acquire(name: str, priority: SendPriority) -> None:
+        await bucket.acquire(priority)
+        order.append(name)
+
+    bulk = asyncio.create_task(acquire("bulk", SendPriority.BULK))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(acquire("reply", SendPriority.INTERACTIVE))
+    await asyncio.gather(bulk, interactive)
+
+    assert order == ["reply", "bulk"]
+
+
+async def test_scheduler_retries_after_flood_control() -> None:
+    """
+    Тест: ответ 429 ставит чат на паузу retry_after и запрос повторяется;
+    методы без чата проходят мимо ведер.
+    """
+    scheduler = SendScheduler(chat_rate=100, max_retries=2)
+    method = SendMessage(chat_id=42, text="Готово")
+    make_request = AsyncMock(
+        side_effect=[TelegramRetryAfter(method, "Too Many Requests", 0), "ok"]
+    )
+    bot = AsyncMock()
+
+    with bulk_sends():
+        assert await scheduler(make_request, bot, method) == "ok"
+    assert make_request.await_count == 2
+
+    callback_answer = AnswerCallbackQuery(callback_query_id="1")
+    make_request.side_effect = None
+    make_request.return_value = True
+    assert await scheduler(make_request, bot, callback_answer) is True
+    assert list(scheduler._chat_buckets) == [42]
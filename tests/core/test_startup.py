@@ -0,0 +1,48 @@
+"""Тесты для регистрации вебхука в режиме нескольких воркеров."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.types import WebhookInfo
+from fakeredis.aioredis import FakeRedis
+
+from warehouse_bot.core.startup import register_webhook_once
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+URL = "https://example.com/telegram/webhook/token"
+
+
+async def test_register_webhook_once_only_on_change() -> None:
+    """
+    Тест: вебхук устанавливается при первом запуске и при смене секрета,
+    но не при повторном запуске с теми же параметрами; блокировка
+    снимается после регистрации.
+    """
+    redis = FakeRedis()
+    bot = AsyncMock()
+    bot.get_webhook_info.return_value = WebhookInfo(
+        url=URL, has_custom_certificate=False, pending_update_count=0
+    )
+
+    assert await register_webhook_once(bot, redis, URL, "secret") is True
+    assert await register_webhook_once(bot, redis, URL, "secret") is False
+    assert await register_webhook_once(bot, redis, URL, "new-secret") is True
+
+    assert bot.set_webhook.await_count == 2
+    bot.delete_webhook.assert_not_called()
+    assert await redis.get("webhook:lock") is None
+
+
+async def test_register_webhook_once_skips_when_locked() -> None:
+    """
+    Тест: пока блокировка занята другим воркером, вебхук не трогается.
+    """
+    redis = FakeRedis()
+    bot = AsyncMock()
+    await redis.set("webhook:lock", "other-worker")
+
+    assert await register_webhook_once(bot, redis, URL, "secret") is False
+
+    bot.set_webhook.assert_not_called()
+    assert await redis.get("webhook:lock") == b"other-worker"
@@ -0,0 +1,62 @@
+"""Тесты для очереди входящих обновлений."""
+
+import asyncio
+import datetime
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Chat, Message, Update, User
+
+from warehouse_bot.core.update_queue import UpdateQueue
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+# Фиктивный токен: бот в тестах не обращается к Bot API
+TEST_TOKEN = "42:TEST"  # nosec B105
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    """Создает обновление с текстовым сообщением из указанного чата."""
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            chat=Chat(id=chat_id, type="private"),
+            from_user=User(id=chat_id, is_bot=False, first_name="Test"),
+            text=str(update_id),
+            date=datetime.datetime.now(datetime.UTC),
+        ),
+    )
+
+
+async def test_update_queue_keeps_per_chat_order() -> None:
+    """Обновления одного чата обрабатываются по порядку, очередь дренируется."""
+    seen: dict[int, list[int]] = {}
+    dp = Dispatcher()
+
+    @dp.message()
+    async def record(message: Message) -> None:
+        # Разная длительность обработки перемешивает завершение по чатам
+        await asyncio.sleep(message.message_id * 7 % 5 / 1000)
+        seen.setdefault(message.chat.id, []).append(message.message_id)
+
+    queue = UpdateQueue(dp, Bot(token=TEST_TOKEN), workers=4, maxsize=400)
+    queue.start()
+    for update_id in range(100):
+        assert queue.put_nowait(make_update(update_id, chat_id=update_id % 5))
+
+    await queue.drain(timeout=5)
+
+    assert queue.stats.processed == 100
+    for chat_id, ids in seen.items():
+        assert ids == [i for i in range(100) if i % 5 == chat_id]
+    assert queue.put_nowait(make_update(1000, chat_id=1)) is False
+
+
+async def test_update_queue_rejects_when_full() -> None:
+    """Переполненная очередь чата отклоняет обновление и считает отказ."""
+    queue = UpdateQueue(Dispatcher(), Bot(token=TEST_TOKEN), workers=1, maxsize=1)
+    assert queue.put_nowait(make_update(1, chat_id=1)) is True
+    assert queue.put_nowait(make_update(2, chat_id=1)) is False
+    assert queue.snapshot()["rejected"] == 1
+    assert queue.depth == 1
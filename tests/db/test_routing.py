@@ -0,0 +1,177 @@
+"""Тесты для маршрутизации чтений на реплики."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlmodel import SQLModel
+
+from warehouse_bot.db.models import Product
+from warehouse_bot.db.routing import (
+    PRIMARY_UNTIL_KEY,
+    WROTE_KEY,
+    RoutingSession,
+    primary_reads,
+)
+from warehouse_bot.middlewares.db_session import LazySession
+from warehouse_bot.middlewares.read_routing import ReadRoutingMiddleware
+from warehouse_bot.services import product_service
+from warehouse_bot.services.cache import ProductCache
+from warehouse_bot.services.stock_coalescer import StockCoalescer
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def _create_engine(quantity: int) -> AsyncEngine:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(Product(name="Маршрут", quantity=quantity))
+        await session.commit()
+    return engine
+
+
+@asynccontextmanager
+async def _routing_factory() -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    """
+    Фабрика сессий с основной базой и одной отстающей репликой: на реплике
+    остаток товара еще старый.
+    """
+    primary = await _create_engine(quantity=5)
+    replica = await _create_engine(quantity=1)
+    try:
+        yield async_sessionmaker(
+            primary,
+            expire_on_commit=False,
+            sync_session_class=RoutingSession,
+            replicas=[replica.sync_engine],
+        )
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+async def _quantity(factory: async_sessionmaker[AsyncSession]) -> int | None:
+    async with factory() as session:
+        product = await product_service.get_product_by_name(session, "Маршрут")
+        return None if product is None else product.quantity
+
+
+async def test_reads_go_to_replica_until_session_writes() -> None:
+    """
+    Тест: помеченные чтения идут на реплику, запись и чтения после нее — в
+    основную базу.
+    """
+    async with _routing_factory() as factory:
+        assert await _quantity(factory) == 1
+        with primary_reads():
+            assert await _quantity(factory) == 5
+
+        async with factory() as session:
+            product = await session.get(Product, 1)
+            assert product is not None and product.quantity == 5
+
+            await product_service.update_product_quantity(session, 1, 2)
+            assert session.info[WROTE_KEY]
+            product = await product_service.get_product_by_name(session, "Маршрут")
+            assert product is not None and product.quantity == 7
+
+
+async def test_user_reads_primary_after_own_write() -> None:
+    """
+    Тест: после записи следующее обновление того же пользователя читает из
+    основной базы.
+    """
+    middleware = ReadRoutingMiddleware(sticky_seconds=60)
+    state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=7, user_id=7))
+    seen: list[int | None] = []
+    event = Message.model_validate(
+        {"message_id": 1, "date": 0, "chat": {"id": 7, "type": "private"}}
+    )
+    async with _routing_factory() as factory:
+
+        async def write(_event: Any, data: dict[str, Any]) -> None:
+            await product_service.update_product_quantity(data["session"], 1, -1)
+
+        async def read(_event: Any, _data: dict[str, Any]) -> None:
+            seen.append(await _quantity(factory))
+
+        for handler in (read, write, read):
+            session = LazySession(factory)
+            try:
+                await middleware(handler, event, {"state": state, "session": session})
+            finally:
+                await session.close()
+
+    assert seen == [1, 4]
+    assert PRIMARY_UNTIL_KEY in await state.get_data()
+
+
+async def test_coalesced_write_pins_reads_to_primary() -> None:
+    """
+    Тест: приращение, записанное через StockCoalescer в пачке, открытой
+    другим пользователем, тоже переводит чтения пользователя на основную
+    базу.
+    """
+    middleware = ReadRoutingMiddleware(sticky_seconds=60)
+    state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=8, user_id=8))
+    seen: list[int | None] = []
+    event = Message.model_validate(
+        {"message_id": 1, "date": 0, "chat": {"id": 8, "type": "private"}}
+    )
+    async with _routing_factory() as factory:
+        coalescer = StockCoalescer(factory, window=0.01)
+
+        async def write(_event: Any, _data: dict[str, Any]) -> None:
+            await coalescer.add("Маршрут", 3)
+
+        async def read(_event: Any, _data: dict[str, Any]) -> None:
+            seen.append(await _quantity(factory))
+
+        other = asyncio.create_task(coalescer.add("Маршрут", 1))
+        await asyncio.sleep(0)
+        await middleware(write, event, {"state": state})
+        await other
+        await middleware(read, event, {"state": state})
+
+    assert seen == [9]
+
+
+async def test_cache_is_not_filled_from_stale_replica() -> None:
+    """
+    Тест: после записи промах кэша у другого пользователя заполняется из
+    основной базы, а не с отстающей реплики, поэтому ни он, ни автор
+    записи не получают из кэша старый остаток.
+    """
+    cache = ProductCache(FakeRedis())
+    async with _routing_factory() as factory:
+
+        async def cached_quantity() -> int | None:
+            async with factory() as session:
+                product = await product_service.get_product_by_name(
+                    session, "Маршрут", cache=cache
+                )
+                return None if product is None else product.quantity
+
+        async with factory() as session:
+            await product_service.update_product_quantity(session, 1, -1, cache=cache)
+        # Другой пользователь: чтение не привязано к основной базе
+        assert await cached_quantity() == 4
+        # Автор записи получает значение из кэша
+        with primary_reads():
+            assert await cached_quantity() == 4
+        assert await cached_quantity() == 4
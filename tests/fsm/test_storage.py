@@ -0,0 +1,84 @@
+"""Тесты для хранилища FSM в одном хеше Redis."""
+
+from dataclasses import replace
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from fakeredis.aioredis import FakeRedis
+
+from warehouse_bot.fsm.product_states import ProductState
+from warehouse_bot.fsm.storage import PERSISTENT_DESTINY, HashRedisStorage
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+REDIS_KEY = "fsm:10:10"
+
+
+async def test_update_scope_defers_writes_until_exit() -> None:
+    """
+    Тест: в области обновления изменения видны сразу, но в Redis попадают
+    одним хешем с TTL только при выходе из области.
+    """
+    redis = FakeRedis()
+    storage = HashRedisStorage(redis, ttl=60)
+
+    async with storage.update_scope():
+        assert await storage.get_state(KEY) is None
+        await storage.update_data(KEY, {"product_name": "Болт"})
+        await storage.set_state(KEY, ProductState.add_waiting_for_quantity)
+
+        assert await storage.get_data(KEY) == {"product_name": "Болт"}
+        assert await redis.exists(REDIS_KEY) == 0
+
+    stored: dict[bytes, bytes] = await redis.hgetall(REDIS_KEY)  # type: ignore[misc]
+    assert stored == {
+        b"state": b"ProductState:add_waiting_for_quantity",
+        b"data": b'{"product_name": "\\u0411\\u043e\\u043b\\u0442"}',
+    }
+    assert 0 < await redis.ttl(REDIS_KEY) <= 60
+    assert await storage.get_state(KEY) == "ProductState:add_waiting_for_quantity"
+
+
+async def test_clear_removes_hash() -> None:
+    """
+    Тест: сброс состояния и данных удаляет хеш целиком, а данные,
+    возвращенные get_data, не связаны с кэшем области.
+    """
+    redis = FakeRedis()
+    storage = HashRedisStorage(redis)
+    await storage.set_state(KEY, ProductState.remove_waiting_for_name)
+    await storage.set_data(KEY, {"items": [1]})
+
+    async with storage.update_scope():
+        data = await storage.get_data(KEY)
+        data["items"].append(2)
+        assert await storage.get_data(KEY) == {"items": [1]}
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+
+    assert await redis.exists(REDIS_KEY) == 0
+
+
+async def test_persistent_key_has_no_ttl_and_is_loaded_with_state() -> None:
+    """
+    Тест: настройки пользователя хранятся в отдельном хеше без TTL,
+    переживают удаление хеша диалога и читаются вместе с ним.
+    """
+    redis = FakeRedis()
+    storage = HashRedisStorage(redis, ttl=60)
+    persistent_key = replace(KEY, destiny=PERSISTENT_DESTINY)
+
+    async with storage.update_scope():
+        await storage.set_state(KEY, ProductState.add_waiting_for_name)
+        await storage.update_data(persistent_key, {"warehouse_id": 3})
+
+    assert await redis.ttl(REDIS_KEY) > 0
+    assert await redis.ttl(f"{REDIS_KEY}:persistent") == -1
+    await redis.delete(REDIS_KEY)
+
+    async with storage.update_scope():
+        assert await storage.get_state(KEY) is None
+        # Хеш настроек прочитан вместе с основным
+        await redis.delete(f"{REDIS_KEY}:persistent")
+        assert await storage.get_data(persistent_key) == {"warehouse_id": 3}
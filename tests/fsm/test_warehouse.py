@@ -0,0 +1,34 @@
+"""Тесты для текущего склада пользователя в данных FSM."""
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.fsm.product_states import ProductState
+from warehouse_bot.fsm.warehouse import (
+    finish_dialog,
+    get_current_warehouse,
+    set_current_warehouse,
+)
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_finish_dialog_keeps_current_warehouse() -> None:
+    """
+    Тест: завершение сценария сбрасывает состояние и данные диалога,
+    но не выбранный склад.
+    """
+    state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=5, user_id=5))
+    assert await get_current_warehouse(state) == DEFAULT_WAREHOUSE_ID
+
+    await set_current_warehouse(state, 3)
+    await state.set_state(ProductState.add_waiting_for_quantity)
+    await state.update_data(name="Болт")
+    await finish_dialog(state)
+
+    assert await state.get_state() is None
+    assert await state.get_data() == {}
+    assert await get_current_warehouse(state) == 3
@@ -99,7 +99,8 @@ async def test_add_product_full_scenario(dp: Dispatcher, session: AsyncSession)
 
     await process_update(dp, bot, "/add")
     bot.send_message.assert_called_with(
-        chat_id=TEST_CHAT.id, text="Введите название нового товара:"
+        chat_id=TEST_CHAT.id,
+        text="Склад: Основной склад.\nВведите название нового товара:",
     )
     bot.reset_mock()
 
@@ -112,7 +113,10 @@ async def test_add_product_full_scenario(dp: Dispatcher, session: AsyncSession)
     await process_update(dp, bot, "50")
     bot.send_message.assert_called_with(
         chat_id=TEST_CHAT.id,
-        text="Новый товар 'Супер-дрель' успешно добавлен в количестве 50 шт.",
+        text=(
+            "Новый товар 'Супер-дрель' успешно добавлен в количестве 50 шт. "
+            "(склад: Основной склад)."
+        ),
     )
 
     product = await product_service.get_product_by_name(session, "Супер-дрель")
@@ -140,3 +144,30 @@ async def test_remove_product_not_enough_stock(
     product = await product_service.get_product_by_name(session, "Молоток")
     assert product is not None
     assert product.quantity == 10
+
+
+async def test_db_session_middleware_skips_handlers_without_session(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    """Сессия не создается для хендлеров, которым она не нужна."""
+    middleware = DbSessionMiddleware(session_pool=session_factory)
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.message.middleware(middleware)
+    router = Router()
+    router.message.register(cancel_handler, Command(commands=["cancel"]))
+    router.message.register(
+        process_remove_product_name, ProductState.remove_waiting_for_name
+    )
+    dp.include_router(router)
+    bot = AsyncMock()
+
+    await process_update(dp, bot, "/cancel")
+    assert middleware.stats.skipped == 1
+    assert middleware.stats.opened == 0
+
+    await dp.fsm.storage.set_state(
+        key=dp.fsm.get_context(bot, TEST_CHAT.id, TEST_USER.id).key,
+        state=ProductState.remove_waiting_for_name,
+    )
+    await process_update(dp, bot, "Несуществующий товар")
+    assert middleware.stats.opened == 1
@@ -0,0 +1,87 @@
+"""Тесты для отбрасывания повторно доставленных обновлений."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from aiogram.types import TelegramObject, Update
+from fakeredis.aioredis import FakeRedis
+
+from warehouse_bot.middlewares.deduplication import (
+    UpdateDeduplicationMiddleware,
+    UpdateInProgressError,
+)
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_redelivered_update_is_processed_once() -> None:
+    """
+    Тест: повтор отсекается в том же процессе и на другом воркере, а
+    обновление, обработка которого упала, обрабатывается повторно.
+    """
+    redis = FakeRedis()
+    worker = UpdateDeduplicationMiddleware(redis, ttl=60)
+    other_worker = UpdateDeduplicationMiddleware(redis, ttl=60)
+    processed: list[int] = []
+    failures = [RuntimeError("boom")]
+
+    async def handler(event: TelegramObject, _data: dict[str, Any]) -> str:
+        assert isinstance(event, Update)
+        if event.update_id == 2 and failures:
+            raise failures.pop()
+        processed.append(event.update_id)
+        return "ok"
+
+    first, second = Update(update_id=1), Update(update_id=2)
+    assert await worker(handler, first, {}) == "ok"
+    assert await worker(handler, first, {}) is None
+    assert await other_worker(handler, first, {}) is None
+    assert await redis.get("update:1") == b"done"
+    assert 0 < await redis.ttl("update:1") <= 60
+
+    with pytest.raises(RuntimeError):
+        await worker(handler, second, {})
+    assert await redis.exists("update:2") == 0
+    assert await other_worker(handler, second, {}) == "ok"
+    assert await worker(handler, second, {}) is None
+
+    assert processed == [1, 2]
+
+
+async def test_redelivery_during_processing_is_retried_not_dropped() -> None:
+    """
+    Тест: повтор, пришедший во время обработки, не отбрасывается, а
+    завершается UpdateInProgressError; после сбоя исходной обработки
+    следующая доставка обрабатывает обновление.
+    """
+    redis = FakeRedis()
+    worker = UpdateDeduplicationMiddleware(redis, ttl=60, processing_ttl=5)
+    other_worker = UpdateDeduplicationMiddleware(redis, ttl=60, processing_ttl=5)
+    started, release = asyncio.Event(), asyncio.Event()
+    processed: list[int] = []
+
+    async def failing(_event: TelegramObject, _data: dict[str, Any]) -> None:
+        started.set()
+        await release.wait()
+        raise RuntimeError("boom")
+
+    async def handler(event: TelegramObject, _data: dict[str, Any]) -> str:
+        assert isinstance(event, Update)
+        processed.append(event.update_id)
+        return "ok"
+
+    update = Update(update_id=3)
+    original = asyncio.create_task(worker(failing, update, {}))
+    await started.wait()
+    assert 0 < await redis.ttl("update:3") <= 5
+    with pytest.raises(UpdateInProgressError):
+        await other_worker(handler, update, {})
+    with pytest.raises(UpdateInProgressError):
+        await worker(handler, update, {})
+
+    release.set()
+    with pytest.raises(RuntimeError):
+        await original
+    assert await other_worker(handler, update, {}) == "ok"
+    assert processed == [3]
@@ -0,0 +1,70 @@
+"""Тесты для трассировки и профилирования обновлений."""
+
+import logging
+import pstats
+from pathlib import Path
+from typing import Any
+
+import pytest
+from aiogram.types import TelegramObject, Update
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from warehouse_bot.core.tracing import UpdateProfiler, span
+from warehouse_bot.db.instrumentation import instrument_engine
+from warehouse_bot.middlewares.tracing import TracingMiddleware, traced
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_slow_update_is_logged_with_span_tree(
+    caplog: pytest.LogCaptureFixture, tmp_path: Path
+) -> None:
+    """
+    Тест: медленное обновление пишется в журнал деревом участков с
+    middleware, хендлером и SQL-запросами; профиль сохраняется в файл.
+    """
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    profiler = UpdateProfiler()
+    profiler.start(1.0)
+    middleware = TracingMiddleware(slow_threshold=0, profiler=profiler)
+
+    async def inner(_handler: Any, event: TelegramObject, data: dict[str, Any]) -> Any:
+        return await handle(event, data)
+
+    async def handle(_event: TelegramObject, _data: dict[str, Any]) -> str:
+        with span("handler test"):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT   1"))
+        return "ok"
+
+    try:
+        with caplog.at_level(logging.WARNING, logger="warehouse_bot.slow_updates"):
+            result = await middleware(
+                lambda event, data: traced(inner, "inner")(handle, event, data),
+                Update.model_validate(
+                    {
+                        "update_id": 42,
+                        "message": {
+                            "message_id": 1,
+                            "date": 0,
+                            "chat": {"id": 7, "type": "private"},
+                        },
+                    }
+                ),
+                {},
+            )
+    finally:
+        await engine.dispose()
+
+    assert result == "ok"
+    lines = caplog.records[0].getMessage().splitlines()
+    names = [line.split("ms ", 2)[-1] for line in lines[1:]]
+    assert names == ["update 42 message", "inner", "handler test", "sql SELECT 1"]
+    assert [len(line) - len(line.lstrip()) for line in lines[1:]] == [0, 2, 4, 6]
+
+    path = tmp_path / "updates.prof"
+    assert profiler.dump(str(path)) == 1
+    assert pstats.Stats(str(path)).get_stats_profile().func_profiles
+    assert profiler.samples == 0
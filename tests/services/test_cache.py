@@ -0,0 +1,75 @@
+"""Тесты для кэша товаров."""
+
+from unittest.mock import patch
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.services import product_service
+from warehouse_bot.services.cache import MISSING, LocalTTLCache, ProductCache
+
+
+def test_local_cache_evicts_least_recently_used() -> None:
+    """При переполнении вытесняется самый давно использованный ключ."""
+    cache = LocalTTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", None)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_local_cache_expires_values() -> None:
+    """Значения перестают читаться по истечении TTL."""
+    cache = LocalTTLCache(ttl=5)
+    with patch("warehouse_bot.services.cache.time.monotonic", return_value=100.0):
+        cache.set("a", [1])
+    with patch("warehouse_bot.services.cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == [1]
+    with patch("warehouse_bot.services.cache.time.monotonic", return_value=106.0):
+        assert cache.get("a") is MISSING
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_write_invalidates_cached_lookup(session: AsyncSession) -> None:
+    """
+    Тест: отсутствие товара кэшируется, а создание товара делает
+    закэшированный ответ недействительным.
+    """
+    cache = ProductCache(FakeRedis())
+    name = "Кэш-Дрель"
+
+    assert await product_service.get_product_by_name(session, name, cache) is None
+    assert (await cache.get(f"1:name:{name}")).hit
+
+    await product_service.create_product(session, name, 3, cache=cache)
+    product = await product_service.get_product_by_name(session, name, cache)
+
+    assert product is not None
+    assert product.quantity == 3
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_stale_version_is_not_read() -> None:
+    """
+    Тест: значение, сохраненное под версией до инвалидации, не читается,
+    в том числе кэшем другого процесса, не знающим о новой версии.
+    """
+    redis = FakeRedis()
+    cache = ProductCache(redis)
+    other = ProductCache(redis)
+    lookup = await cache.get("key")
+    assert (await other.get("key")).hit is False
+
+    await cache.invalidate()
+    await cache.set(lookup.version, "key", 1)
+    assert (await cache.get("key")).hit is False
+    assert (await other.get("key")).hit is False
+
+    fresh = await other.get("key")
+    await other.set(fresh.version, "key", 2)
+    assert await cache.get("key") == (1, True, 2)
@@ -0,0 +1,41 @@
+"""Тесты для сервиса выгрузки товаров."""
+
+import csv
+import gzip
+import io
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.services import export_service, product_service
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+@pytest.mark.parametrize("compress", [False, True])
+async def test_export_products_csv_streams_all_rows(
+    session: AsyncSession, compress: bool
+) -> None:
+    """
+    Тест: выгрузка пачками меньше числа строк содержит заголовок и все
+    товары по порядку ID, а файл вывода остается открытым.
+    """
+    prefix = f"Выгрузка-{int(compress)}-"
+    for i in range(5):
+        await product_service.add_product_stock(session, f"{prefix}{i}", i)
+
+    output = io.BytesIO()
+    count = await export_service.export_products_csv(
+        session, output, compress=compress, batch_size=2
+    )
+
+    data = output.getvalue()
+    if compress:
+        data = gzip.decompress(data)
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+    assert rows[0] == list(export_service.EXPORT_COLUMNS)
+    assert len(rows) == count + 1
+    ids = [int(row[0]) for row in rows[1:]]
+    assert ids == sorted(ids)
+    ours = [row[1:3] for row in rows[1:] if row[1].startswith(prefix)]
+    assert ours == [[f"{prefix}{i}", str(i)] for i in range(5)]
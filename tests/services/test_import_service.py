@@ -0,0 +1,77 @@
+"""Тесты для сервиса импорта товаров."""
+
+import io
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.services import import_service, ledger_service, product_service
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_import_products_csv_merges_into_catalog(session: AsyncSession) -> None:
+    """
+    Тест: импорт создает новые товары, увеличивает остаток существующих,
+    суммирует повторы, пишет журнал и считает некорректные строки.
+    """
+    existing, _ = await product_service.add_product_stock(session, "Импорт-Болт", 10)
+    assert existing.id is not None
+    content = (
+        "Количество;Название\n"
+        "5;Импорт-Болт\n"
+        "3;Импорт-Гайка\n"
+        "4;Импорт-Гайка\n"
+        "\n"
+        "много;Импорт-Шайба\n"
+        "-1;Импорт-Шайба\n"
+        "2;\n"
+    )
+    file = io.BytesIO(content.encode("utf-8-sig"))
+
+    summary = await import_service.import_products_csv(
+        session, file, user_id=7, batch_size=2
+    )
+
+    assert summary == import_service.ImportSummary(created=1, updated=1, rejected=3)
+    assert not file.closed
+    bolt = await product_service.get_product_by_name(session, "Импорт-Болт")
+    nut = await product_service.get_product_by_name(session, "Импорт-Гайка")
+    assert bolt is not None and bolt.quantity == 15
+    assert nut is not None and nut.quantity == 7
+    movements = await ledger_service.get_product_movements(session, existing.id)
+    assert [(m.delta, m.user_id) for m in movements] == [(5, 7), (10, None)]
+
+    # Повторный импорт не падает на оставшейся временной таблице
+    second = await import_service.import_products_csv(
+        session, io.BytesIO(b"\xd0\x98\xd0\xbc\xd0\xbf\xd0\xbe\xd1\x80\xd1\x82-X,1\n")
+    )
+    assert second == import_service.ImportSummary(created=1, updated=0, rejected=0)
+
+
+async def test_import_products_csv_rejects_overflowing_totals(
+    session: AsyncSession,
+) -> None:
+    """
+    Тест: товары, сумма повторов или итоговый остаток которых не помещается
+    в INTEGER, не импортируются, а их строки считаются отклоненными.
+    """
+    limit = import_service.MAX_QUANTITY
+    await product_service.add_product_stock(session, "Импорт-Предел", limit - 5)
+    content = (
+        "Импорт-Предел,3\n"
+        "Импорт-Предел,3\n"
+        f"Импорт-Сумма,{limit}\n"
+        "Импорт-Сумма,1\n"
+        "Импорт-Ок,1\n"
+    )
+
+    summary = await import_service.import_products_csv(
+        session, io.BytesIO(content.encode())
+    )
+
+    assert summary == import_service.ImportSummary(created=1, updated=0, rejected=4)
+    edge = await product_service.get_product_by_name(session, "Импорт-Предел")
+    assert edge is not None and edge.quantity == limit - 5
+    assert await product_service.get_product_by_name(session, "Импорт-Сумма") is None
+    assert await product_service.get_product_by_name(session, "Импорт-Ок") is not None
@@ -0,0 +1,89 @@
+"""Тесты для журнала движения товаров и снимков остатков."""
+
+import asyncio
+import datetime
+import pathlib
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, col, select
+
+from warehouse_bot.db.models import StockSnapshot
+from warehouse_bot.services import ledger_service, product_service
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_stock_changes_are_journaled_and_replayable(
+    session: AsyncSession,
+) -> None:
+    """Каждое изменение пишет движение, а снимки не меняют расчет остатка."""
+    product, _ = await product_service.add_product_stock(
+        session, "Журнал-Краска", 10, user_id=7, update_id=100
+    )
+    assert product.id is not None
+    await product_service.update_product_quantity(
+        session, product.id, -4, user_id=7, update_id=101
+    )
+
+    movements = await ledger_service.get_product_movements(session, product.id)
+    assert [(m.delta, m.update_id) for m in movements] == [(-4, 101), (10, 100)]
+
+    now = datetime.datetime.now(datetime.UTC)
+    assert await ledger_service.get_stock_at(session, product.id, now) == 6
+
+    assert await ledger_service.compact_snapshots(session) >= 1
+    assert await ledger_service.compact_snapshots(session) == 0
+
+    await product_service.update_product_quantity(session, product.id, 5)
+    later = datetime.datetime.now(datetime.UTC)
+    assert await ledger_service.get_stock_at(session, product.id, now) == 6
+    assert await ledger_service.get_stock_at(session, product.id, later) == 11
+
+
+async def test_concurrent_compactions_do_not_double_count(
+    tmp_path: pathlib.Path,
+) -> None:
+    """
+    Тест: одновременные компактизации (как в нескольких воркерах) не
+    сворачивают один и тот же хвост журнала дважды.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/ledger.db")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with factory() as session:
+            product, _ = await product_service.add_product_stock(
+                session, "Гонка-Клей", 10
+            )
+            assert product.id is not None
+            product_id = product.id
+            await product_service.update_product_quantity(session, product_id, -3)
+
+        async def compact() -> int:
+            async with factory() as session:
+                return await ledger_service.compact_snapshots(session)
+
+        assert sorted(await asyncio.gather(compact(), compact())) == [0, 1]
+
+        async with factory() as session:
+            await product_service.update_product_quantity(session, product_id, 5)
+        assert sorted(await asyncio.gather(compact(), compact())) == [0, 1]
+
+        async with factory() as session:
+            snapshots = (
+                (
+                    await session.execute(
+                        select(StockSnapshot).order_by(col(StockSnapshot.id))
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            assert [s.quantity for s in snapshots] == [7, 12]
+            now = datetime.datetime.now(datetime.UTC)
+            assert await ledger_service.get_stock_at(session, product_id, now) == 12
+    finally:
+        await engine.dispose()
@@ -0,0 +1,87 @@
+"""Тесты для уведомлений о низких остатках."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from warehouse_bot.core.send_scheduler import SendPriority, send_priority
+from warehouse_bot.services import product_service
+from warehouse_bot.services.low_stock import LowStockNotifier
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_removals_below_minimum_yield_one_alert(session: AsyncSession) -> None:
+    """
+    Тест: серия списаний дает одно уведомление с последним остатком,
+    пополненный до порога товар из него исключается, а товар ниже порога
+    попадает в выборку частичного индекса.
+    """
+    bot = AsyncMock()
+    priorities: list[SendPriority] = []
+    bot.send_message.side_effect = lambda *_: priorities.append(send_priority.get())
+    notifier = LowStockNotifier(bot, chat_id=-100, delay=60)
+    product = await product_service.create_product(session, "Порог-Клей", 10)
+    assert product.id is not None
+    await product_service.set_min_quantity(session, product.id, 5)
+
+    restocked = await product_service.create_product(session, "Порог-Скотч", 5)
+    assert restocked.id is not None
+    await product_service.set_min_quantity(session, restocked.id, 5)
+
+    for product_id, change in [
+        (product.id, -3),
+        (restocked.id, -1),
+        (product.id, -3),
+        (product.id, -2),
+        (restocked.id, 1),
+    ]:
+        await product_service.update_product_quantity(
+            session, product_id, change, low_stock=notifier
+        )
+    # Не ждем конца окна: close() сразу отправляет накопленное
+    await notifier.close()
+
+    bot.send_message.assert_awaited_once()
+    chat_id, text = bot.send_message.await_args.args
+    assert chat_id == -100
+    assert "Порог-Клей: 2 шт. (минимум 5)" in text
+    assert "Порог-Скотч" not in text
+    assert priorities == [SendPriority.BULK]
+
+    low = await product_service.get_low_stock_products(session)
+    assert (product.id, "Порог-Клей", 2, 5) in low
+    assert restocked.id not in [item.id for item in low]
+
+
+async def test_restock_outside_check_cancels_alert(
+    session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+) -> None:
+    """
+    Тест: товар, пополненный через /add (мимо `check`), перед отправкой
+    исключается из уведомления, а оставшийся ниже порога товар
+    отправляется с текущим остатком.
+    """
+    bot = AsyncMock()
+    notifier = LowStockNotifier(
+        bot, chat_id=-100, delay=60, session_pool=session_factory
+    )
+    restocked = await product_service.create_product(session, "Перепроверка-Лента", 6)
+    low = await product_service.create_product(session, "Перепроверка-Скоба", 6)
+    for product in (restocked, low):
+        assert product.id is not None
+        await product_service.set_min_quantity(session, product.id, 5)
+        await product_service.update_product_quantity(
+            session, product.id, -3, low_stock=notifier
+        )
+    await product_service.add_product_stock(session, "Перепроверка-Лента", 10)
+    assert low.id is not None
+    await product_service.update_product_quantity(session, low.id, -1)
+
+    await notifier.close()
+
+    bot.send_message.assert_awaited_once()
+    _, text = bot.send_message.await_args.args
+    assert "Перепроверка-Лента" not in text
+    assert "Перепроверка-Скоба: 2 шт. (минимум 5)" in text
@@ -0,0 +1,93 @@
+"""Тесты для сервисного слоя управления товарами."""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.services import product_service
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_add_product_stock_creates_then_increments(
+    session: AsyncSession,
+) -> None:
+    """Upsert создает товар при первом вызове и увеличивает остаток потом."""
+    product, created = await product_service.add_product_stock(session, "Гвозди", 5)
+    assert created is True
+    assert product.quantity == 5
+
+    product, created = await product_service.add_product_stock(session, "Гвозди", 7)
+    assert created is False
+    assert product.quantity == 12
+
+
+async def test_update_product_quantity_is_conditional(session: AsyncSession) -> None:
+    """Условный UPDATE не уводит остаток в минус и сообщает причину отказа."""
+    product = await product_service.create_product(session, "Шурупы", 3)
+    assert product.id is not None
+
+    updated = await product_service.update_product_quantity(session, product.id, -3)
+    assert updated.quantity == 0
+
+    with pytest.raises(ValueError, match="Недостаточно товара"):
+        await product_service.update_product_quantity(session, product.id, -1)
+
+    with pytest.raises(ValueError, match="не найден"):
+        await product_service.update_product_quantity(session, 10**9, 1)
+
+
+async def test_get_products_page_keyset_navigation(session: AsyncSession) -> None:
+    """Keyset-пагинация листает вперед и назад без пропусков и повторов."""
+    names = [f"Пагинация-{i:02d}" for i in range(5)]
+    for name in names:
+        await product_service.create_product(session, name, 1)
+
+    first = await product_service.get_products_page(session, limit=100)
+    ours = [item for item in first.items if item.name.startswith("Пагинация-")]
+    start = first.items.index(ours[0])
+
+    page = await product_service.get_products_page(
+        session, after_id=first.items[start].id, limit=2
+    )
+    assert [item.name for item in page.items] == names[1:3]
+    assert page.has_prev is True
+    assert page.has_next is True
+
+    back = await product_service.get_products_page(
+        session, before_id=page.items[0].id, limit=2
+    )
+    assert back.items[-1].name == names[0]
+    assert back.has_next is True
+
+
+async def test_search_products_uses_name_index(session: AsyncSession) -> None:
+    """Поиск на SQLite находит товар по опечатке и учитывает новые товары."""
+    await product_service.create_product(session, "Перфоратор", 4)
+    found = await product_service.search_products(session, "Перфаратор")
+    assert [item.name for item in found] == ["Перфоратор"]
+
+    await product_service.add_product_stock(session, "Перфолента", 2)
+    found = await product_service.search_products(session, "перфо")
+    assert {item.name for item in found} == {"Перфоратор", "Перфолента"}
+
+
+async def test_products_are_scoped_by_warehouse(session: AsyncSession) -> None:
+    """Одинаковые названия на разных складах — разные товары."""
+    main, _ = await product_service.add_product_stock(session, "Склад-Доска", 4)
+    other, created = await product_service.add_product_stock(
+        session, "Склад-Доска", 9, warehouse_id=2
+    )
+    assert created is True
+    assert other.id != main.id
+    assert other.id is not None
+
+    found = await product_service.get_product_by_name(
+        session, "Склад-Доска", warehouse_id=2
+    )
+    assert found is not None and found.quantity == 9
+    assert await product_service.get_product(session, other.id) is None
+
+    page = await product_service.get_products_page(session, warehouse_id=2)
+    assert [item.name for item in page.items] == ["Склад-Доска"]
+    with pytest.raises(ValueError, match="не найден"):
+        await product_service.update_product_quantity(session, other.id, -1)
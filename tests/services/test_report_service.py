@@ -0,0 +1,57 @@
+"""Тесты для отчета по складу на дневных суммах движений."""
+
+import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.services import product_service, report_service
+from warehouse_bot.services.report_service import DailyFlow, TopMover
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+WAREHOUSE_ID = 24
+
+
+async def test_report_combines_rollup_with_journal_tail(
+    session: AsyncSession,
+) -> None:
+    """
+    Тест: отчет одинаков до и после сворачивания журнала и учитывает
+    движения, появившиеся после него.
+    """
+    today = datetime.datetime.now(datetime.UTC).date()
+    bolt, _ = await product_service.add_product_stock(
+        session, "Отчет-Болт", 10, warehouse_id=WAREHOUSE_ID
+    )
+    assert bolt.id is not None
+    await product_service.add_product_stock(
+        session, "Отчет-Гайка", 3, warehouse_id=WAREHOUSE_ID
+    )
+    await product_service.update_product_quantity(
+        session, bolt.id, -4, warehouse_id=WAREHOUSE_ID
+    )
+
+    expected = report_service.StockReport(
+        products=2,
+        total_quantity=9,
+        days=[DailyFlow(today, 13, 4)],
+        top_movers=[TopMover("Отчет-Болт", 10, 4), TopMover("Отчет-Гайка", 3, 0)],
+    )
+    report = await report_service.get_stock_report(session, warehouse_id=WAREHOUSE_ID)
+    assert report == expected
+
+    assert await report_service.rollup_movements(session) >= 2
+    assert await report_service.rollup_movements(session) == 0
+    report = await report_service.get_stock_report(session, warehouse_id=WAREHOUSE_ID)
+    assert report == expected
+
+    await product_service.update_product_quantity(
+        session, bolt.id, -1, warehouse_id=WAREHOUSE_ID
+    )
+    report = await report_service.get_stock_report(
+        session, top_limit=1, warehouse_id=WAREHOUSE_ID
+    )
+    assert report.total_quantity == 8
+    assert report.days == [DailyFlow(today, 13, 5)]
+    assert report.top_movers == [TopMover("Отчет-Болт", 10, 5)]
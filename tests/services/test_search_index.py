@@ -0,0 +1,40 @@
+"""Тесты для in-memory индекса названий товаров."""
+
+from warehouse_bot.services.search_index import NameTrie
+
+
+def make_trie(*names: str) -> NameTrie:
+    """Создает индекс с заданными названиями."""
+    trie = NameTrie()
+    for name in names:
+        trie.add(name)
+    return trie
+
+
+def test_starts_with_ignores_case_and_respects_limit() -> None:
+    """Поиск по префиксу не зависит от регистра и ограничен лимитом."""
+    trie = make_trie("Дрель", "Дрель ударная", "Долото", "дрель-миксер")
+    assert trie.starts_with("ДРЕ", limit=10) == [
+        "Дрель",
+        "Дрель ударная",
+        "дрель-миксер",
+    ]
+    assert len(trie.starts_with("д", limit=2)) == 2
+    assert trie.starts_with("Пила", limit=10) == []
+
+
+def test_similar_finds_typos_within_distance() -> None:
+    """Нечеткий поиск находит названия с опечатками в пределах порога."""
+    trie = make_trie("Молоток", "Молоко", "Отвертка")
+    assert trie.similar("Малоток", max_distance=1, limit=5) == ["Молоток"]
+    assert trie.similar("Малоко", max_distance=2, limit=5)[0] == "Молоко"
+    assert trie.similar("Пассатижи", max_distance=2, limit=5) == []
+
+
+def test_search_puts_prefix_matches_first() -> None:
+    """Комбинированный поиск ставит совпадения по префиксу первыми."""
+    trie = make_trie("Клей", "Клещи", "Клейкая лента")
+    trie.add("Клей")
+    assert len(trie) == 3
+    assert trie.search("Клей", limit=5)[:2] == ["Клей", "Клейкая лента"]
+    assert trie.search("Клещ", limit=5) == ["Клещи", "Клей"]
@@ -0,0 +1,34 @@
+"""Тесты для write-behind агрегации приращений."""
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from warehouse_bot.services import ledger_service, product_service
+from warehouse_bot.services.stock_coalescer import StockCoalescer
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_coalescer_merges_increments_and_confirms_each_caller(
+    session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+) -> None:
+    """Приращения за окно дают один upsert и свой остаток каждому вызову."""
+    coalescer = StockCoalescer(session_factory, window=0.01)
+
+    results = await asyncio.gather(
+        coalescer.add("Горячий-Клей", 1, update_id=1),
+        coalescer.add("Горячий-Клей", 2, update_id=2),
+        coalescer.add("Горячий-Клей", 3, update_id=3),
+    )
+
+    assert [product.quantity for product, _ in results] == [1, 3, 6]
+    assert [created for _, created in results] == [True, False, False]
+
+    product = await product_service.get_product_by_name(session, "Горячий-Клей")
+    assert product is not None
+    assert product.quantity == 6
+    assert product.id is not None
+    movements = await ledger_service.get_product_movements(session, product.id)
+    assert [m.update_id for m in reversed(movements)] == [1, 2, 3]
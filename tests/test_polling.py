@@ -0,0 +1,102 @@
+"""Тесты для режима long polling."""
+
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.types import Update
+
+from warehouse_bot import polling
+from warehouse_bot.polling import UpdatePoller
+
+pytestmark = pytest.mark.asyncio(scope="session")
+
+
+async def test_poller_advances_offset_past_processed_updates(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Тест: новые обновления передаются в очередь по порядку, повторно
+    полученные пропускаются, offset не уходит дальше необработанного
+    обновления, а ошибка запроса приводит к повтору, а не к остановке.
+    """
+    monkeypatch.setattr(polling, "_RETRY_DELAY", 0)
+    queue = AsyncMock()
+
+    def finish(update_id: int) -> None:
+        for call in queue.put.await_args_list:
+            if call.args[0].update_id == update_id:
+                call.kwargs["on_done"](call.args[0])
+
+    def redeliver_after_finishing() -> list[Update]:
+        finish(5)
+        finish(7)
+        return [Update(update_id=6)]
+
+    responses: list[Any] = [
+        [Update(update_id=5), Update(update_id=6)],
+        RuntimeError("network"),
+        [Update(update_id=5), Update(update_id=6), Update(update_id=7)],
+        redeliver_after_finishing,
+        asyncio.CancelledError(),
+    ]
+
+    def get_updates(**_kwargs: Any) -> Any:
+        response = responses.pop(0)
+        if isinstance(response, BaseException):
+            raise response
+        return response() if callable(response) else response
+
+    bot = AsyncMock()
+    bot.get_updates.side_effect = get_updates
+    poller = UpdatePoller(bot, queue, allowed_updates=["message"], limit=50, max_wait=0)
+
+    with pytest.raises(asyncio.CancelledError):
+        await poller.run()
+
+    assert [call.args[0].update_id for call in queue.put.await_args_list] == [5, 6, 7]
+    offsets = [call.kwargs["offset"] for call in bot.get_updates.await_args_list]
+    assert offsets == [None, 5, 5, 5, 6]
+    assert poller.offset == 6
+
+    finish(6)
+    bot.get_updates.side_effect = None
+    await poller.confirm()
+    assert bot.get_updates.await_args.kwargs == {"offset": 8, "limit": 1, "timeout": 0}
+
+
+async def test_poller_waits_for_processing_before_next_request() -> None:
+    """
+    Тест: пока полученная пачка обрабатывается, следующий getUpdates
+    не отправляется и уже полученные обновления не скачиваются повторно.
+    """
+    loop = asyncio.get_running_loop()
+    queue = AsyncMock()
+
+    def put(update: Update, on_done: Any) -> None:
+        loop.call_later(0.05, on_done, update)
+
+    queue.put.side_effect = put
+    responses: list[Any] = [
+        [Update(update_id=5), Update(update_id=6)],
+        asyncio.CancelledError(),
+    ]
+
+    def get_updates(**_kwargs: Any) -> Any:
+        response = responses.pop(0)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+    bot = AsyncMock()
+    bot.get_updates.side_effect = get_updates
+    poller = UpdatePoller(
+        bot, queue, allowed_updates=["message"], limit=50, max_wait=10
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        await poller.run()
+
+    offsets = [call.kwargs["offset"] for call in bot.get_updates.await_args_list]
+    assert offsets == [None, 7]
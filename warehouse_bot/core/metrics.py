@@ -0,0 +1,336 @@
+"""
+Метрики приложения в текстовом формате Prometheus.
+
+Значения хранятся в памяти процесса. При запуске в нескольких
+процессах-воркерах (MULTI_WORKER) каждый запрос /metrics отдает
+показатели одного случайного воркера, а не сумму по всем: сводных
+показателей по воркерам модуль не дает.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TypeVar
+
+# Границы по умолчанию для гистограмм длительности, в секундах
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Границы для гистограмм количества операций на одно обновление
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+Sample = tuple[str, dict[str, str], float]
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Базовый класс метрики."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Возвращает текущие значения метрики."""
+
+
+Collector = Callable[[], Iterable[tuple[dict[str, str], float]]]
+
+
+class _SimpleMetric(_Metric):
+    """
+    Метрика с одним значением на набор меток.
+
+    Значения могут вычисляться при каждом чтении через `callback` — так
+    отдаются показатели, которые уже ведут другие объекты (пул, очередь).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Collector | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, key, strict=True)), value
+        if self.callback is not None:
+            for labels, value in self.callback():
+                yield self.name, labels, value
+
+
+class Counter(_SimpleMetric):
+    """Монотонно растущий счетчик."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Увеличивает счетчик с заданными метками."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_SimpleMetric):
+    """Мгновенное значение."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Устанавливает значение с заданными метками."""
+        self._values[self._key(labels)] = value
+
+
+@dataclass(slots=True)
+class _HistogramSeries:
+    bucket_counts: list[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Добавляет наблюдение с заданными метками."""
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _HistogramSeries([0] * len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series.bucket_counts[index] += 1
+        series.total += value
+        series.count += 1
+
+    def samples(self) -> Iterable[Sample]:
+        for key, series in self._series.items():
+            labels = dict(zip(self.labelnames, key, strict=True))
+            for bound, bucket_count in zip(
+                self.buckets, series.bucket_counts, strict=True
+            ):
+                yield (
+                    f"{self.name}_bucket",
+                    {**labels, "le": _format_value(bound)},
+                    bucket_count,
+                )
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, series.count
+            yield f"{self.name}_sum", labels, series.total
+            yield f"{self.name}_count", labels, series.count
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+class MetricsRegistry:
+    """Набор метрик, отдаваемых эндпоинтом /metrics."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: MetricT) -> MetricT:
+        """
+        Регистрирует метрику.
+
+        Args:
+            metric: Метрика.
+
+        Returns:
+            Ту же метрику (для присваивания при объявлении).
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> _Metric | None:
+        """Возвращает зарегистрированную метрику по имени."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Формирует текстовое представление всех метрик.
+
+        Returns:
+            Текст в формате Prometheus exposition 0.0.4.
+        """
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+@dataclass(slots=True)
+class UpdateCounters:
+    """Счетчики операций, выполненных при обработке одного обновления."""
+
+    db_queries: int = 0
+    redis_calls: int = 0
+
+
+# Счетчики текущего обновления; None вне обработки обновления
+current_update: ContextVar[UpdateCounters | None] = ContextVar(
+    "current_update", default=None
+)
+
+REGISTRY = MetricsRegistry()
+
+UPDATE_DURATION = REGISTRY.register(
+    Histogram(
+        "bot_update_duration_seconds",
+        "Full processing time of an update, including middlewares.",
+        ["event_type"],
+    )
+)
+HANDLER_DURATION = REGISTRY.register(
+    Histogram(
+        "bot_handler_duration_seconds",
+        "Handler execution time by handler and FSM state.",
+        ["handler", "state"],
+    )
+)
+UPDATE_DB_QUERIES = REGISTRY.register(
+    Histogram(
+        "bot_update_db_queries",
+        "Number of SQL statements executed per update.",
+        ["event_type"],
+        buckets=COUNT_BUCKETS,
+    )
+)
+UPDATE_REDIS_CALLS = REGISTRY.register(
+    Histogram(
+        "bot_update_redis_calls",
+        "Number of Redis round trips per update.",
+        ["event_type"],
+        buckets=COUNT_BUCKETS,
+    )
+)
+DB_QUERY_DURATION = REGISTRY.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "SQL statement execution time.",
+        ["operation"],
+    )
+)
+DB_POOL_CHECKOUT_WAIT = REGISTRY.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a connection from the pool.",
+    )
+)
+REDIS_CALL_DURATION = REGISTRY.register(
+    Histogram(
+        "redis_call_duration_seconds",
+        "Redis round trip time by command.",
+        ["command"],
+    )
+)
+BOT_API_DURATION = REGISTRY.register(
+    Histogram(
+        "bot_api_request_duration_seconds",
+        "Outbound Telegram Bot API request time by method.",
+        ["method"],
+    )
+)
+BOT_API_ERRORS = REGISTRY.register(
+    Counter(
+        "bot_api_request_errors_total",
+        "Failed outbound Telegram Bot API requests by method and error.",
+        ["method", "error"],
+    )
+)
+BOT_API_THROTTLE_WAIT = REGISTRY.register(
+    Histogram(
+        "bot_api_throttle_wait_seconds",
+        "Time outbound requests waited for the send rate limiter.",
+        ["priority"],
+    )
+)
+BOT_API_RETRY_AFTER = REGISTRY.register(
+    Counter(
+        "bot_api_retry_after_total",
+        "Outbound requests rejected by Telegram flood control (HTTP 429).",
+        ["method"],
+    )
+)
+DB_POOL_CONNECTIONS = REGISTRY.register(
+    Gauge(
+        "db_pool_connections",
+        "Database pool connections by state.",
+        ["state"],
+    )
+)
+DB_SESSIONS = REGISTRY.register(
+    Counter(
+        "bot_db_sessions_total",
+        "Updates by database session usage.",
+        ["usage"],
+    )
+)
+DUPLICATE_UPDATES = REGISTRY.register(
+    Counter(
+        "bot_duplicate_updates_total",
+        "Redelivered updates dropped before processing, by detecting layer.",
+        ["layer"],
+    )
+)
+WEBHOOK_QUEUE_DEPTH = REGISTRY.register(
+    Gauge("webhook_queue_depth", "Updates waiting in the webhook queue.")
+)
+WEBHOOK_QUEUE_CAPACITY = REGISTRY.register(
+    Gauge("webhook_queue_capacity", "Total capacity of the webhook queue.")
+)
+WEBHOOK_QUEUE_UPDATES = REGISTRY.register(
+    Counter(
+        "webhook_queue_updates_total",
+        "Webhook queue updates by outcome.",
+        ["outcome"],
+    )
+)
@@ -0,0 +1,54 @@
+"""Клиент Redis с учетом обращений в метриках."""
+
+import time
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+from warehouse_bot.core.metrics import REDIS_CALL_DURATION, current_update
+from warehouse_bot.core.tracing import record_span
+
+
+def _record(command: str, started: float) -> None:
+    REDIS_CALL_DURATION.observe(time.perf_counter() - started, command=command)
+    counters = current_update.get()
+    if counters is not None:
+        counters.redis_calls += 1
+    record_span(f"redis {command}", started)
+
+
+class InstrumentedPipeline(Pipeline):
+    """
+    Конвейер Redis, учитывающий выполнение как одно обращение к серверу.
+    """
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            _record("PIPELINE", started)
+
+
+class InstrumentedRedis(Redis):
+    """
+    Клиент Redis, измеряющий длительность и количество обращений.
+
+    Каждая команда и каждый конвейер считаются одним обращением к
+    серверу; количество попадает в счетчики текущего обновления.
+    """
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            _record(str(args[0]).upper(), started)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> InstrumentedPipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
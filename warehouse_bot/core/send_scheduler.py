@@ -0,0 +1,230 @@
+"""Планировщик исходящих запросов к Telegram Bot API с ограничением частоты."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from warehouse_bot.core.metrics import BOT_API_RETRY_AFTER, BOT_API_THROTTLE_WAIT
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+class SendPriority(IntEnum):
+    """Приоритет исходящего запроса: меньшее значение обслуживается раньше."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+# Приоритет запросов, отправляемых из текущего контекста
+send_priority: ContextVar[SendPriority] = ContextVar(
+    "send_priority", default=SendPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def bulk_sends() -> Iterator[None]:
+    """
+    Помечает запросы внутри блока как массовые (уведомления, рассылки):
+    они пропускают вперед ответы пользователям.
+    """
+    token = send_priority.set(SendPriority.BULK)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Ведро токенов с очередью ожидающих по приоритету.
+
+    Токены пополняются с постоянной скоростью до `capacity`. Если токена
+    нет, запрос ждет в очереди; первым получает токен запрос с наивысшим
+    приоритетом, при равном приоритете — пришедший раньше.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def idle(self) -> bool:
+        """Ведро полное и никто не ждет: его можно безопасно удалить."""
+        self._refill()
+        return not self._waiters and self._tokens >= self.capacity
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _take(self) -> float:
+        """Забирает токен и возвращает 0 либо возвращает время ожидания."""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self, priority: int = SendPriority.INTERACTIVE) -> None:
+        """
+        Дожидается токена.
+
+        Args:
+            priority: Приоритет запроса.
+        """
+        if not self._waiters and self._take() == 0:
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._timer is None:
+            self._pump()
+        await future
+
+    def block(self, seconds: float) -> None:
+        """
+        Запрещает выдачу токенов на заданное время (после ответа 429).
+
+        Args:
+            seconds: Длительность паузы.
+        """
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    def _pump(self) -> None:
+        self._timer = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # Ожидающий был отменен
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._take()
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                return
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Middleware сессии бота, соблюдающий ограничения Telegram на отправку.
+
+    Запросы, адресованные чату (отправка и редактирование сообщений и
+    т. п.), проходят через ведро чата и общее ведро бота; ответы
+    пользователям обслуживаются раньше массовых уведомлений (см.
+    `bulk_sends`). При ответе 429 ведро чата (или общее, если чата нет)
+    ставится на паузу на `retry_after` секунд, и запрос повторяется.
+    Остальные методы проходят без ограничений.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        max_chats: int = 10_000,
+    ):
+        """
+        Args:
+            global_rate: Запросов в секунду на весь бот.
+            chat_rate: Запросов в секунду в один личный чат.
+            chat_burst: Сколько запросов в чат можно отправить подряд.
+            group_rate: Запросов в секунду в одну группу или канал.
+            max_retries: Сколько раз повторять запрос после ответа 429.
+            max_chats: Сколько ведер чатов хранить одновременно.
+        """
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._chat_buckets: OrderedDict[int | str, TokenBucket] = OrderedDict()
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is not None:
+            self._chat_buckets.move_to_end(chat_id)
+            return bucket
+        # Отрицательные ID и @username — группы и каналы с более строгим лимитом
+        is_private = isinstance(chat_id, int) and chat_id > 0
+        bucket = (
+            TokenBucket(self.chat_rate, self.chat_burst)
+            if is_private
+            else TokenBucket(self.group_rate, 1)
+        )
+        self._chat_buckets[chat_id] = bucket
+        if len(self._chat_buckets) > self.max_chats:
+            # Удаляем самые давние ведра, в которых никто не ждет
+            for stale_id in list(self._chat_buckets)[: len(self._chat_buckets) // 10]:
+                if self._chat_buckets[stale_id].idle:
+                    del self._chat_buckets[stale_id]
+        return bucket
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id: int | str | None = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = send_priority.get()
+        chat_bucket = self._chat_bucket(chat_id)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            # Сначала ведро чата: запрос, ждущий свой чат, не занимает общий токен
+            await chat_bucket.acquire(priority)
+            await self.global_bucket.acquire(priority)
+            BOT_API_THROTTLE_WAIT.observe(
+                time.perf_counter() - started, priority=priority.name.lower()
+            )
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                BOT_API_RETRY_AFTER.inc(method=type(method).__name__)
+                chat_bucket.block(e.retry_after)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logging.warning(
+                    "Flood control in chat %s, retrying in %s seconds",
+                    chat_id,
+                    e.retry_after,
+                )
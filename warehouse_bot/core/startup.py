@@ -0,0 +1,176 @@
+"""Запуск приложения в нескольких процессах-воркерах."""
+
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+from aiogram import Bot
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+T = TypeVar("T")
+
+
+class StartupTimer:
+    """
+    Замеряет шаги запуска приложения и формирует отчет.
+
+    Шаги могут выполняться параллельно, поэтому их сумма может превышать
+    общее время запуска.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.steps: list[tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """
+        Замеряет синхронный шаг запуска.
+
+        Args:
+            name: Название шага в отчете.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - started))
+
+    async def run(self, name: str, awaitable: Awaitable[T]) -> T:
+        """
+        Замеряет асинхронный шаг запуска.
+
+        Args:
+            name: Название шага в отчете.
+            awaitable: Выполняемая операция.
+
+        Returns:
+            Результат операции.
+        """
+        with self.step(name):
+            return await awaitable
+
+    def report(self) -> str:
+        """
+        Формирует строку отчета.
+
+        Returns:
+            Общее время запуска и длительность каждого шага в миллисекундах.
+        """
+        total = (time.perf_counter() - self.started) * 1000
+        steps = ", ".join(
+            f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.steps
+        )
+        return f"Startup completed in {total:.1f}ms ({steps})"
+
+
+def webhook_fingerprint(url: str, secret: str) -> str:
+    """
+    Возвращает отпечаток параметров вебхука.
+
+    Секрет не хранится в Redis в открытом виде — только хеш вместе с URL.
+
+    Args:
+        url: URL вебхука.
+        secret: Секретный токен вебхука.
+
+    Returns:
+        Шестнадцатеричный SHA-256 от URL и секрета.
+    """
+    return hashlib.sha256(f"{url}\n{secret}".encode()).hexdigest()
+
+
+async def register_webhook_once(
+    bot: Bot,
+    redis: Redis,
+    url: str,
+    secret: str,
+    lock_timeout: int = 30,
+    key_prefix: str = "webhook",
+) -> bool:
+    """
+    Регистрирует вебхук от имени одного воркера и только при изменениях.
+
+    Воркер, захвативший блокировку в Redis, сравнивает отпечаток URL и
+    секрета с сохраненным и URL с текущим вебхуком в Telegram; `set_webhook`
+    вызывается, только если что-то из этого отличается. Накопленные
+    обновления не сбрасываются. Остальные воркеры сразу возвращаются.
+
+    Args:
+        bot: Экземпляр бота.
+        redis: Клиент Redis.
+        url: URL вебхука.
+        secret: Секретный токен вебхука.
+        lock_timeout: Время жизни блокировки в секундах (на случай падения
+                      воркера, не успевшего ее снять).
+        key_prefix: Префикс ключей блокировки и отпечатка.
+
+    Returns:
+        True, если этот воркер установил вебхук.
+    """
+    lock_key = f"{key_prefix}:lock"
+    fingerprint_key = f"{key_prefix}:fingerprint"
+    token = secrets.token_hex(16)
+    if not await redis.set(lock_key, token, nx=True, ex=lock_timeout):
+        logging.info("Webhook registration is handled by another worker")
+        return False
+
+    try:
+        fingerprint = webhook_fingerprint(url, secret)
+        stored = await redis.get(fingerprint_key)
+        if stored is not None and stored.decode() == fingerprint:
+            webhook_info = await bot.get_webhook_info()
+            if webhook_info.url == url:
+                logging.info("Webhook is up to date, skipping registration")
+                return False
+
+        await bot.set_webhook(url=url, secret_token=secret)
+        await redis.set(fingerprint_key, fingerprint)
+        logging.info("Webhook registered")
+        return True
+    finally:
+        await _release_lock(redis, lock_key, token)
+
+
+async def _release_lock(redis: Redis, key: str, token: str) -> None:
+    # Снимаем блокировку, только если она все еще принадлежит этому воркеру
+    async with redis.pipeline() as pipe:
+        try:
+            await pipe.watch(key)
+            if await pipe.get(key) == token.encode():
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+        except WatchError:
+            pass
+
+
+async def warm_up_pools(engine: AsyncEngine, redis: Redis, connections: int) -> None:
+    """
+    Заранее открывает соединения с БД и Redis.
+
+    Соединения открываются одновременно и возвращаются в пулы, поэтому
+    первые обновления после старта не тратят время на их установку.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+        redis: Клиент Redis.
+        connections: Сколько соединений открыть в каждом пуле.
+    """
+
+    async def open_db_connection() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(
+        *(open_db_connection() for _ in range(connections)),
+        *(redis.ping() for _ in range(connections)),
+    )
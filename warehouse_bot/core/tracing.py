@@ -0,0 +1,196 @@
+"""Трассировка обработки обновлений и выборочное профилирование."""
+
+import cProfile
+import random
+import re
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(slots=True)
+class Span:
+    """
+    Участок обработки обновления с вложенными участками.
+
+    Атрибуты:
+        name: Название участка (middleware, SQL-запрос, вызов Bot API...).
+        started: Момент начала по `time.perf_counter()`.
+        duration: Длительность в секундах; 0, пока участок не завершен.
+        children: Вложенные участки в порядке начала.
+    """
+
+    name: str
+    started: float
+    duration: float = 0.0
+    children: list["Span"] = field(default_factory=list)
+
+    def render(self, root_started: float | None = None, depth: int = 0) -> str:
+        """
+        Формирует дерево участков в виде текста с отступами.
+
+        Args:
+            root_started: Начало корневого участка; смещения считаются от него.
+            depth: Глубина участка в дереве.
+
+        Returns:
+            По строке на участок: смещение начала, длительность и название.
+        """
+        if root_started is None:
+            root_started = self.started
+        offset = (self.started - root_started) * 1000
+        lines = [
+            f"{'  ' * depth}+{offset:.1f}ms {self.duration * 1000:.1f}ms {self.name}"
+        ]
+        for child in self.children:
+            lines.append(child.render(root_started, depth + 1))
+        return "\n".join(lines)
+
+
+# Текущий участок; None вне трассируемого обновления
+current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Записывает блок как вложенный участок текущего участка.
+
+    Вне трассируемого обновления ничего не записывает.
+
+    Args:
+        name: Название участка.
+    """
+    parent = current_span.get()
+    if parent is None:
+        yield
+        return
+    child = Span(name, time.perf_counter())
+    parent.children.append(child)
+    token = current_span.set(child)
+    try:
+        yield
+    finally:
+        child.duration = time.perf_counter() - child.started
+        current_span.reset(token)
+
+
+def record_span(name: str, started: float) -> None:
+    """
+    Добавляет в текущий участок уже завершившийся участок.
+
+    Используется там, где начало и конец операции приходят в разные
+    обратные вызовы (например, события SQLAlchemy).
+
+    Args:
+        name: Название участка.
+        started: Момент начала по `time.perf_counter()`.
+    """
+    parent = current_span.get()
+    if parent is not None:
+        parent.children.append(Span(name, started, time.perf_counter() - started))
+
+
+def sql_span_name(statement: str, limit: int = 120) -> str:
+    """
+    Формирует название участка SQL-запроса.
+
+    Args:
+        statement: Текст запроса.
+        limit: Максимальная длина текста в названии.
+
+    Returns:
+        Запрос в одну строку, обрезанный до `limit` символов.
+    """
+    text = _WHITESPACE.sub(" ", statement).strip()
+    if len(text) > limit:
+        text = text[: limit - 3] + "..."
+    return f"sql {text}"
+
+
+class UpdateProfiler:
+    """
+    Выборочное профилирование обработки обновлений с помощью cProfile.
+
+    Профилируется доля `rate` обновлений; результаты копятся в одном
+    профиле до выгрузки. cProfile профилирует поток целиком, поэтому
+    одновременно профилируется не больше одного обновления, а в профиль
+    попадают и задачи, выполнявшиеся, пока профилируемое обновление
+    ожидало ввода-вывода. Переключатель действует в пределах процесса.
+    """
+
+    def __init__(self) -> None:
+        self.rate = 0.0
+        self.samples = 0
+        self._profile = cProfile.Profile()
+        self._running = False
+
+    @property
+    def enabled(self) -> bool:
+        """Включено ли профилирование."""
+        return self.rate > 0
+
+    def start(self, rate: float) -> None:
+        """
+        Включает профилирование доли обновлений.
+
+        Args:
+            rate: Доля профилируемых обновлений, от 0 до 1.
+        """
+        self.rate = min(max(rate, 0.0), 1.0)
+
+    def stop(self) -> None:
+        """
+        Выключает профилирование; накопленный профиль сохраняется.
+        """
+        self.rate = 0.0
+
+    async def run(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет обработку обновления, профилируя ее с вероятностью `rate`.
+
+        Args:
+            func: Функция, запускающая обработку.
+
+        Returns:
+            Результат `func`.
+        """
+        if self._running or not self.enabled:
+            return await func()
+        # Случайная выборка обновлений для профилирования, не для безопасности
+        if random.random() >= self.rate:  # nosec B311
+            return await func()
+        self._running = True
+        self.samples += 1
+        profile = self._profile
+        profile.enable()
+        try:
+            return await func()
+        finally:
+            profile.disable()
+            self._running = False
+
+    def dump(self, path: str) -> int:
+        """
+        Сохраняет накопленный профиль в файл и начинает новый.
+
+        Файл читается `pstats`/snakeviz.
+
+        Args:
+            path: Путь к файлу профиля.
+
+        Returns:
+            Количество обновлений, попавших в профиль.
+        """
+        samples = self.samples
+        self._profile.dump_stats(path)
+        self._profile = cProfile.Profile()
+        self.samples = 0
+        return samples
@@ -0,0 +1,183 @@
+"""Очередь входящих обновлений с пулом обработчиков."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+# Вызывается, когда обработка обновления завершена (успешно или с ошибкой)
+DoneCallback = Callable[[Update], None]
+# Элемент очереди: момент постановки, обновление, обратный вызов
+_Item = tuple[float, Update, DoneCallback | None]
+
+
+@dataclass(slots=True)
+class UpdateQueueStats:
+    """
+    Счетчики очереди обновлений для контроля backpressure.
+
+    Атрибуты:
+        enqueued: Сколько обновлений принято в очередь.
+        rejected: Сколько обновлений отклонено из-за переполнения.
+        processed: Сколько обновлений обработано без ошибок.
+        failed: Сколько обновлений завершилось исключением.
+        wait_seconds_total: Суммарное время ожидания обновлений в очереди.
+        wait_seconds_max: Максимальное время ожидания обновления в очереди.
+    """
+
+    enqueued: int = 0
+    rejected: int = 0
+    processed: int = 0
+    failed: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class UpdateQueue:
+    """
+    Ограниченная очередь обновлений Telegram с пулом воркеров.
+
+    Каждый воркер владеет своей очередью, а обновление попадает в очередь
+    по идентификатору чата (или пользователя), поэтому обновления одного
+    чата обрабатываются строго по порядку, а разные чаты — параллельно.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        workers: int = 8,
+        maxsize: int = 1000,
+    ):
+        if workers < 1:
+            raise ValueError("Количество воркеров должно быть больше нуля.")
+        self.dp = dp
+        self.bot = bot
+        self.stats = UpdateQueueStats()
+        self._queues: list[asyncio.Queue[_Item]] = [
+            asyncio.Queue(maxsize=max(1, maxsize // workers)) for _ in range(workers)
+        ]
+        self._tasks: list[asyncio.Task[None]] = []
+        self._closing = False
+
+    @property
+    def depth(self) -> int:
+        """Текущее количество обновлений, ожидающих обработки."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def capacity(self) -> int:
+        """Суммарная вместимость очередей всех воркеров."""
+        return sum(queue.maxsize for queue in self._queues)
+
+    def snapshot(self) -> dict[str, float]:
+        """
+        Возвращает текущие показатели очереди.
+
+        Returns:
+            Словарь со счетчиками, глубиной и вместимостью очереди.
+        """
+        return {**asdict(self.stats), "depth": self.depth, "capacity": self.capacity}
+
+    def start(self) -> None:
+        """
+        Запускает воркеры.
+        """
+        self._tasks = [
+            asyncio.create_task(self._worker(queue), name=f"update-worker-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+
+    def _queue_for(self, update: Update) -> asyncio.Queue[_Item]:
+        context = UserContextMiddleware.resolve_event_context(event=update)
+        if context.chat is not None:
+            key = context.chat.id
+        elif context.user is not None:
+            key = context.user.id
+        else:
+            key = update.update_id
+        return self._queues[key % len(self._queues)]
+
+    def put_nowait(self, update: Update) -> bool:
+        """
+        Ставит обновление в очередь без ожидания.
+
+        Args:
+            update: Провалидированное обновление Telegram.
+
+        Returns:
+            True, если обновление принято, и False, если очередь чата
+            переполнена или идет остановка.
+        """
+        if self._closing:
+            self.stats.rejected += 1
+            return False
+        try:
+            self._queue_for(update).put_nowait((time.monotonic(), update, None))
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            return False
+        self.stats.enqueued += 1
+        return True
+
+    async def put(self, update: Update, on_done: DoneCallback | None = None) -> None:
+        """
+        Ставит обновление в очередь, дожидаясь свободного места.
+
+        Args:
+            update: Провалидированное обновление Telegram.
+            on_done: Вызывается после обработки обновления; для обновлений,
+                     брошенных при остановке (см. `drain`), не вызывается.
+        """
+        await self._queue_for(update).put((time.monotonic(), update, on_done))
+        self.stats.enqueued += 1
+
+    async def _worker(self, queue: asyncio.Queue[_Item]) -> None:
+        while True:
+            enqueued_at, update, on_done = await queue.get()
+            wait = time.monotonic() - enqueued_at
+            self.stats.wait_seconds_total += wait
+            self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, wait)
+            try:
+                await self.dp.feed_update(self.bot, update)
+                self.stats.processed += 1
+            except Exception:
+                self.stats.failed += 1
+                logging.exception("Error while processing update %s", update.update_id)
+            finally:
+                queue.task_done()
+            if on_done is not None:
+                on_done(update)
+
+    async def drain(self, timeout: float = 10.0) -> bool:
+        """
+        Перестает принимать обновления, дообрабатывает очередь и
+        останавливает воркеры.
+
+        Args:
+            timeout: Максимальное время ожидания дообработки, в секундах.
+
+        Returns:
+            True, если все обновления были обработаны до истечения таймаута.
+        """
+        self._closing = True
+        drained = True
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), timeout
+            )
+        except TimeoutError:
+            drained = False
+            logging.warning(
+                "Update queue drain timed out, %s updates dropped", self.depth
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        return drained
@@ -0,0 +1,119 @@
+"""Сбор метрик пула соединений и SQL-запросов."""
+
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+from warehouse_bot.core.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_QUERY_DURATION,
+    current_update,
+)
+from warehouse_bot.core.tracing import current_span, record_span, sql_span_name
+
+# Операции, для которых ведется отдельная гистограмма длительности
+_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE"})
+_STARTED_KEY = "metrics_query_started"
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время получения соединения.
+
+    В замер входит ожидание свободного соединения и, если пул еще не
+    заполнен, установка нового.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,  # noqa: ARG001
+    statement: str,  # noqa: ARG001
+    parameters: Any,  # noqa: ARG001
+    context: Any,  # noqa: ARG001
+    executemany: bool,  # noqa: ARG001
+) -> None:
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,  # noqa: ARG001
+    statement: str,
+    parameters: Any,  # noqa: ARG001
+    context: Any,  # noqa: ARG001
+    executemany: bool,  # noqa: ARG001
+) -> None:
+    started = conn.info[_STARTED_KEY].pop()
+    DB_QUERY_DURATION.observe(
+        time.perf_counter() - started, operation=_operation(statement)
+    )
+    counters = current_update.get()
+    if counters is not None:
+        counters.db_queries += 1
+    if current_span.get() is not None:
+        record_span(sql_span_name(statement), started)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # Запрос завершился ошибкой: after_cursor_execute не будет вызван
+    if context.connection is not None and context.cursor is not None:
+        started = context.connection.info.get(_STARTED_KEY)
+        if started:
+            started.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Подключает к движку сбор метрик SQL-запросов.
+
+    Длительность каждого запроса попадает в гистограмму по типу операции,
+    количество запросов — в счетчики текущего обновления, а сам запрос —
+    в дерево участков трассируемого обновления.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def pool_connections(engine: AsyncEngine) -> Iterable[tuple[dict[str, str], float]]:
+    """
+    Возвращает текущее состояние пула соединений для метрик.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+
+    Returns:
+        Пары (метки, значение) для размера пула, выданных, свободных и
+        сверхлимитных соединений. Для пулов без очереди — пустой список.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return []
+    return [
+        ({"state": "size"}, pool.size()),
+        ({"state": "checked_out"}, pool.checkedout()),
+        ({"state": "checked_in"}, pool.checkedin()),
+        ({"state": "overflow"}, max(0, pool.overflow())),
+    ]
@@ -2,15 +2,132 @@
 
 import datetime
 
+from sqlalchemy import BigInteger, Index, text
 from sqlmodel import Field, SQLModel
 
+# Склад, к которому относятся товары, созданные без явного указания склада
+DEFAULT_WAREHOUSE_ID = 1
+
+
+class Warehouse(SQLModel, table=True):
+    """Склад (площадка) со своим каталогом товаров."""
+
+    id: int | None = Field(default=None, primary_key=True)
+    name: str = Field(unique=True, max_length=100)
+
 
 class Product(SQLModel, table=True):
-    """Модель товара на складе."""
+    """
+    Модель товара на складе.
+
+    Название уникально в пределах склада. Все запросы каталога содержат
+    условие по `warehouse_id`, поэтому обслуживаются составными индексами
+    с ним в начале и не читают товары других складов.
+    """
+
+    __table_args__ = (
+        Index("ix_product_warehouse_id_name", "warehouse_id", "name", unique=True),
+        # Триграммный индекс для поиска по префиксу и с опечатками (pg_trgm)
+        Index(
+            "ix_product_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # Частичный индекс только по товарам ниже порога: запрос «что
+        # заканчивается» читает их, а не весь каталог
+        Index(
+            "ix_product_low_stock",
+            "warehouse_id",
+            "name",
+            postgresql_where=text("quantity < min_quantity"),
+            sqlite_where=text("quantity < min_quantity"),
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
-    name: str = Field(index=True, unique=True, max_length=100)
+    warehouse_id: int = Field(
+        default=DEFAULT_WAREHOUSE_ID,
+        foreign_key="warehouse.id",
+        sa_column_kwargs={"server_default": str(DEFAULT_WAREHOUSE_ID)},
+    )
+    name: str = Field(max_length=100)
     quantity: int = Field(default=0)
+    # Минимальный остаток; при падении ниже него отправляется уведомление.
+    # 0 — порог не задан.
+    min_quantity: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     created_at: datetime.datetime = Field(
         default_factory=lambda: datetime.datetime.now(datetime.UTC)
     )
+
+
+class StockMovement(SQLModel, table=True):
+    """
+    Запись журнала движения товара.
+
+    Журнал только дополняется: каждое изменение остатка пишет сюда строку
+    в той же транзакции, что и обновление `Product.quantity`.
+    """
+
+    __tablename__ = "stock_movement"
+    __table_args__ = (
+        # BRIN-индекс компактен и эффективен, т.к. записи идут по времени
+        Index(
+            "ix_stock_movement_created_at_brin",
+            "created_at",
+            postgresql_using="brin",
+        ),
+        # Хвост журнала по товару после последнего снимка
+        Index("ix_stock_movement_product_id_id", "product_id", "id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    product_id: int = Field(foreign_key="product.id")
+    delta: int
+    user_id: int | None = Field(default=None, sa_type=BigInteger)
+    update_id: int | None = Field(default=None, sa_type=BigInteger)
+    created_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.UTC)
+    )
+
+
+class StockSnapshot(SQLModel, table=True):
+    """
+    Снимок остатка товара, включающий движения до `movement_id`.
+    """
+
+    __tablename__ = "stock_snapshot"
+    __table_args__ = (
+        Index("ix_stock_snapshot_product_id_movement_id", "product_id", "movement_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    product_id: int = Field(foreign_key="product.id")
+    quantity: int
+    movement_id: int
+    taken_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.UTC)
+    )
+
+
+class StockDailyRollup(SQLModel, table=True):
+    """
+    Приход и расход товара за день, включающие журнал до `movement_id`.
+
+    Поддерживается фоновым сворачиванием хвоста журнала, поэтому отчеты
+    читают готовые суммы, а не агрегируют всю историю движений.
+    """
+
+    __tablename__ = "stock_daily_rollup"
+    __table_args__ = (
+        Index("ix_stock_daily_rollup_warehouse_id_day", "warehouse_id", "day"),
+        # Граница уже свернутой части журнала: max(movement_id)
+        Index("ix_stock_daily_rollup_movement_id", "movement_id"),
+    )
+
+    product_id: int = Field(foreign_key="product.id", primary_key=True)
+    day: datetime.date = Field(primary_key=True)
+    warehouse_id: int = Field(foreign_key="warehouse.id")
+    inflow: int = Field(default=0)
+    outflow: int = Field(default=0)
+    movement_id: int
@@ -0,0 +1,171 @@
+"""Маршрутизация запросов между основной базой и репликами для чтения."""
+
+import functools
+import random
+from collections.abc import Awaitable, Callable, Coroutine, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, ParamSpec, TypeVar
+
+from sqlalchemy import Engine, Select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Ключ `Session.info`: сессия уже писала в основную базу
+WROTE_KEY = "wrote_to_primary"
+# Ключ данных FSM: до какого момента (unix time) читать из основной базы
+PRIMARY_UNTIL_KEY = "primary_until"
+
+# Выполняется функция, которой допустимо читать с реплики
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+# Все чтения текущего обновления должны идти в основную базу
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+
+@dataclass(slots=True)
+class PrimaryWrites:
+    """
+    Отметка о записи в основную базу за время обработки обновления.
+
+    Атрибуты:
+        wrote: Была ли запись через любую сессию.
+    """
+
+    wrote: bool = False
+
+
+# Отметка текущего обновления; None вне `track_primary_writes`
+_primary_writes: ContextVar[PrimaryWrites | None] = ContextVar(
+    "primary_writes", default=None
+)
+
+
+def replica_read(
+    func: Callable[P, Awaitable[R]],
+) -> Callable[P, Coroutine[Any, Any, R]]:
+    """
+    Помечает функцию сервисного слоя как только читающую: ее SELECT-запросы
+    могут выполняться на реплике.
+
+    Args:
+        func: Асинхронная функция, не изменяющая данные.
+
+    Returns:
+        Обертка, разрешающая чтение с реплики на время вызова.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        token = _replica_reads.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """
+    Направляет все чтения внутри блока в основную базу, в том числе из
+    функций, помеченных `replica_read`.
+    """
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def primary_reads_active() -> bool:
+    """
+    Проверяет, направлены ли чтения текущего обновления в основную базу.
+
+    Returns:
+        True внутри `primary_reads`.
+    """
+    return _primary_reads.get()
+
+
+@contextmanager
+def track_primary_writes() -> Iterator[PrimaryWrites]:
+    """
+    Отмечает записи в основную базу внутри блока.
+
+    Учитываются записи через `RoutingSession` и записи, о которых сообщил
+    `note_primary_write` (например, выполненные чужой сессией, как у
+    `StockCoalescer`).
+
+    Yields:
+        Объект PrimaryWrites, заполняемый по ходу блока.
+    """
+    writes = PrimaryWrites()
+    token = _primary_writes.set(writes)
+    try:
+        yield writes
+    finally:
+        _primary_writes.reset(token)
+
+
+def note_primary_write() -> None:
+    """
+    Сообщает, что текущее обновление изменило данные в основной базе.
+
+    Вне `track_primary_writes` ничего не делает.
+    """
+    writes = _primary_writes.get()
+    if writes is not None:
+        writes.wrote = True
+
+
+class RoutingSession(Session):
+    """
+    Синхронная сессия, выбирающая движок для каждого запроса.
+
+    SELECT внутри `replica_read` уходит на случайную реплику, все остальное
+    (flush, INSERT/UPDATE/DELETE, текстовые запросы) — в основную базу.
+    После первой записи сессия читает только из основной базы, чтобы видеть
+    собственные изменения; факт записи сохраняется в `info[WROTE_KEY]`
+    и передается в `note_primary_write`.
+
+    Используется через `async_sessionmaker(sync_session_class=RoutingSession,
+    replicas=[...])`.
+    """
+
+    def __init__(
+        self, *args: Any, replicas: Sequence[Engine] = (), **kwargs: Any
+    ) -> None:
+        """
+        Args:
+            *args: Аргументы `Session`.
+            replicas: Синхронные движки реплик (`AsyncEngine.sync_engine`).
+            **kwargs: Аргументы `Session`.
+        """
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+
+    def get_bind(
+        self, mapper: Any = None, clause: Any = None, **kwargs: Any
+    ) -> Engine | Connection:
+        """
+        Возвращает движок для запроса: реплику или основную базу.
+        """
+        if (
+            self.replicas
+            and isinstance(clause, Select)
+            and not self._flushing
+            and _replica_reads.get()
+            and not _primary_reads.get()
+            and not self.info.get(WROTE_KEY)
+        ):
+            # Реплика выбирается для балансировки, а не для безопасности
+            return random.choice(self.replicas)  # nosec B311
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info[WROTE_KEY] = True
+            note_primary_write()
+        return super().get_bind(mapper, clause=clause, **kwargs)
@@ -1,31 +1,157 @@
 """Настройка сессии базы данных."""
 
+import uuid
 from collections.abc import AsyncGenerator
+from functools import lru_cache
+from typing import Any
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
-from warehouse_bot.core.config import settings
+from warehouse_bot.core.config import get_settings
+from warehouse_bot.db.instrumentation import TimedAsyncQueuePool, instrument_engine
+from warehouse_bot.db.routing import RoutingSession
 
-# Создаем асинхронный "движок" для SQLAlchemy
-# Он будет управлять подключениями к базе данных.
-async_engine = create_async_engine(
-    settings.database_url,
-    echo=False,  # В production лучше выключить, чтобы не логировать все SQL-запросы
-    pool_pre_ping=True,  # Проверяет "живо" ли соединение перед использованием
-)
 
-# Создаем фабрику асинхронных сессий
-# Эта фабрика будет создавать новые сессии по запросу.
-AsyncSessionFactory = async_sessionmaker(
-    async_engine,
-    autoflush=False,
-    expire_on_commit=False,
-    class_=AsyncSession,
-)
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def build_engine(
+    url: str,
+    *,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_recycle: int = -1,
+    pool_pre_ping: bool = True,
+    statement_cache_size: int = 100,
+) -> AsyncEngine:
+    """
+    Создает асинхронный движок с метриками и заданными параметрами пула.
+
+    Args:
+        url: Строка подключения SQLAlchemy.
+        pool_size: Количество постоянных соединений в пуле.
+        max_overflow: Сколько соединений можно открыть сверх `pool_size`.
+        pool_recycle: Время жизни соединения в секундах; -1 — без ограничения.
+        pool_pre_ping: Проверять ли соединение перед выдачей из пула.
+        statement_cache_size: Размер кэша подготовленных выражений asyncpg
+                              (для других драйверов не используется); 0 —
+                              режим, совместимый с pgbouncer в режиме
+                              transaction.
+
+    Returns:
+        Асинхронный движок SQLAlchemy.
+    """
+    connect_args: dict[str, Any] = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        # Кэш выражений SQLAlchemy и собственный кэш asyncpg
+        connect_args["prepared_statement_cache_size"] = statement_cache_size
+        connect_args["statement_cache_size"] = statement_cache_size
+        if statement_cache_size == 0:
+            # За pgbouncer соединение с сервером меняется между транзакциями:
+            # уникальные имена не конфликтуют с выражениями других клиентов
+            connect_args["prepared_statement_name_func"] = _unique_statement_name
+    engine = create_async_engine(
+        url,
+        echo=False,  # В production лучше выключить, чтобы не логировать все SQL
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        poolclass=TimedAsyncQueuePool,  # Замеряет ожидание соединения из пула
+        connect_args=connect_args,
+    )
+    instrument_engine(engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> AsyncEngine:
+    """
+    Возвращает асинхронный "движок" SQLAlchemy, создавая его при первом вызове.
+
+    Движок управляет подключениями к базе данных. Соединения при создании
+    не открываются.
+
+    Returns:
+        Асинхронный движок приложения.
+    """
+    settings = get_settings()
+    return build_engine(
+        settings.database_url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_replica_engines() -> tuple[AsyncEngine, ...]:
+    """
+    Возвращает движки реплик для чтения из `DB_REPLICA_URLS` с теми же
+    параметрами пула, что и у основной базы.
+
+    Returns:
+        Движки реплик; пустой кортеж, если реплики не заданы.
+    """
+    settings = get_settings()
+    return tuple(
+        build_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        )
+        for url in settings.DB_REPLICA_URLS
+    )
+
+
+@lru_cache(maxsize=1)
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """
+    Возвращает фабрику асинхронных сессий, создавая ее при первом вызове.
+
+    Если заданы реплики, сессии маршрутизируют чтения через `RoutingSession`.
+
+    Returns:
+        Фабрика, создающая новые сессии по запросу.
+    """
+    replicas = get_replica_engines()
+    if not replicas:
+        return async_sessionmaker(
+            get_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+            class_=AsyncSession,
+        )
+    return async_sessionmaker(
+        get_engine(),
+        autoflush=False,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        replicas=[engine.sync_engine for engine in replicas],
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # Совместимость со старыми именами модуля: движок и фабрика создаются
+    # при первом обращении, а не при импорте.
+    if name == "async_engine":
+        return get_engine()
+    if name == "AsyncSessionFactory":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
@@ -35,5 +161,5 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     Yields:
         Объект асинхронной сессии SQLAlchemy.
     """
-    async with AsyncSessionFactory() as session:
+    async with get_session_factory()() as session:
         yield session
@@ -0,0 +1,243 @@
+"""Хранилище FSM в одном хеше Redis с отложенной записью."""
+
+import copy
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    DEFAULT_DESTINY,
+    BaseStorage,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StateType,
+    StorageKey,
+)
+from aiogram.types import TelegramObject
+from redis.asyncio import Redis
+
+from warehouse_bot.core.tracing import span
+
+_STATE_FIELD = "state"
+_DATA_FIELD = "data"
+
+# Назначение ключей FSM для настроек пользователя: такие ключи хранятся
+# без срока жизни и читаются вместе с основным ключем
+PERSISTENT_DESTINY = "persistent"
+_PERSISTENT_SUFFIX = f":{PERSISTENT_DESTINY}"
+
+
+@dataclass(slots=True)
+class _Record:
+    """
+    Состояние и данные одного ключа FSM в пределах обновления.
+
+    Атрибуты:
+        state: Текущее состояние.
+        data: Текущие данные.
+        loaded: Прочитан ли хеш из Redis.
+        dirty: Поля, измененные, но еще не записанные в Redis.
+    """
+
+    state: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+    loaded: bool = False
+    dirty: set[str] = field(default_factory=set)
+
+
+class HashRedisStorage(BaseStorage):
+    """
+    Хранилище FSM, в котором состояние и данные ключа лежат в одном хеше.
+
+    В пределах обновления (см. `update_scope`) хеш читается из Redis не
+    более одного раза, последующие чтения обслуживаются из локального
+    кэша, а все изменения записываются одним конвейером в конце
+    обновления. Вне обновления чтение и запись идут в Redis сразу.
+    Каждая запись продлевает время жизни хеша, поэтому брошенные диалоги
+    со временем удаляются.
+
+    Ключи с назначением `PERSISTENT_DESTINY` лежат в отдельном хеше рядом
+    с основным и не удаляются по времени; в области обновления он
+    читается тем же запросом, что и основной.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_builder: KeyBuilder | None = None,
+        ttl: int | None = None,
+    ):
+        """
+        Args:
+            redis: Клиент Redis.
+            key_builder: Построитель ключей Redis по ключу FSM.
+            ttl: Время жизни хеша после последней записи, в секундах;
+                 None — без ограничения.
+        """
+        self.redis = redis
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.ttl = ttl
+        self._records: ContextVar[dict[str, _Record] | None] = ContextVar(
+            f"fsm_records_{id(self)}", default=None
+        )
+
+    @asynccontextmanager
+    async def update_scope(self) -> AsyncIterator[None]:
+        """
+        Включает локальный кэш и отложенную запись на время обновления.
+
+        Накопленные изменения записываются при выходе, в том числе если
+        обработка завершилась исключением. Вложенные области используют
+        внешнюю.
+        """
+        if self._records.get() is not None:
+            yield
+            return
+        records: dict[str, _Record] = {}
+        token = self._records.set(records)
+        try:
+            yield
+        finally:
+            self._records.reset(token)
+            await self._flush(records)
+
+    async def _flush(self, records: dict[str, _Record]) -> None:
+        dirty = {
+            redis_key: record for redis_key, record in records.items() if record.dirty
+        }
+        if not dirty:
+            return
+        with span("fsm flush"):
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for redis_key, record in dirty.items():
+                    self._queue_write(pipe, redis_key, record, record.dirty)
+                await pipe.execute()
+
+    def _queue_write(
+        self, pipe: Any, redis_key: str, record: _Record, fields: set[str]
+    ) -> None:
+        values: dict[str, str | None] = {}
+        if _STATE_FIELD in fields:
+            values[_STATE_FIELD] = record.state
+        if _DATA_FIELD in fields:
+            values[_DATA_FIELD] = json.dumps(record.data) if record.data else None
+        removed = [name for name, value in values.items() if value is None]
+        mapping = {name: value for name, value in values.items() if value is not None}
+        if removed:
+            pipe.hdel(redis_key, *removed)
+        if mapping:
+            pipe.hset(redis_key, mapping=mapping)
+            if self.ttl is not None and not redis_key.endswith(_PERSISTENT_SUFFIX):
+                pipe.expire(redis_key, self.ttl)
+
+    def _redis_key(self, key: StorageKey) -> str:
+        if key.destiny == PERSISTENT_DESTINY:
+            default_key = replace(key, destiny=DEFAULT_DESTINY)
+            return self.key_builder.build(default_key) + _PERSISTENT_SUFFIX
+        return self.key_builder.build(key)
+
+    async def _load(self, records: Mapping[str, _Record]) -> None:
+        with span("fsm load"):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for redis_key in records:
+                    pipe.hgetall(redis_key)
+                results: list[dict[bytes, bytes]] = await pipe.execute()
+        for record, raw in zip(records.values(), results, strict=True):
+            self._apply(record, raw)
+
+    @staticmethod
+    def _apply(record: _Record, raw: dict[bytes, bytes]) -> None:
+        # Поля, измененные в этом обновлении, важнее сохраненных
+        if _STATE_FIELD not in record.dirty:
+            state = raw.get(_STATE_FIELD.encode())
+            record.state = state.decode() if state is not None else None
+        if _DATA_FIELD not in record.dirty:
+            data = raw.get(_DATA_FIELD.encode())
+            record.data = json.loads(data) if data is not None else {}
+        record.loaded = True
+
+    async def _read(self, key: StorageKey) -> _Record:
+        redis_key = self._redis_key(key)
+        records = self._records.get()
+        if records is None:
+            record = _Record()
+            await self._load({redis_key: record})
+            return record
+        record = records.setdefault(redis_key, _Record())
+        if not record.loaded:
+            pending = {redis_key: record}
+            if key.destiny == DEFAULT_DESTINY:
+                # Настройки пользователя нужны почти каждому обновлению
+                persistent_key = self._redis_key(
+                    replace(key, destiny=PERSISTENT_DESTINY)
+                )
+                persistent = records.setdefault(persistent_key, _Record())
+                if not persistent.loaded:
+                    pending[persistent_key] = persistent
+            await self._load(pending)
+        return record
+
+    async def _write(self, key: StorageKey, **values: Any) -> None:
+        redis_key = self._redis_key(key)
+        records = self._records.get()
+        record = (
+            _Record() if records is None else records.setdefault(redis_key, _Record())
+        )
+        for name, value in values.items():
+            setattr(record, name, value)
+            record.dirty.add(name)
+        if records is None:
+            with span("fsm write"):
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    self._queue_write(pipe, redis_key, record, record.dirty)
+                    await pipe.execute()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if isinstance(state, State):
+            state = state.state
+        await self._write(key, state=state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._read(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        await self._write(key, data=copy.deepcopy(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return copy.deepcopy((await self._read(key)).data)
+
+    async def close(self) -> None:
+        await self.redis.aclose(close_connection_pool=True)
+
+
+class FSMUpdateScopeMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений, открывающий область обновления
+    хранилища FSM: состояние читается один раз, изменения записываются
+    одним конвейером после обработки.
+
+    Регистрируется перед FSM-middleware диспетчера, чтобы в область
+    попало и чтение состояния, которое тот выполняет.
+    """
+
+    def __init__(self, storage: HashRedisStorage):
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with self.storage.update_scope():
+            return await handler(event, data)
@@ -0,0 +1,64 @@
+"""Текущий склад пользователя в данных FSM."""
+
+from dataclasses import replace
+
+from aiogram.fsm.context import FSMContext
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.db.routing import PRIMARY_UNTIL_KEY
+from warehouse_bot.fsm.storage import PERSISTENT_DESTINY
+
+# Ключ настроек пользователя с ID текущего склада
+WAREHOUSE_KEY = "warehouse_id"
+# Данные диалога, которые переживают его завершение
+_PERSISTENT_KEYS = (PRIMARY_UNTIL_KEY,)
+
+
+def _user_settings(state: FSMContext) -> FSMContext:
+    """
+    Возвращает контекст настроек пользователя.
+
+    Настройки хранятся под отдельным ключем FSM без срока жизни, поэтому
+    выбор склада не пропадает вместе с брошенным диалогом.
+    """
+    return FSMContext(state.storage, replace(state.key, destiny=PERSISTENT_DESTINY))
+
+
+async def get_current_warehouse(state: FSMContext) -> int:
+    """
+    Возвращает ID текущего склада пользователя.
+
+    Args:
+        state: Контекст FSM пользователя.
+
+    Returns:
+        ID склада; склад по умолчанию, если пользователь его не выбирал.
+    """
+    data = await _user_settings(state).get_data()
+    return int(data.get(WAREHOUSE_KEY, DEFAULT_WAREHOUSE_ID))
+
+
+async def set_current_warehouse(state: FSMContext, warehouse_id: int) -> None:
+    """
+    Делает склад текущим для пользователя.
+
+    Args:
+        state: Контекст FSM пользователя.
+        warehouse_id: ID склада.
+    """
+    await _user_settings(state).update_data({WAREHOUSE_KEY: warehouse_id})
+
+
+async def finish_dialog(state: FSMContext) -> None:
+    """
+    Завершает сценарий: сбрасывает состояние и данные диалога.
+
+    В отличие от `state.clear()`, выбранный пользователем склад и
+    привязка чтений к основной базе после записи сохраняются.
+
+    Args:
+        state: Контекст FSM пользователя.
+    """
+    data = await state.get_data()
+    await state.set_state(None)
+    await state.set_data({key: data[key] for key in _PERSISTENT_KEYS if key in data})
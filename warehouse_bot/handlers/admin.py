@@ -0,0 +1,79 @@
+"""Обработчики команд администратора."""
+
+import datetime
+import logging
+import os
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from warehouse_bot.core.tracing import UpdateProfiler
+
+router = Router()
+
+
+@router.message(Command(commands=["profile"]))
+async def handle_profile(
+    message: Message,
+    command: CommandObject,
+    update_profiler: UpdateProfiler | None = None,
+    admin_ids: frozenset[int] = frozenset(),
+    profile_dir: str = "profiles",
+) -> None:
+    """
+    Обработчик команды /profile [процент|off|dump].
+    Без аргумента показывает состояние профилирования, с процентом —
+    профилирует эту долю обновлений, `off` — выключает, `dump` — сохраняет
+    накопленный профиль в файл на сервере.
+
+    Args:
+        message: Объект сообщения от пользователя.
+        command: Разобранная команда с аргументами.
+        update_profiler: Профилировщик обновлений (передается через данные
+                         диспетчера).
+        admin_ids: ID администраторов (передаются через данные диспетчера).
+        profile_dir: Каталог для профилей (передается через данные диспетчера).
+    """
+    if (
+        update_profiler is None
+        or message.from_user is None
+        or message.from_user.id not in admin_ids
+    ):
+        await message.answer("Команда доступна только администраторам.")
+        return
+
+    argument = (command.args or "").strip().lower()
+    try:
+        if not argument:
+            status = (
+                f"{update_profiler.rate:.0%} обновлений"
+                if update_profiler.enabled
+                else "выключено"
+            )
+            await message.answer(
+                f"Профилирование: {status}.\n"
+                f"В профиле обновлений: {update_profiler.samples}.\n"
+                "Использование: /profile <процент> | off | dump"
+            )
+        elif argument == "off":
+            update_profiler.stop()
+            await message.answer("Профилирование выключено.")
+        elif argument == "dump":
+            os.makedirs(profile_dir, exist_ok=True)
+            timestamp = datetime.datetime.now(datetime.UTC).strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(profile_dir, f"updates-{timestamp}-{os.getpid()}.prof")
+            samples = update_profiler.dump(path)
+            await message.answer(f"Профиль {samples} обновлений сохранен: {path}")
+        else:
+            percent = float(argument.rstrip("%"))
+            if not 0 < percent <= 100:
+                raise ValueError(argument)
+            update_profiler.start(percent / 100)
+            await message.answer(f"Профилируется {percent:g}% обновлений.")
+
+    except ValueError:
+        await message.answer("Использование: /profile <процент> | off | dump")
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_profile")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
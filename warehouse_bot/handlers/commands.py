@@ -4,15 +4,37 @@ import logging
 
 from aiogram import Router
 from aiogram.filters import Command, CommandStart
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.keyboards.products import (
+    ProductListCallback,
+    products_page_keyboard,
+)
 from warehouse_bot.services import product_service
+from warehouse_bot.services.cache import ProductCache
 
 # Создаем "роутер" для наших хендлеров.
 router = Router()
 
 
+def _render_products_page(page: product_service.ProductPage) -> str:
+    """
+    Формирует текст страницы списка товаров.
+
+    Args:
+        page: Страница товаров.
+
+    Returns:
+        Текст сообщения.
+    """
+    response_lines = ["Список товаров на складе:"]
+    for item in page.items:
+        response_lines.append(f"- {item.name}: {item.quantity} шт.")
+    return "\n".join(response_lines)
+
+
 @router.message(CommandStart())
 async def handle_start(message: Message) -> None:
     """
@@ -22,31 +44,85 @@ async def handle_start(message: Message) -> None:
 
 
 @router.message(Command(commands=["list"]))
-async def handle_list_products(message: Message, session: AsyncSession) -> None:
+async def handle_list_products(
+    message: Message,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
     """
     Обработчик команды /list.
-    Показывает список всех товаров на складе.
+    Показывает первую страницу списка товаров на складе.
 
     Args:
         message: Объект сообщения от пользователя.
         session: Сессия базы данных (передается через middleware).
+        product_cache: Кэш товаров (передается через данные диспетчера).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
     """
     try:
-        products = await product_service.get_all_products(session)
+        page = await product_service.get_products_page(
+            session, cache=product_cache, warehouse_id=warehouse_id
+        )
 
-        if not products:
+        if not page.items:
             await message.answer("Склад пуст.")
             return
 
-        # Формируем красивый ответ
-        response_lines = ["Список товаров на складе:"]
-        for product in products:
-            response_lines.append(f"- {product.name}: {product.quantity} шт.")
-
-        await message.answer("\n".join(response_lines))
+        await message.answer(
+            _render_products_page(page), reply_markup=products_page_keyboard(page)
+        )
 
     except Exception:
         # 🛡️ Логируем полную информацию об ошибке
         logging.exception("Произошла ошибка в хендлере handle_list_products")
         # 🗣️ Сообщаем пользователю, что что-то пошло не так
         await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
+
+
+@router.callback_query(ProductListCallback.filter())
+async def handle_list_page(
+    callback: CallbackQuery,
+    callback_data: ProductListCallback,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Обработчик кнопок навигации по списку товаров.
+
+    Args:
+        callback: Callback-запрос от inline-кнопки.
+        callback_data: Распакованные данные кнопки.
+        session: Сессия базы данных (передается через middleware).
+        product_cache: Кэш товаров (передается через данные диспетчера).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    try:
+        if callback_data.direction == "prev":
+            page = await product_service.get_products_page(
+                session,
+                before_id=callback_data.cursor,
+                cache=product_cache,
+                warehouse_id=warehouse_id,
+            )
+        else:
+            page = await product_service.get_products_page(
+                session,
+                after_id=callback_data.cursor,
+                cache=product_cache,
+                warehouse_id=warehouse_id,
+            )
+
+        if not page.items or not isinstance(callback.message, Message):
+            await callback.answer("Больше товаров нет.")
+            return
+
+        await callback.message.edit_text(
+            _render_products_page(page), reply_markup=products_page_keyboard(page)
+        )
+        await callback.answer()
+
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_list_page")
+        await callback.answer("Произошла внутренняя ошибка. Попробуйте позже.")
@@ -0,0 +1,94 @@
+"""Обработчик команды выгрузки каталога товаров."""
+
+import logging
+import tempfile
+from collections.abc import AsyncGenerator
+from datetime import date
+from typing import IO, TYPE_CHECKING
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import InputFile, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.services import export_service
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+router = Router()
+
+# Файлы до этого размера держим в памяти, больше — сбрасываем на диск
+_SPOOL_MAX_SIZE = 1024 * 1024
+# Ограничение Bot API на размер отправляемого документа
+_MAX_DOCUMENT_SIZE = 50 * 1024 * 1024
+
+
+class SpooledInputFile(InputFile):
+    """
+    Документ для отправки из уже открытого файла.
+
+    Файл читается кусками при загрузке, а не целиком в память.
+    """
+
+    def __init__(
+        self, file: IO[bytes], filename: str, chunk_size: int = 64 * 1024
+    ) -> None:
+        """
+        Args:
+            file: Открытый двоичный файл; читается с начала.
+            filename: Имя файла для Telegram.
+            chunk_size: Размер куска чтения.
+        """
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.file = file
+
+    async def read(self, bot: "Bot") -> AsyncGenerator[bytes, None]:  # noqa: ARG002
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+
+@router.message(Command(commands=["export"]))
+async def handle_export(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Обработчик команды /export [gz].
+    Отправляет весь каталог товаров текущего склада CSV-документом
+    (со сжатием при `gz`).
+
+    Args:
+        message: Объект сообщения от пользователя.
+        command: Разобранная команда с аргументами.
+        session: Сессия базы данных (передается через middleware).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    compress = (command.args or "").strip().lower() in {"gz", "gzip"}
+    filename = f"products_{date.today().isoformat()}.csv"
+    if compress:
+        filename += ".gz"
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE) as file:
+            count = await export_service.export_products_csv(
+                session, file, compress=compress, warehouse_id=warehouse_id
+            )
+            size = file.tell()
+            if size > _MAX_DOCUMENT_SIZE:
+                hint = "" if compress else " Попробуйте /export gz."
+                await message.answer(
+                    "Выгрузка больше 50 МБ и не может быть отправлена." + hint
+                )
+                return
+            await message.answer_document(
+                SpooledInputFile(file, filename),
+                caption=f"Выгружено товаров: {count}",
+            )
+
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_export")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
@@ -0,0 +1,83 @@
+"""Обработчик загрузки CSV-файла с товарами."""
+
+import csv
+import logging
+import tempfile
+from typing import BinaryIO, cast
+
+from aiogram import Bot, F, Router
+from aiogram.filters import StateFilter
+from aiogram.types import Message, Update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.services import import_service
+from warehouse_bot.services.cache import ProductCache
+
+router = Router()
+
+# Файлы до этого размера держим в памяти, больше — сбрасываем на диск
+_SPOOL_MAX_SIZE = 1024 * 1024
+# Ограничение Bot API на размер скачиваемого ботом файла
+_MAX_DOWNLOAD_SIZE = 20 * 1024 * 1024
+
+
+# Только вне диалогов: CSV, присланный посреди /add или /remove, не импортируем
+@router.message(StateFilter(None), F.document.file_name.lower().endswith(".csv"))
+async def handle_import_csv(
+    message: Message,
+    bot: Bot,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    event_update: Update | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Обработчик загруженного CSV-документа с колонками названия и количества.
+    Создает новые товары и увеличивает остаток существующих на текущем
+    складе.
+
+    Args:
+        message: Сообщение с документом.
+        bot: Экземпляр бота для скачивания файла.
+        session: Сессия базы данных (передается через middleware).
+        product_cache: Кэш товаров (передается через данные диспетчера).
+        event_update: Обновление Telegram для журнала движений.
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    document = message.document
+    if document is None:
+        await message.answer("Пришлите CSV-файл документом.")
+        return
+    if document.file_size is not None and document.file_size > _MAX_DOWNLOAD_SIZE:
+        await message.answer("Файл больше 20 МБ. Разбейте его на несколько частей.")
+        return
+
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE) as file:
+            await bot.download(document, destination=cast(BinaryIO, file))
+            summary = await import_service.import_products_csv(
+                session,
+                file,
+                cache=product_cache,
+                user_id=message.from_user.id if message.from_user else None,
+                update_id=event_update.update_id if event_update else None,
+                warehouse_id=warehouse_id,
+            )
+    except (UnicodeDecodeError, csv.Error):
+        await message.answer(
+            "Не удалось прочитать файл. Ожидается CSV в кодировке UTF-8 "
+            "с колонками названия и количества."
+        )
+        return
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_import_csv")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
+        return
+
+    await message.answer(
+        "Импорт завершен.\n"
+        f"Создано товаров: {summary.created}\n"
+        f"Обновлено товаров: {summary.updated}\n"
+        f"Отклонено строк: {summary.rejected}"
+    )
@@ -0,0 +1,82 @@
+"""Обработчики inline-запросов (`@bot <название>`)."""
+
+import logging
+
+from aiogram import Router
+from aiogram.types import (
+    InlineQuery,
+    InlineQueryResultArticle,
+    InlineQueryResultUnion,
+    InputTextMessageContent,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.services import product_service
+from warehouse_bot.services.cache import ProductCache
+
+router = Router()
+
+# Максимальное количество товаров в ответе на inline-запрос.
+INLINE_RESULTS_LIMIT = 20
+# Сколько секунд Telegram может отдавать ответ из своего кэша.
+INLINE_CACHE_TIME = 10
+
+
+@router.inline_query()
+async def handle_inline_query(
+    inline_query: InlineQuery,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Отвечает на inline-запрос списком подходящих товаров с остатками.
+
+    Пустой запрос показывает начало списка товаров, непустой —
+    результаты поиска по префиксу и с учетом опечаток.
+
+    Args:
+        inline_query: Inline-запрос от пользователя.
+        session: Сессия базы данных (передается через middleware).
+        product_cache: Кэш товаров (передается через данные диспетчера).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    try:
+        if inline_query.query.strip():
+            items = await product_service.search_products(
+                session,
+                inline_query.query,
+                limit=INLINE_RESULTS_LIMIT,
+                cache=product_cache,
+                warehouse_id=warehouse_id,
+            )
+        else:
+            page = await product_service.get_products_page(
+                session,
+                limit=INLINE_RESULTS_LIMIT,
+                cache=product_cache,
+                warehouse_id=warehouse_id,
+            )
+            items = list(page.items)
+
+        results: list[InlineQueryResultUnion] = [
+            InlineQueryResultArticle(
+                id=str(item.id),
+                title=item.name,
+                description=f"Остаток: {item.quantity} шт.",
+                input_message_content=InputTextMessageContent(
+                    message_text=f"{item.name}: {item.quantity} шт."
+                ),
+            )
+            for item in items
+        ]
+        # Ответ зависит от склада пользователя, поэтому Telegram кэширует
+        # его для каждого пользователя отдельно.
+        await inline_query.answer(
+            results, cache_time=INLINE_CACHE_TIME, is_personal=True
+        )
+
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_inline_query")
+        await inline_query.answer([], cache_time=0)
@@ -0,0 +1,102 @@
+"""Обработчики команд минимальных остатков."""
+
+import logging
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.services import product_service
+from warehouse_bot.services.cache import ProductCache
+
+router = Router()
+
+
+@router.message(Command(commands=["low"]))
+async def handle_low_stock(
+    message: Message,
+    session: AsyncSession,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Обработчик команды /low.
+    Показывает товары текущего склада, остаток которых ниже минимального.
+
+    Args:
+        message: Объект сообщения от пользователя.
+        session: Сессия базы данных (передается через middleware).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    try:
+        items = await product_service.get_low_stock_products(
+            session, warehouse_id=warehouse_id
+        )
+        if not items:
+            await message.answer("Все остатки не ниже минимальных.")
+            return
+
+        lines = ["Остаток ниже минимального:"]
+        for item in items:
+            lines.append(
+                f"- {item.name}: {item.quantity} шт. (минимум {item.min_quantity})"
+            )
+        await message.answer("\n".join(lines))
+
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_low_stock")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
+
+
+@router.message(Command(commands=["min"]))
+async def handle_set_min_quantity(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Обработчик команды /min <название> <количество>.
+    Задает минимальный остаток товара; 0 отключает уведомления.
+
+    Args:
+        message: Объект сообщения от пользователя.
+        command: Разобранная команда с аргументами.
+        session: Сессия базы данных (передается через middleware).
+        product_cache: Кэш товаров (передается через данные диспетчера).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    name, _, value = (command.args or "").strip().rpartition(" ")
+    name = name.strip()
+    if not name or not value.isdigit():
+        await message.answer("Использование: /min <название> <количество>")
+        return
+
+    try:
+        product = await product_service.get_product_by_name(
+            session, name, cache=product_cache, warehouse_id=warehouse_id
+        )
+        if product is None or product.id is None:
+            await message.answer(f"Товар с названием '{name}' не найден.")
+            return
+
+        product = await product_service.set_min_quantity(
+            session,
+            product.id,
+            int(value),
+            cache=product_cache,
+            warehouse_id=warehouse_id,
+        )
+        if product.min_quantity == 0:
+            await message.answer(f"Минимальный остаток '{product.name}' отключен.")
+            return
+        text = f"Минимальный остаток '{product.name}': {product.min_quantity} шт."
+        if product.quantity < product.min_quantity:
+            text += f"\nТекущий остаток уже ниже: {product.quantity} шт."
+        await message.answer(text)
+
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_set_min_quantity")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
@@ -5,12 +5,20 @@ import logging
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
-from sqlalchemy.exc import IntegrityError
+from aiogram.types import CallbackQuery, Message, Update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID, Product
 from warehouse_bot.fsm.product_states import ProductState
-from warehouse_bot.services import product_service
+from warehouse_bot.fsm.warehouse import finish_dialog
+from warehouse_bot.keyboards.products import (
+    ProductPickCallback,
+    product_choice_keyboard,
+)
+from warehouse_bot.services import product_service, warehouse_service
+from warehouse_bot.services.cache import ProductCache
+from warehouse_bot.services.low_stock import LowStockNotifier
+from warehouse_bot.services.stock_coalescer import StockCoalescer
 
 router = Router()
 
@@ -28,18 +36,44 @@ async def cancel_handler(message: Message, state: FSMContext) -> None:
         return
 
     logging.info("Cancelling state %r", current_state)
-    await state.clear()
+    await finish_dialog(state)
     await message.answer("Действие отменено.")
 
 
+async def _begin_on_warehouse(
+    state: FSMContext, session: AsyncSession, warehouse_id: int
+) -> str:
+    """
+    Запоминает в данных диалога текущий склад пользователя.
+
+    Сценарий до конца работает с этим складом, даже если пользователь
+    сменит текущий склад посреди диалога.
+
+    Returns:
+        Название склада для сообщений пользователю.
+    """
+    warehouse = await warehouse_service.get_warehouse(session, warehouse_id)
+    warehouse_name = warehouse.name if warehouse else f"№{warehouse_id}"
+    await state.update_data(
+        dialog_warehouse_id=warehouse_id, warehouse_name=warehouse_name
+    )
+    return warehouse_name
+
+
 # --- Сценарий добавления товара ---
 @router.message(Command(commands=["add"]))
-async def handle_add_product_start(message: Message, state: FSMContext) -> None:
+async def handle_add_product_start(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
     """
-    Начало сценария добавления товара.
+    Начало сценария добавления товара на текущий склад.
     """
+    warehouse_name = await _begin_on_warehouse(state, session, warehouse_id)
     await state.set_state(ProductState.add_waiting_for_name)
-    await message.answer("Введите название нового товара:")
+    await message.answer(f"Склад: {warehouse_name}.\nВведите название нового товара:")
 
 
 @router.message(ProductState.add_waiting_for_name)
@@ -57,10 +91,20 @@ async def process_add_product_name(message: Message, state: FSMContext) -> None:
 
 @router.message(ProductState.add_waiting_for_quantity)
 async def process_add_product_quantity(
-    message: Message, state: FSMContext, session: AsyncSession
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    event_update: Update | None = None,
+    stock_coalescer: StockCoalescer | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
 ) -> None:
     """
-    Обработка количества и создание/обновление товара.
+    Обработка количества и создание/обновление товара на текущем складе.
+
+    Если включен write-behind режим (`stock_coalescer` в данных
+    диспетчера), приращение объединяется с одновременными приращениями
+    того же товара.
     """
     if not message.text or not message.text.isdigit():
         await message.answer("Пожалуйста, введите корректное число.")
@@ -73,72 +117,146 @@ async def process_add_product_quantity(
 
     user_data = await state.get_data()
     product_name = user_data["name"]
+    warehouse_id = user_data.get("dialog_warehouse_id", warehouse_id)
+    warehouse_name = user_data.get("warehouse_name", "")
+
+    user_id = message.from_user.id if message.from_user else None
+    update_id = event_update.update_id if event_update else None
 
     try:
-        existing_product = await product_service.get_product_by_name(
-            session, product_name
-        )
-        if existing_product and existing_product.id:
-            updated_product = await product_service.update_product_quantity(
-                session, existing_product.id, quantity
+        if stock_coalescer is not None:
+            product, created = await stock_coalescer.add(
+                product_name,
+                quantity,
+                user_id=user_id,
+                update_id=update_id,
+                warehouse_id=warehouse_id,
+            )
+        else:
+            product, created = await product_service.add_product_stock(
+                session,
+                product_name,
+                quantity,
+                cache=product_cache,
+                user_id=user_id,
+                update_id=update_id,
+                warehouse_id=warehouse_id,
             )
+        if created:
             await message.answer(
-                f"Количество товара '{updated_product.name}' "
-                f"увеличено на {quantity}. "
-                f"Новый остаток: {updated_product.quantity} шт."
+                f"Новый товар '{product.name}' "
+                f"успешно добавлен в количестве {product.quantity} шт. "
+                f"(склад: {warehouse_name})."
             )
         else:
-            new_product = await product_service.create_product(
-                session, name=product_name, quantity=quantity
-            )
             await message.answer(
-                f"Новый товар '{new_product.name}' "
-                f"успешно добавлен в количестве {new_product.quantity} шт."
+                f"Количество товара '{product.name}' "
+                f"увеличено на {quantity}. "
+                f"Новый остаток: {product.quantity} шт. (склад: {warehouse_name})."
             )
-    except IntegrityError:
-        logging.warning("Race condition prevented for product: %s", product_name)
-        await message.answer(
-            "Произошла ошибка конкурентного доступа. Попробуйте еще раз."
-        )
     except Exception:
         logging.exception("Error in process_add_product_quantity")
         await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
     finally:
-        await state.clear()
+        await finish_dialog(state)
 
 
 # --- Сценарий списания товара ---
 @router.message(Command(commands=["remove"]))
-async def handle_remove_product_start(message: Message, state: FSMContext) -> None:
+async def handle_remove_product_start(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
     """
-    Начало сценария списания товара.
+    Начало сценария списания товара с текущего склада.
     """
+    warehouse_name = await _begin_on_warehouse(state, session, warehouse_id)
     await state.set_state(ProductState.remove_waiting_for_name)
-    await message.answer("Введите название товара для списания:")
+    await message.answer(
+        f"Склад: {warehouse_name}.\nВведите название товара для списания:"
+    )
 
 
 @router.message(ProductState.remove_waiting_for_name)
 async def process_remove_product_name(
-    message: Message, state: FSMContext, session: AsyncSession
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
 ) -> None:
     """
-    Проверка наличия товара и запрос количества для списания.
+    Проверка наличия товара на текущем складе и запрос количества для
+    списания.
     """
     if not message.text:
         await message.answer("Название не может быть пустым. Попробуйте еще раз.")
         return
 
     product_name = message.text.strip()
-    product = await product_service.get_product_by_name(session, product_name)
+    user_data = await state.get_data()
+    warehouse_id = user_data.get("dialog_warehouse_id", warehouse_id)
+    product = await product_service.get_product_by_name(
+        session, product_name, cache=product_cache, warehouse_id=warehouse_id
+    )
 
     if not product or not product.id:
+        candidates = await product_service.search_products(
+            session, product_name, warehouse_id=warehouse_id
+        )
+        if candidates:
+            # Остаемся в текущем состоянии: можно выбрать вариант или
+            # ввести название еще раз.
+            await message.answer(
+                f"Товар с названием '{product_name}' не найден. "
+                "Возможно, вы имели в виду:",
+                reply_markup=product_choice_keyboard(candidates),
+            )
+            return
         await message.answer(
             f"Товар с названием '{product_name}' не найден. "
             "Проверьте список товаров командой /list."
         )
-        await state.clear()
+        await finish_dialog(state)
+        return
+
+    await _ask_remove_quantity(message, state, product)
+
+
+@router.callback_query(
+    ProductState.remove_waiting_for_name, ProductPickCallback.filter()
+)
+async def process_remove_product_pick(
+    callback: CallbackQuery,
+    callback_data: ProductPickCallback,
+    state: FSMContext,
+    session: AsyncSession,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Выбор товара для списания из предложенных вариантов.
+    """
+    user_data = await state.get_data()
+    warehouse_id = user_data.get("dialog_warehouse_id", warehouse_id)
+    product = await product_service.get_product(
+        session, callback_data.product_id, warehouse_id
+    )
+    if not product or not isinstance(callback.message, Message):
+        await callback.answer("Товар не найден.")
         return
 
+    await callback.answer()
+    await _ask_remove_quantity(callback.message, state, product)
+
+
+async def _ask_remove_quantity(
+    message: Message, state: FSMContext, product: Product
+) -> None:
+    """
+    Запоминает выбранный товар и запрашивает количество для списания.
+    """
     await state.update_data(product_id=product.id, product_name=product.name)
     await state.set_state(ProductState.remove_waiting_for_quantity)
     await message.answer(
@@ -149,7 +267,13 @@ async def process_remove_product_name(
 
 @router.message(ProductState.remove_waiting_for_quantity)
 async def process_remove_product_quantity(
-    message: Message, state: FSMContext, session: AsyncSession
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    product_cache: ProductCache | None = None,
+    event_update: Update | None = None,
+    low_stock_notifier: LowStockNotifier | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
 ) -> None:
     """
     Обработка количества для списания и обновление товара.
@@ -166,13 +290,23 @@ async def process_remove_product_quantity(
     user_data = await state.get_data()
     product_id = user_data["product_id"]
     product_name = user_data["product_name"]
+    warehouse_id = user_data.get("dialog_warehouse_id", warehouse_id)
+    warehouse_name = user_data.get("warehouse_name", "")
 
     try:
         updated_product = await product_service.update_product_quantity(
-            session, product_id, -quantity_to_remove
+            session,
+            product_id,
+            -quantity_to_remove,
+            cache=product_cache,
+            user_id=message.from_user.id if message.from_user else None,
+            update_id=event_update.update_id if event_update else None,
+            low_stock=low_stock_notifier,
+            warehouse_id=warehouse_id,
         )
         await message.answer(
-            f"Со склада списано {quantity_to_remove} шт. товара '{product_name}'.\n"
+            f"Со склада '{warehouse_name}' списано {quantity_to_remove} шт. "
+            f"товара '{product_name}'.\n"
             f"Новый остаток: {updated_product.quantity} шт."
         )
     except ValueError as e:
@@ -181,4 +315,4 @@ async def process_remove_product_quantity(
         logging.exception("Error in process_remove_product_quantity")
         await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
     finally:
-        await state.clear()
+        await finish_dialog(state)
@@ -0,0 +1,54 @@
+"""Обработчик команды отчета по складу."""
+
+import logging
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.services import report_service
+
+router = Router()
+
+
+@router.message(Command(commands=["report"]))
+async def handle_report(
+    message: Message,
+    session: AsyncSession,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Обработчик команды /report.
+    Показывает остатки текущего склада, приход и расход по дням и товары
+    с наибольшим оборотом за последние дни.
+
+    Args:
+        message: Объект сообщения от пользователя.
+        session: Сессия базы данных (передается через middleware).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    try:
+        report = await report_service.get_stock_report(
+            session, warehouse_id=warehouse_id
+        )
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_report")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
+        return
+
+    lines = [
+        f"Товаров: {report.products}, всего на складе: {report.total_quantity} шт.",
+        "",
+    ]
+    if not report.days:
+        lines.append(f"За {report_service.REPORT_DAYS} дн. движений не было.")
+    else:
+        lines.append(f"Приход / расход за {report_service.REPORT_DAYS} дн.:")
+        for day in report.days:
+            lines.append(f"{day.day:%d.%m}: +{day.inflow} / -{day.outflow}")
+        lines.extend(["", "Наибольший оборот:"])
+        for mover in report.top_movers:
+            lines.append(f"- {mover.name}: +{mover.inflow} / -{mover.outflow}")
+    await message.answer("\n".join(lines))
@@ -0,0 +1,100 @@
+"""Обработчики команд выбора и создания складов."""
+
+import logging
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.fsm.warehouse import set_current_warehouse
+from warehouse_bot.services import warehouse_service
+
+router = Router()
+
+
+@router.message(Command(commands=["warehouse"]))
+async def handle_warehouse(
+    message: Message,
+    command: CommandObject,
+    state: FSMContext,
+    session: AsyncSession,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> None:
+    """
+    Обработчик команды /warehouse [название].
+    Без аргумента показывает текущий склад и список складов, с названием —
+    делает склад текущим.
+
+    Args:
+        message: Объект сообщения от пользователя.
+        command: Разобранная команда с аргументами.
+        state: Контекст FSM пользователя.
+        session: Сессия базы данных (передается через middleware).
+        warehouse_id: Текущий склад пользователя (передается через middleware).
+    """
+    name = (command.args or "").strip()
+    try:
+        if name:
+            warehouse = await warehouse_service.get_warehouse_by_name(session, name)
+            if warehouse is None or warehouse.id is None:
+                await message.answer(
+                    f"Склад '{name}' не найден. Список складов: /warehouse"
+                )
+                return
+            await set_current_warehouse(state, warehouse.id)
+            await message.answer(f"Текущий склад: {warehouse.name}.")
+            return
+
+        warehouses = await warehouse_service.get_warehouses(session)
+        lines = ["Склады:"]
+        for warehouse in warehouses:
+            marker = " (текущий)" if warehouse.id == warehouse_id else ""
+            lines.append(f"- {warehouse.name}{marker}")
+        lines.append("Сменить склад: /warehouse <название>")
+        await message.answer("\n".join(lines))
+
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_warehouse")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
+
+
+@router.message(Command(commands=["newwarehouse"]))
+async def handle_new_warehouse(
+    message: Message,
+    command: CommandObject,
+    state: FSMContext,
+    session: AsyncSession,
+) -> None:
+    """
+    Обработчик команды /newwarehouse <название>.
+    Создает склад и делает его текущим.
+
+    Args:
+        message: Объект сообщения от пользователя.
+        command: Разобранная команда с аргументами.
+        state: Контекст FSM пользователя.
+        session: Сессия базы данных (передается через middleware).
+    """
+    name = (command.args or "").strip()
+    if not name:
+        await message.answer("Использование: /newwarehouse <название>")
+        return
+    if len(name) > warehouse_service.MAX_NAME_LENGTH:
+        await message.answer(
+            "Название склада не должно быть длиннее "
+            f"{warehouse_service.MAX_NAME_LENGTH} символов."
+        )
+        return
+
+    try:
+        warehouse_id = await warehouse_service.create_warehouse(session, name)
+        await set_current_warehouse(state, warehouse_id)
+        await message.answer(f"Склад '{name}' создан и выбран текущим.")
+    except ValueError as e:
+        await message.answer(str(e))
+    except Exception:
+        logging.exception("Произошла ошибка в хендлере handle_new_warehouse")
+        await message.answer("Произошла внутренняя ошибка. Попробуйте позже.")
@@ -0,0 +1,86 @@
+"""Inline-клавиатуры для работы со списком товаров."""
+
+from collections.abc import Sequence
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from warehouse_bot.services.product_service import ProductListItem, ProductPage
+
+
+class ProductListCallback(CallbackData, prefix="plist"):
+    """
+    Данные кнопок навигации по списку товаров.
+
+    Атрибуты:
+        direction: Направление листания: "next" или "prev".
+        cursor: ID крайнего товара текущей страницы.
+    """
+
+    direction: str
+    cursor: int
+
+
+class ProductPickCallback(CallbackData, prefix="ppick"):
+    """
+    Данные кнопки выбора товара из предложенных вариантов.
+
+    Атрибуты:
+        product_id: ID выбранного товара.
+    """
+
+    product_id: int
+
+
+def products_page_keyboard(page: ProductPage) -> InlineKeyboardMarkup | None:
+    """
+    Собирает кнопки «назад»/«вперед» для страницы списка товаров.
+
+    Args:
+        page: Текущая страница товаров.
+
+    Returns:
+        Клавиатура или None, если листать некуда.
+    """
+    if not page.items:
+        return None
+
+    builder = InlineKeyboardBuilder()
+    if page.has_prev:
+        builder.button(
+            text="⬅️ Назад",
+            callback_data=ProductListCallback(
+                direction="prev", cursor=page.items[0].id
+            ),
+        )
+    if page.has_next:
+        builder.button(
+            text="Вперед ➡️",
+            callback_data=ProductListCallback(
+                direction="next", cursor=page.items[-1].id
+            ),
+        )
+    if not (page.has_prev or page.has_next):
+        return None
+    return builder.as_markup()
+
+
+def product_choice_keyboard(items: Sequence[ProductListItem]) -> InlineKeyboardMarkup:
+    """
+    Собирает кнопки выбора товара, по одной в строке.
+
+    Args:
+        items: Найденные товары.
+
+    Returns:
+        Клавиатура с вариантами.
+    """
+    builder = InlineKeyboardBuilder()
+    for item in items:
+        builder.button(
+            text=f"{item.name} ({item.quantity} шт.)",
+            callback_data=ProductPickCallback(product_id=item.id),
+        )
+    builder.adjust(1)
+    return builder.as_markup()
@@ -1,76 +1,442 @@
 """Главный файл приложения. Точка входа."""
 
+import asyncio
+import hmac
 import logging
-from collections.abc import AsyncGenerator
+import math
+import os
+from collections.abc import AsyncGenerator, Awaitable
 from contextlib import asynccontextmanager
 
-import uvicorn
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import Update
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from warehouse_bot.core.config import settings
-from warehouse_bot.db.session import AsyncSessionFactory
-from warehouse_bot.handlers import commands, product_management
+from warehouse_bot.core import metrics
+from warehouse_bot.core.config import Settings, get_settings
+from warehouse_bot.core.redis_client import InstrumentedRedis
+from warehouse_bot.core.send_scheduler import SendScheduler
+from warehouse_bot.core.startup import (
+    StartupTimer,
+    register_webhook_once,
+    warm_up_pools,
+)
+from warehouse_bot.core.tracing import UpdateProfiler
+from warehouse_bot.core.update_queue import UpdateQueue
+from warehouse_bot.db.instrumentation import pool_connections
+from warehouse_bot.db.session import get_engine, get_session_factory
+from warehouse_bot.fsm.storage import FSMUpdateScopeMiddleware, HashRedisStorage
+from warehouse_bot.handlers import (
+    admin,
+    commands,
+    export,
+    import_csv,
+    inline,
+    low_stock,
+    product_management,
+    report,
+    warehouses,
+)
 from warehouse_bot.middlewares.db_session import DbSessionMiddleware
+from warehouse_bot.middlewares.deduplication import (
+    UpdateDeduplicationMiddleware,
+    UpdateInProgressError,
+)
+from warehouse_bot.middlewares.metrics import (
+    BotApiMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+from warehouse_bot.middlewares.read_routing import ReadRoutingMiddleware
+from warehouse_bot.middlewares.tracing import (
+    Middleware,
+    TracingMiddleware,
+    slow_log,
+    traced,
+)
+from warehouse_bot.middlewares.warehouse import WarehouseMiddleware
+from warehouse_bot.services.cache import ProductCache
+from warehouse_bot.services.ledger_service import run_snapshot_compaction
+from warehouse_bot.services.low_stock import LowStockNotifier
+from warehouse_bot.services.report_service import run_rollup
+from warehouse_bot.services.stock_coalescer import StockCoalescer
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+def setup_dispatcher(
+    dp: Dispatcher,
+    session_pool: async_sessionmaker[AsyncSession],
+    replica_sticky_seconds: float = 5.0,
+    deduplication: UpdateDeduplicationMiddleware | None = None,
+    tracing: TracingMiddleware | None = None,
+) -> DbSessionMiddleware:
     """
-    Контекстный менеджер для управления жизненным циклом приложения.
+    Регистрирует middleware и роутеры приложения в диспетчере.
+
+    Args:
+        dp: Диспетчер aiogram.
+        session_pool: Фабрика сессий базы данных.
+        replica_sticky_seconds: Сколько секунд после записи пользователь
+                                читает из основной базы (при наличии реплик).
+        deduplication: Middleware, отбрасывающий повторно доставленные
+                       обновления; None — не проверять.
+        tracing: Middleware трассировки; если задан, регистрируется первым,
+                 а каждый middleware записывается отдельным участком.
+
+    Returns:
+        Зарегистрированный middleware сессий (для чтения его статистики).
     """
-    print("--- LIFESPAN START ---")
+    # Метрики обновления должны охватывать все внешние middleware диспетчера
+    # (включая чтение состояния FSM), поэтому ставим их в начало цепочки.
+    # Область обновления хранилища FSM открывается прямо перед FSM-middleware,
+    # чтобы его чтение состояния тоже попало в локальный кэш. Дубликаты
+    # отбрасываются сразу после метрик, до чтения состояния FSM. Трассировка
+    # стоит перед всеми, чтобы дерево участков охватывало всю цепочку.
+    outer_middlewares = list(dp.update.outer_middleware)
+    for middleware in outer_middlewares:
+        dp.update.outer_middleware.unregister(middleware)
+    update_middlewares: list[Middleware] = [UpdateMetricsMiddleware()]
+    if deduplication is not None:
+        update_middlewares.append(deduplication)
+    for middleware in outer_middlewares:
+        if middleware is dp.fsm and isinstance(dp.fsm.storage, HashRedisStorage):
+            update_middlewares.append(FSMUpdateScopeMiddleware(dp.fsm.storage))
+        update_middlewares.append(middleware)
+    if tracing is not None:
+        dp.update.outer_middleware(tracing)
+    for middleware in update_middlewares:
+        dp.update.outer_middleware(
+            traced(middleware) if tracing is not None else middleware
+        )
+
+    # Middleware сессий регистрируется на уровне событий: так он видит
+    # выбранный хендлер и не создает сессию для хендлеров без `session`.
+    # Текущий склад читается из данных FSM, загруженных вместе с состоянием.
+    handler_metrics_middleware = HandlerMetricsMiddleware()
+    warehouse_middleware = WarehouseMiddleware()
+    db_session_middleware = DbSessionMiddleware(session_pool=session_pool)
+    # С репликами после записи пользователь какое-то время читает из основной
+    # базы; без реплик все запросы и так идут в нее.
+    read_routing_middleware = (
+        ReadRoutingMiddleware(replica_sticky_seconds)
+        if session_pool.kw.get("replicas")
+        else None
+    )
+    event_middlewares: list[Middleware] = [
+        handler_metrics_middleware,
+        warehouse_middleware,
+        db_session_middleware,
+    ]
+    if read_routing_middleware is not None:
+        event_middlewares.append(read_routing_middleware)
+    if tracing is not None:
+        event_middlewares = [traced(middleware) for middleware in event_middlewares]
+    for observer in (dp.message, dp.callback_query, dp.inline_query):
+        for middleware in event_middlewares:
+            observer.middleware(middleware)
+    dp.include_router(commands.router)
+    dp.include_router(admin.router)
+    dp.include_router(warehouses.router)
+    dp.include_router(export.router)
+    dp.include_router(import_csv.router)
+    dp.include_router(low_stock.router)
+    dp.include_router(report.router)
+    dp.include_router(product_management.router)
+    dp.include_router(inline.router)
+    return db_session_middleware
+
 
-    print("0. Initializing Bot, Dispatcher, Redis connection and FSM storage...")
+def create_bot(settings: Settings) -> Bot:
+    """
+    Создает экземпляр бота с ограничением частоты и метриками исходящих
+    запросов.
+
+    Args:
+        settings: Настройки приложения.
+
+    Returns:
+        Экземпляр бота.
+    """
     bot = Bot(token=settings.BOT_TOKEN)
-    redis_client = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-    storage = RedisStorage(redis=redis_client)
+    # Планировщик внешний: метрики измеряют каждую попытку без ожидания
+    bot.session.middleware(
+        SendScheduler(
+            global_rate=settings.SEND_GLOBAL_RATE,
+            chat_rate=settings.SEND_CHAT_RATE,
+            chat_burst=settings.SEND_CHAT_BURST,
+            group_rate=settings.SEND_GROUP_RATE,
+            max_retries=settings.SEND_MAX_RETRIES,
+        )
+    )
+    bot.session.middleware(BotApiMetricsMiddleware())
+    return bot
+
+
+def create_deduplication(
+    settings: Settings, redis_client: Redis
+) -> UpdateDeduplicationMiddleware | None:
+    """
+    Создает middleware отбрасывания повторно доставленных обновлений.
+
+    Args:
+        settings: Настройки приложения.
+        redis_client: Клиент Redis для отметок обработанных обновлений.
+
+    Returns:
+        Middleware или None, если проверка отключена (`UPDATE_DEDUP_TTL=0`).
+    """
+    if settings.UPDATE_DEDUP_TTL <= 0:
+        return None
+    return UpdateDeduplicationMiddleware(
+        redis_client,
+        ttl=settings.UPDATE_DEDUP_TTL,
+        local_size=settings.UPDATE_DEDUP_LOCAL_SIZE,
+        processing_ttl=settings.UPDATE_DEDUP_PROCESSING_TTL,
+    )
+
+
+def create_tracing(
+    settings: Settings, profiler: UpdateProfiler | None = None
+) -> TracingMiddleware | None:
+    """
+    Создает middleware трассировки обновлений.
+
+    Args:
+        settings: Настройки приложения.
+        profiler: Профилировщик обновлений, управляемый командой /profile.
+
+    Returns:
+        Middleware или None, если не нужны ни журнал медленных обновлений,
+        ни профилирование.
+    """
+    if settings.SLOW_UPDATE_THRESHOLD_MS <= 0 and profiler is None:
+        return None
+    if settings.SLOW_UPDATE_LOG_FILE:
+        # Логгер общий для процесса: файл подключается один раз
+        path = os.path.abspath(settings.SLOW_UPDATE_LOG_FILE)
+        if not any(
+            isinstance(handler, logging.FileHandler) and handler.baseFilename == path
+            for handler in slow_log.handlers
+        ):
+            slow_log.addHandler(logging.FileHandler(path))
+    threshold = (
+        settings.SLOW_UPDATE_THRESHOLD_MS / 1000
+        if settings.SLOW_UPDATE_THRESHOLD_MS > 0
+        else math.inf
+    )
+    return TracingMiddleware(threshold, profiler)
+
+
+def create_dispatcher(
+    settings: Settings,
+    redis_client: Redis,
+    session_factory: async_sessionmaker[AsyncSession],
+    bot: Bot | None = None,
+) -> Dispatcher:
+    """
+    Создает диспетчер с хранилищем FSM и общими зависимостями хендлеров.
+
+    Middleware и роутеры регистрируются отдельно, в `setup_dispatcher`.
+
+    Args:
+        settings: Настройки приложения.
+        redis_client: Клиент Redis для FSM и кэша товаров.
+        session_factory: Фабрика сессий базы данных.
+        bot: Бот для фоновых уведомлений; без него уведомления о низких
+             остатках не отправляются.
+
+    Returns:
+        Диспетчер с кэшем товаров (а также агрегатором приращений,
+        уведомлениями о низких остатках и профилировщиком обновлений, если
+        они включены) в данных диспетчера.
+    """
+    storage = HashRedisStorage(redis_client, ttl=settings.FSM_TTL or None)
     dp = Dispatcher(storage=storage)
+    # Кэш товаров попадает в хендлеры через данные диспетчера
+    product_cache = ProductCache(
+        redis_client,
+        ttl=settings.PRODUCT_CACHE_TTL,
+        local_ttl=settings.PRODUCT_LOCAL_CACHE_TTL,
+    )
+    dp["product_cache"] = product_cache
+    if settings.STOCK_COALESCE_WINDOW_MS > 0:
+        dp["stock_coalescer"] = StockCoalescer(
+            session_factory,
+            window=settings.STOCK_COALESCE_WINDOW_MS / 1000,
+            cache=product_cache,
+        )
+    if bot is not None and settings.ALERT_CHAT_ID is not None:
+        dp["low_stock_notifier"] = LowStockNotifier(
+            bot,
+            settings.ALERT_CHAT_ID,
+            delay=settings.LOW_STOCK_ALERT_DELAY,
+            session_pool=session_factory,
+        )
+    # Профилированием обновлений управляют администраторы командой /profile
+    if settings.ADMIN_IDS:
+        dp["admin_ids"] = frozenset(settings.ADMIN_IDS)
+        dp["update_profiler"] = UpdateProfiler()
+        dp["profile_dir"] = settings.PROFILE_DIR
+    return dp
 
-    # Сохраняем экземпляры в app.state для доступа в хендлерах
-    app.state.bot = bot
-    app.state.dp = dp
-    app.state.redis = redis_client
-    print("-> Bot, Dispatcher, Redis and FSM Storage initialized.")
 
-    print("1. Deleting old webhook...")
-    await bot.delete_webhook(drop_pending_updates=True)
-    print("-> Old webhook deleted.")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """
+    Контекстный менеджер для управления жизненным циклом приложения.
 
-    print("2. Registering middlewares and routers...")
-    dp.update.middleware(DbSessionMiddleware(session_pool=AsyncSessionFactory))
-    dp.include_router(commands.router)
-    dp.include_router(product_management.router)
-    print("-> Middlewares and routers registered.")
+    Независимые сетевые операции запуска (регистрация вебхука, прогрев
+    соединений с Redis и БД) выполняются параллельно; по завершении в лог
+    пишется отчет о времени каждого шага.
+    """
+    settings = get_settings()
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    if not settings.BASE_WEBHOOK_URL:
+        raise RuntimeError(
+            "BASE_WEBHOOK_URL is required in webhook mode; "
+            "use `python -m warehouse_bot.polling` without a public URL"
+        )
+    if not settings.WEBHOOK_SECRET:
+        # Без секрета Telegram не передает заголовок, и проверка в
+        # webhook_handler отклонила бы каждое обновление
+        raise RuntimeError("WEBHOOK_SECRET is required in webhook mode")
+    timer = StartupTimer()
+
+    with timer.step("init"):
+        bot = create_bot(settings)
+        redis_client = InstrumentedRedis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT
+        )
+        session_factory = get_session_factory()
+        dp = create_dispatcher(settings, redis_client, session_factory, bot)
+        stock_coalescer: StockCoalescer | None = dp.workflow_data.get("stock_coalescer")
+        low_stock_notifier: LowStockNotifier | None = dp.workflow_data.get(
+            "low_stock_notifier"
+        )
+
+        # Сохраняем экземпляры в app.state для доступа в хендлерах
+        app.state.bot = bot
+        app.state.dp = dp
+        app.state.redis = redis_client
+
+    with timer.step("routers"):
+        app.state.db_session_middleware = setup_dispatcher(
+            dp,
+            session_factory,
+            settings.DB_REPLICA_STICKY_SECONDS,
+            create_deduplication(settings, redis_client),
+            create_tracing(settings, dp.workflow_data.get("update_profiler")),
+        )
 
-    print(f"3. Setting new webhook to: {settings.webhook_url}")
-    await bot.set_webhook(
-        url=settings.webhook_url, secret_token=settings.WEBHOOK_SECRET
+    if settings.MULTI_WORKER:
+        # Вебхук регистрирует только один воркер и только при изменениях;
+        # остальные сразу начинают принимать обновления.
+        register_webhook: Awaitable[object] = register_webhook_once(
+            bot, redis_client, settings.webhook_url, settings.WEBHOOK_SECRET
+        )
+    else:
+        # Один вызов вместо delete_webhook + set_webhook: накопленные
+        # обновления сбрасываются вместе с установкой нового вебхука.
+        register_webhook = bot.set_webhook(
+            url=settings.webhook_url,
+            secret_token=settings.WEBHOOK_SECRET,
+            drop_pending_updates=True,
+        )
+    await asyncio.gather(
+        timer.run("webhook", register_webhook),
+        timer.run(
+            "warm_up",
+            warm_up_pools(get_engine(), redis_client, settings.POOL_WARMUP_CONNECTIONS),
+        ),
     )
-    print("-> New webhook set successfully.")
-    print("--- LIFESPAN STARTUP COMPLETE. APP IS READY. ---")
+
+    app.state.update_queue = None
+    if settings.WEBHOOK_QUEUE_WORKERS > 0:
+        app.state.update_queue = UpdateQueue(
+            dp,
+            bot,
+            workers=settings.WEBHOOK_QUEUE_WORKERS,
+            maxsize=settings.WEBHOOK_QUEUE_SIZE,
+        )
+        app.state.update_queue.start()
+
+    setup_metrics(app)
+
+    # Периодические задачи обслуживания журнала движений
+    maintenance_tasks: list[asyncio.Task[None]] = []
+    if settings.STOCK_SNAPSHOT_INTERVAL > 0:
+        maintenance_tasks.append(
+            asyncio.create_task(
+                run_snapshot_compaction(
+                    session_factory, settings.STOCK_SNAPSHOT_INTERVAL
+                )
+            )
+        )
+    if settings.REPORT_ROLLUP_INTERVAL > 0:
+        maintenance_tasks.append(
+            asyncio.create_task(
+                run_rollup(session_factory, settings.REPORT_ROLLUP_INTERVAL)
+            )
+        )
+    logging.info(timer.report())
 
     yield
 
-    print("--- LIFESPAN SHUTDOWN ---")
-    await app.state.bot.delete_webhook()
+    logging.info("Shutting down")
+    for task in maintenance_tasks:
+        task.cancel()
+    await asyncio.gather(*maintenance_tasks, return_exceptions=True)
+    if app.state.update_queue is not None:
+        await app.state.update_queue.drain(timeout=settings.WEBHOOK_DRAIN_TIMEOUT)
+        logging.info("Update queue drained: %s", app.state.update_queue.snapshot())
+    if stock_coalescer is not None:
+        await stock_coalescer.close()
+    if low_stock_notifier is not None:
+        await low_stock_notifier.close()
+    if not settings.MULTI_WORKER:
+        # В режиме нескольких воркеров вебхук остается: его продолжают
+        # обслуживать другие воркеры или новые процессы после перезапуска.
+        await app.state.bot.delete_webhook()
     await app.state.bot.session.close()
     await app.state.redis.close()
-    print("--- LIFESPAN SHUTDOWN COMPLETE ---")
+    logging.info("Shutdown complete")
 
 
-# --- Приложение FastAPI ---
-app = FastAPI(lifespan=lifespan)
+def setup_metrics(app: FastAPI) -> None:
+    """
+    Подключает к метрикам показатели пула БД, сессий и очереди вебхуков.
+
+    Значения читаются из соответствующих объектов в момент запроса /metrics.
+
+    Args:
+        app: Приложение FastAPI с заполненным `app.state`.
+    """
+    session_stats = app.state.db_session_middleware.stats
+    update_queue: UpdateQueue | None = app.state.update_queue
+
+    engine = get_engine()
+    metrics.DB_POOL_CONNECTIONS.callback = lambda: pool_connections(engine)
+    metrics.DB_SESSIONS.callback = lambda: [
+        ({"usage": "skipped"}, session_stats.skipped),
+        ({"usage": "unused"}, session_stats.unused),
+        ({"usage": "opened"}, session_stats.opened),
+    ]
+    if update_queue is not None:
+        metrics.WEBHOOK_QUEUE_DEPTH.callback = lambda: [({}, update_queue.depth)]
+        metrics.WEBHOOK_QUEUE_CAPACITY.callback = lambda: [({}, update_queue.capacity)]
+        metrics.WEBHOOK_QUEUE_UPDATES.callback = lambda: [
+            ({"outcome": outcome}, getattr(update_queue.stats, outcome))
+            for outcome in ("enqueued", "rejected", "processed", "failed")
+        ]
 
 
-@app.post("/telegram/webhook/{token}")
 async def webhook_handler(request: Request, token: str) -> Response:
     """
     Обработчик вебхуков от Telegram.
     """
+    settings = get_settings()
     if token != settings.BOT_TOKEN:
         return JSONResponse(content={"error": "Invalid token"}, status_code=403)
 
@@ -82,7 +448,21 @@ async def webhook_handler(request: Request, token: str) -> Response:
         update = await request.json()
         dp: Dispatcher = request.app.state.dp
         bot: Bot = request.app.state.bot
-        await dp.feed_webhook_update(bot=bot, update=update)
+        update_queue: UpdateQueue | None = request.app.state.update_queue
+        if update_queue is None:
+            try:
+                await dp.feed_webhook_update(bot=bot, update=update)
+            except UpdateInProgressError:
+                # Исходная доставка еще обрабатывается и может завершиться
+                # ошибкой: Telegram доставит обновление повторно
+                logging.info("Update is still being processed, asking to retry")
+                return Response(status_code=503)
+        elif not update_queue.put_nowait(
+            Update.model_validate(update, context={"bot": bot})
+        ):
+            # Очередь чата переполнена: Telegram доставит обновление повторно
+            logging.warning("Update queue is full, asking Telegram to retry")
+            return Response(status_code=503)
     except Exception:
         logging.exception("!!! Critical error in webhook handler !!!")
         return Response(status_code=500)
@@ -90,8 +470,52 @@ async def webhook_handler(request: Request, token: str) -> Response:
     return Response(status_code=200)
 
 
+async def metrics_handler(request: Request) -> Response:
+    """
+    Отдает метрики приложения в текстовом формате Prometheus.
+
+    Доступен только с токеном METRICS_TOKEN; без настроенного токена
+    маршрут отключен. Значения относятся к процессу, обработавшему запрос
+    (см. `warehouse_bot.core.metrics`).
+    """
+    token = get_settings().METRICS_TOKEN
+    if not token:
+        return Response(status_code=404)
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        return JSONResponse(content={"error": "Invalid token"}, status_code=403)
+    return PlainTextResponse(
+        metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def create_app() -> FastAPI:
+    """
+    Создает приложение FastAPI.
+
+    Настройки, движок БД и соединения создаются не здесь, а при запуске
+    (в `lifespan`), поэтому импорт модуля и создание приложения дешевы.
+
+    Returns:
+        Приложение с маршрутами вебхука и метрик.
+    """
+    application = FastAPI(lifespan=lifespan)
+    application.add_api_route(
+        "/telegram/webhook/{token}", webhook_handler, methods=["POST"]
+    )
+    application.add_api_route("/metrics", metrics_handler, methods=["GET"])
+    return application
+
+
+# --- Приложение FastAPI ---
+app = create_app()
+
+
 # --- Точка входа для локального запуска ---
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "warehouse_bot.main:app",
         host="0.0.0.0",  # noqa: B104
@@ -1,21 +1,77 @@
 """Middleware для управления сессиями базы данных."""
 
 from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from typing import Any
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
 from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+@dataclass(slots=True)
+class SessionUsageStats:
+    """
+    Статистика использования сессий для оценки экономии пула.
+
+    Атрибуты:
+        skipped: Обновления, хендлер которых не принимает `session`.
+        unused: Обновления, получившие ленивую сессию, но не обратившиеся к ней.
+        opened: Обновления, для которых сессия была реально открыта.
+    """
+
+    skipped: int = 0
+    unused: int = 0
+    opened: int = 0
+
+
+class LazySession:
+    """
+    Прокси для AsyncSession, создающий сессию при первом обращении.
+
+    Все атрибуты и методы перенаправляются в настоящую сессию, поэтому
+    хендлеры и сервисный слой работают с прокси как с AsyncSession.
+    """
+
+    __slots__ = ("_session", "_session_pool")
+
+    def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
+        self._session_pool = session_pool
+        self._session: AsyncSession | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Была ли создана настоящая сессия."""
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_pool()
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        """
+        Закрывает сессию, если она была создана.
+        """
+        if self._session is not None:
+            await self._session.close()
 
 
 class DbSessionMiddleware(BaseMiddleware):
     """
     Middleware для передачи сессии SQLAlchemy в обработчики.
+
+    Вместо готовой сессии в хендлер передается LazySession. Если middleware
+    зарегистрирован на уровне конкретных событий (`dp.message`,
+    `dp.callback_query`), он знает выбранный хендлер и не создает прокси
+    вовсе, когда у хендлера нет параметра `session`.
     """
 
     def __init__(self, session_pool: async_sessionmaker):
         super().__init__()
         self.session_pool = session_pool
+        self.stats = SessionUsageStats()
 
     async def __call__(
         self,
@@ -26,6 +82,20 @@ class DbSessionMiddleware(BaseMiddleware):
         """
         Выполняет middleware.
         """
-        async with self.session_pool() as session:
-            data["session"] = session
+        handler_object = data.get("handler")
+        if isinstance(handler_object, HandlerObject) and not (
+            handler_object.varkw or "session" in handler_object.params
+        ):
+            self.stats.skipped += 1
+            return await handler(event, data)
+
+        session = LazySession(self.session_pool)
+        data["session"] = session
+        try:
             return await handler(event, data)
+        finally:
+            if session.is_open:
+                self.stats.opened += 1
+                await session.close()
+            else:
+                self.stats.unused += 1
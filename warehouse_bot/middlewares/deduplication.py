@@ -0,0 +1,153 @@
+"""Middleware для отбрасывания повторно доставленных обновлений."""
+
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from redis.asyncio import Redis
+
+from warehouse_bot.core.metrics import DUPLICATE_UPDATES
+
+# Значения отметки обновления в Redis
+_PROCESSING = b"processing"
+_DONE = b"done"
+
+
+class UpdateInProgressError(Exception):
+    """
+    Повторная доставка обновления, обработка которого еще не завершена.
+
+    Обновление нельзя ни обработать второй раз, ни отбросить: если
+    исходная обработка завершится ошибкой, оно будет потеряно. Вебхук
+    отвечает на эту ошибку 503, и Telegram доставит обновление позже.
+    """
+
+    def __init__(self, update_id: int):
+        super().__init__(f"Update {update_id} is still being processed")
+        self.update_id = update_id
+
+
+class UpdateDeduplicationMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений: пропускает каждый `update_id` один раз.
+
+    Telegram доставляет обновление повторно, если вебхук ответил ошибкой
+    или не успел ответить, и без проверки повторная доставка, например,
+    второй раз увеличила бы остаток. Перед обработкой обновление получает
+    в Redis отметку «обрабатывается» (`SET NX` с коротким TTL
+    `processing_ttl`, общая для всех воркеров), после успешной обработки —
+    отметку «обработано» на `ttl` секунд. Повтор обработанного обновления
+    отбрасывается, повтор обрабатываемого завершается
+    `UpdateInProgressError`, чтобы Telegram доставил его еще раз. Если
+    обработка завершилась исключением, отметка снимается и следующая
+    доставка обработает обновление заново. Перед Redis стоит LRU
+    обработанных ID в памяти процесса, отсекающий повторы без сетевого
+    запроса.
+
+    Остается окно повторной обработки: если обработка длится дольше
+    `processing_ttl` или отметка «обработано» не записалась (Redis
+    недоступен), повтор будет обработан еще раз. И наоборот, после
+    падения воркера повторы в течение `processing_ttl` считаются
+    обрабатываемыми: вебхук получит 503 и дождется истечения отметки, а
+    в режиме polling такой повтор будет пропущен.
+
+    Регистрируется перед FSM-middleware, поэтому дубликаты не читают
+    состояние и не открывают сессию БД. При недоступности Redis обновление
+    обрабатывается (проверка только в памяти процесса).
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        ttl: int = 3600,
+        local_size: int = 10000,
+        key_prefix: str = "update",
+        processing_ttl: int = 120,
+    ):
+        """
+        Args:
+            redis: Клиент Redis.
+            ttl: Сколько секунд помнить обработанный `update_id`.
+            local_size: Сколько последних `update_id` помнить в памяти процесса.
+            key_prefix: Префикс ключей Redis.
+            processing_ttl: Сколько секунд считать обновление обрабатываемым;
+                            должно превышать время обработки самого
+                            медленного обновления.
+        """
+        super().__init__()
+        self.redis = redis
+        self.ttl = ttl
+        self.local_size = local_size
+        self.key_prefix = key_prefix
+        self.processing_ttl = processing_ttl
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self._processing: set[int] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """
+        Выполняет middleware.
+
+        Raises:
+            UpdateInProgressError: Если обновление сейчас обрабатывается.
+        """
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        update_id = event.update_id
+        if update_id in self._seen:
+            DUPLICATE_UPDATES.inc(layer="local")
+            return None
+        if update_id in self._processing:
+            DUPLICATE_UPDATES.inc(layer="local")
+            raise UpdateInProgressError(update_id)
+
+        key = f"{self.key_prefix}:{update_id}"
+        try:
+            is_new = await self.redis.set(
+                key, _PROCESSING, nx=True, ex=self.processing_ttl
+            )
+            # Повторы редки: отметку читаем только для них
+            mark = None if is_new else await self.redis.get(key)
+        except Exception:
+            logging.exception("Failed to record update %s in Redis", update_id)
+            is_new = None
+        else:
+            if not is_new:
+                DUPLICATE_UPDATES.inc(layer="redis")
+                if mark == _DONE:
+                    self._remember(update_id)
+                    return None
+                raise UpdateInProgressError(update_id)
+
+        self._processing.add(update_id)
+        try:
+            result = await handler(event, data)
+        except Exception:
+            if is_new:
+                try:
+                    await self.redis.delete(key)
+                except Exception:
+                    logging.exception("Failed to release update %s", update_id)
+            raise
+        finally:
+            self._processing.discard(update_id)
+
+        self._remember(update_id)
+        try:
+            await self.redis.set(key, _DONE, ex=self.ttl)
+        except Exception:
+            logging.exception("Failed to mark update %s as processed", update_id)
+        return result
+
+    def _remember(self, update_id: int) -> None:
+        self._seen[update_id] = None
+        if len(self._seen) > self.local_size:
+            self._seen.popitem(last=False)
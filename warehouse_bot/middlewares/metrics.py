@@ -0,0 +1,113 @@
+"""Middleware для сбора метрик обработки обновлений."""
+
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from warehouse_bot.core.metrics import (
+    BOT_API_DURATION,
+    BOT_API_ERRORS,
+    HANDLER_DURATION,
+    UPDATE_DB_QUERIES,
+    UPDATE_DURATION,
+    UPDATE_REDIS_CALLS,
+    UpdateCounters,
+    current_update,
+)
+from warehouse_bot.core.tracing import span
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений: измеряет полное время обработки и
+    количество SQL-запросов и обращений к Redis на одно обновление.
+
+    Должен стоять первым среди внешних middleware, чтобы в замер попало
+    и чтение состояния FSM.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        event_type = event.event_type if isinstance(event, Update) else "unknown"
+        counters = UpdateCounters()
+        token = current_update.set(counters)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_DURATION.observe(
+                time.perf_counter() - started, event_type=event_type
+            )
+            UPDATE_DB_QUERIES.observe(counters.db_queries, event_type=event_type)
+            UPDATE_REDIS_CALLS.observe(counters.redis_calls, event_type=event_type)
+            current_update.reset(token)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Middleware событий: измеряет время хендлера в разрезе имени хендлера
+    и состояния FSM, в котором он был вызван.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        name = (
+            getattr(handler_object.callback, "__name__", "unknown")
+            if handler_object is not None
+            else "unknown"
+        )
+        state = data.get("raw_state") or "none"
+        started = time.perf_counter()
+        try:
+            with span(f"handler {name}"):
+                return await handler(event, data)
+        finally:
+            HANDLER_DURATION.observe(
+                time.perf_counter() - started, handler=name, state=state
+            )
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: измеряет длительность исходящих запросов к
+    Telegram Bot API и считает ошибки.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        method_name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            with span(f"bot {method_name}"):
+                return await make_request(bot, method)
+        except Exception as e:
+            BOT_API_ERRORS.inc(method=method_name, error=type(e).__name__)
+            raise
+        finally:
+            BOT_API_DURATION.observe(time.perf_counter() - started, method=method_name)
@@ -0,0 +1,62 @@
+"""Middleware для чтения собственных изменений при работе с репликами."""
+
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+
+from warehouse_bot.db.routing import (
+    PRIMARY_UNTIL_KEY,
+    primary_reads,
+    track_primary_writes,
+)
+
+
+class ReadRoutingMiddleware(BaseMiddleware):
+    """
+    Направляет чтения пользователя в основную базу в течение `sticky_seconds`
+    после того, как его обновление изменило данные.
+
+    Момент окончания хранится в данных FSM, поэтому работает и при
+    нескольких воркерах: следующий шаг диалога, попавший на другой воркер,
+    тоже не увидит отставшую реплику. Учитываются записи через сессию
+    обновления и через `StockCoalescer` (см. `track_primary_writes`).
+    """
+
+    def __init__(self, sticky_seconds: float = 5.0):
+        """
+        Args:
+            sticky_seconds: Сколько секунд после записи читать из основной базы.
+        """
+        super().__init__()
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """
+        Выполняет middleware.
+        """
+        state: FSMContext | None = data.get("state")
+        if state is None:
+            return await handler(event, data)
+
+        fsm_data = await state.get_data()
+        with track_primary_writes() as writes:
+            if fsm_data.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+                with primary_reads():
+                    result = await handler(event, data)
+            else:
+                result = await handler(event, data)
+
+        if writes.wrote:
+            await state.update_data(
+                {PRIMARY_UNTIL_KEY: time.time() + self.sticky_seconds}
+            )
+        return result
@@ -0,0 +1,89 @@
+"""Middleware трассировки обработки обновлений."""
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from warehouse_bot.core.tracing import Span, UpdateProfiler, current_span, span
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+Middleware = Callable[[Handler, TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+# Журнал медленных обновлений (можно направить в отдельный файл)
+slow_log = logging.getLogger("warehouse_bot.slow_updates")
+
+
+def traced(middleware: Middleware, name: str | None = None) -> Middleware:
+    """
+    Оборачивает middleware так, что его работа (вместе со всем, что он
+    вызывает дальше по цепочке) записывается отдельным участком.
+
+    Args:
+        middleware: Middleware aiogram.
+        name: Название участка; по умолчанию имя класса middleware.
+
+    Returns:
+        Middleware-обертка для регистрации вместо исходного.
+    """
+    label = name or type(middleware).__name__
+
+    async def wrapper(
+        handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        with span(label):
+            return await middleware(handler, event, data)
+
+    return wrapper
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений: строит дерево участков обработки
+    (middleware, хендлер, обращения к хранилищу FSM и Redis, SQL-запросы,
+    вызовы Bot API) и пишет его в журнал медленных обновлений, если
+    обработка заняла больше `slow_threshold`.
+
+    Регистрируется первым, чтобы в дерево попала вся цепочка. Через него
+    же выборочно профилируются обновления (см. `UpdateProfiler`).
+    """
+
+    def __init__(self, slow_threshold: float, profiler: UpdateProfiler | None = None):
+        """
+        Args:
+            slow_threshold: Порог медленного обновления, в секундах.
+            profiler: Профилировщик обновлений; None — без профилирования.
+        """
+        super().__init__()
+        self.slow_threshold = slow_threshold
+        self.profiler = profiler
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """
+        Выполняет middleware.
+        """
+        if isinstance(event, Update):
+            name = f"update {event.update_id} {event.event_type}"
+        else:
+            name = f"update {type(event).__name__}"
+        root = Span(name, time.perf_counter())
+        token = current_span.set(root)
+        try:
+            if self.profiler is not None:
+                return await self.profiler.run(lambda: handler(event, data))
+            return await handler(event, data)
+        finally:
+            root.duration = time.perf_counter() - root.started
+            current_span.reset(token)
+            if root.duration >= self.slow_threshold:
+                slow_log.warning(
+                    "Slow update: %.1f ms\n%s", root.duration * 1000, root.render()
+                )
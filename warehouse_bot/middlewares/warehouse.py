@@ -0,0 +1,36 @@
+"""Middleware для передачи текущего склада пользователя в обработчики."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID
+from warehouse_bot.fsm.warehouse import get_current_warehouse
+
+
+class WarehouseMiddleware(BaseMiddleware):
+    """
+    Передает в хендлеры ID текущего склада пользователя (`warehouse_id`).
+
+    Склад хранится в настройках пользователя, которые хранилище FSM
+    читает вместе с состоянием, поэтому middleware не добавляет обращений
+    к хранилищу. Без контекста
+    FSM используется склад по умолчанию.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        state: FSMContext | None = data.get("state")
+        data["warehouse_id"] = (
+            await get_current_warehouse(state)
+            if state is not None
+            else DEFAULT_WAREHOUSE_ID
+        )
+        return await handler(event, data)
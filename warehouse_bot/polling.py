@@ -0,0 +1,252 @@
+"""
+Запуск бота в режиме long polling — без публичного URL и вебхука.
+
+Использует тот же диспетчер, middleware и роутеры, что и режим вебхука.
+
+Запуск:
+    python -m warehouse_bot.polling
+"""
+
+import asyncio
+import contextlib
+import logging
+import signal
+
+from aiogram import Bot
+from aiogram.types import Update
+
+from warehouse_bot.core.config import get_settings
+from warehouse_bot.core.redis_client import InstrumentedRedis
+from warehouse_bot.core.startup import StartupTimer, warm_up_pools
+from warehouse_bot.core.update_queue import UpdateQueue
+from warehouse_bot.db.session import get_engine, get_session_factory
+from warehouse_bot.main import (
+    create_bot,
+    create_deduplication,
+    create_dispatcher,
+    create_tracing,
+    setup_dispatcher,
+)
+from warehouse_bot.services.ledger_service import run_snapshot_compaction
+from warehouse_bot.services.low_stock import LowStockNotifier
+from warehouse_bot.services.report_service import run_rollup
+from warehouse_bot.services.stock_coalescer import StockCoalescer
+
+# Пауза перед повтором getUpdates после ошибки, в секундах (удваивается)
+_RETRY_DELAY = 1.0
+_MAX_RETRY_DELAY = 30.0
+
+
+class UpdatePoller:
+    """
+    Получает обновления пачками через getUpdates и передает их в очередь.
+
+    Очередь обрабатывает обновления параллельно ограниченным числом
+    воркеров, сохраняя порядок внутри чата. Когда очередь чата заполнена,
+    получение следующих пачек приостанавливается.
+
+    getUpdates с параметром offset подтверждает Telegram все обновления
+    до него, поэтому offset сдвигается только за обновления, обработка
+    которых завершена: пока обновление ждет в очереди или обрабатывается,
+    offset не уходит дальше него, а после остановки необработанные
+    обновления будут доставлены повторно.
+
+    Запрос с таким offset вернул бы уже полученные обновления, поэтому
+    после пачки следующий запрос откладывается, пока обработка не догонит
+    получение, но не дольше max_wait секунд: медленное обновление
+    задерживает получение новых не больше чем на max_wait и вызывает
+    не больше одного повторного скачивания (до limit обновлений, они
+    пропускаются) за этот интервал.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        queue: UpdateQueue,
+        allowed_updates: list[str],
+        limit: int = 100,
+        timeout: int = 30,
+        max_wait: float = 1.0,
+    ):
+        self.bot = bot
+        self.queue = queue
+        self.allowed_updates = allowed_updates
+        self.limit = limit
+        self.timeout = timeout
+        self.max_wait = max_wait
+        # Следующий еще не полученный update_id
+        self._next_id: int | None = None
+        # Полученные, но еще не обработанные update_id
+        self._pending: set[int] = set()
+        # Установлено, когда все полученные обновления обработаны
+        self._caught_up = asyncio.Event()
+        self._caught_up.set()
+
+    @property
+    def offset(self) -> int | None:
+        """
+        Offset для getUpdates: все обновления до него обработаны.
+        """
+        if self._pending:
+            return min(self._pending)
+        return self._next_id
+
+    def _done(self, update: Update) -> None:
+        self._pending.discard(update.update_id)
+        if not self._pending:
+            self._caught_up.set()
+
+    async def _wait_caught_up(self) -> None:
+        """
+        Ждет завершения обработки полученных обновлений не дольше max_wait.
+        """
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._caught_up.wait(), self.max_wait)
+
+    async def run(self) -> None:
+        """
+        Получает обновления, пока задача не будет отменена.
+        """
+        retry_delay = _RETRY_DELAY
+        while True:
+            try:
+                updates = await self.bot.get_updates(
+                    offset=self.offset,
+                    limit=self.limit,
+                    timeout=self.timeout,
+                    allowed_updates=self.allowed_updates,
+                    request_timeout=self.timeout + 10,
+                )
+            except Exception:
+                logging.exception(
+                    "getUpdates failed, retrying in %.0f seconds", retry_delay
+                )
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, _MAX_RETRY_DELAY)
+                continue
+            retry_delay = _RETRY_DELAY
+            fresh = [
+                update
+                for update in updates
+                if self._next_id is None or update.update_id >= self._next_id
+            ]
+            for update in fresh:
+                self._pending.add(update.update_id)
+                self._caught_up.clear()
+                self._next_id = update.update_id + 1
+                await self.queue.put(update, on_done=self._done)
+            # Пока обновления обрабатываются, offset меньше полученных
+            # и getUpdates сразу вернул бы их повторно
+            await self._wait_caught_up()
+
+    async def confirm(self) -> None:
+        """
+        Подтверждает Telegram получение всех обработанных обновлений.
+
+        Без этого после перезапуска Telegram повторно отдаст последнюю пачку.
+        """
+        if self.offset is not None:
+            await self.bot.get_updates(offset=self.offset, limit=1, timeout=0)
+
+
+async def run_polling() -> None:
+    """
+    Запускает бота в режиме long polling до получения SIGINT или SIGTERM.
+    """
+    settings = get_settings()
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    timer = StartupTimer()
+
+    with timer.step("init"):
+        bot = create_bot(settings)
+        redis_client = InstrumentedRedis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT
+        )
+        session_factory = get_session_factory()
+        dp = create_dispatcher(settings, redis_client, session_factory, bot)
+        setup_dispatcher(
+            dp,
+            session_factory,
+            settings.DB_REPLICA_STICKY_SECONDS,
+            create_deduplication(settings, redis_client),
+            create_tracing(settings, dp.workflow_data.get("update_profiler")),
+        )
+        stock_coalescer: StockCoalescer | None = dp.workflow_data.get("stock_coalescer")
+        low_stock_notifier: LowStockNotifier | None = dp.workflow_data.get(
+            "low_stock_notifier"
+        )
+
+    # getUpdates не работает при установленном вебхуке; накопленные
+    # обновления не сбрасываем — они будут обработаны
+    await asyncio.gather(
+        timer.run("delete_webhook", bot.delete_webhook()),
+        timer.run(
+            "warm_up",
+            warm_up_pools(get_engine(), redis_client, settings.POOL_WARMUP_CONNECTIONS),
+        ),
+    )
+
+    update_queue = UpdateQueue(
+        dp,
+        bot,
+        workers=settings.POLLING_WORKERS,
+        maxsize=settings.POLLING_WORKERS * settings.POLLING_BATCH_SIZE,
+    )
+    update_queue.start()
+    poller = UpdatePoller(
+        bot,
+        update_queue,
+        allowed_updates=dp.resolve_used_update_types(),
+        limit=settings.POLLING_BATCH_SIZE,
+        timeout=settings.POLLING_TIMEOUT,
+    )
+    poller_task = asyncio.create_task(poller.run())
+    # Периодические задачи обслуживания журнала движений
+    maintenance_tasks: list[asyncio.Task[None]] = []
+    if settings.STOCK_SNAPSHOT_INTERVAL > 0:
+        maintenance_tasks.append(
+            asyncio.create_task(
+                run_snapshot_compaction(
+                    session_factory, settings.STOCK_SNAPSHOT_INTERVAL
+                )
+            )
+        )
+    if settings.REPORT_ROLLUP_INTERVAL > 0:
+        maintenance_tasks.append(
+            asyncio.create_task(
+                run_rollup(session_factory, settings.REPORT_ROLLUP_INTERVAL)
+            )
+        )
+    logging.info(timer.report())
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    logging.info("Shutting down")
+    poller_task.cancel()
+    await asyncio.gather(poller_task, return_exceptions=True)
+    for task in maintenance_tasks:
+        task.cancel()
+    await asyncio.gather(*maintenance_tasks, return_exceptions=True)
+    await update_queue.drain(timeout=settings.WEBHOOK_DRAIN_TIMEOUT)
+    await poller.confirm()
+    logging.info("Update queue drained: %s", update_queue.snapshot())
+    if stock_coalescer is not None:
+        await stock_coalescer.close()
+    if low_stock_notifier is not None:
+        await low_stock_notifier.close()
+    await bot.session.close()
+    await redis_client.close()
+    logging.info("Shutdown complete")
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    asyncio.run(run_polling())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Кэш чтения товаров в Redis."""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from redis.asyncio import Redis
+
+# Маркер промаха локального кэша (None — допустимое закэшированное значение).
+MISSING: Any = object()
+
+
+class CacheLookup(NamedTuple):
+    """
+    Результат чтения из кэша.
+
+    Атрибуты:
+        version: Версия данных, под которой нужно сохранить значение при промахе.
+        hit: Найдено ли значение в кэше.
+        value: Закэшированное значение (может быть None, если закэширован
+               отрицательный результат).
+    """
+
+    version: int
+    hit: bool
+    value: Any
+
+
+class LocalTTLCache:
+    """
+    Небольшой LRU-кэш в памяти процесса с ограниченным временем жизни.
+
+    Снимает с Redis повторяющиеся запросы внутри одного процесса
+    (например, серию inline-запросов при наборе текста).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        """
+        Возвращает значение или MISSING, если его нет или оно устарело.
+
+        Args:
+            key: Ключ.
+
+        Returns:
+            Закэшированное значение или MISSING.
+        """
+        item = self._items.get(key)
+        if item is None:
+            return MISSING
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return MISSING
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Сохраняет значение, вытесняя самое давно использованное.
+
+        Args:
+            key: Ключ.
+            value: Значение.
+        """
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Удаляет все значения.
+        """
+        self._items.clear()
+
+
+class ProductCache:
+    """
+    Read-through кэш товаров и страниц списка в Redis.
+
+    Все ключи содержат номер версии. Любая запись в таблицу товаров
+    увеличивает версию, после чего старые ключи перестают читаться
+    и удаляются Redis по истечении TTL.
+
+    Версия, прочитанная последней, запоминается в процессе: чтение
+    запрашивает ее вместе со значением под ней одним MGET, и второй запрос
+    нужен только если версия успела смениться.
+
+    Дополнительно доступен короткоживущий локальный уровень `local`.
+    Он не знает о версиях, поэтому в других процессах данные в нем
+    могут отставать от записи не более чем на `local_ttl` секунд.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        ttl: int = 60,
+        prefix: str = "products",
+        local_ttl: float = 5.0,
+    ):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self.version_key = f"{prefix}:version"
+        self.local = LocalTTLCache(ttl=local_ttl)
+        # Последняя известная версия
+        self._version = 0
+
+    def _key(self, version: int, key: str) -> str:
+        return f"{self.prefix}:v{version}:{key}"
+
+    async def get(self, key: str) -> CacheLookup:
+        """
+        Читает значение текущей версии.
+
+        Args:
+            key: Ключ внутри пространства товаров (например, "name:Дрель").
+
+        Returns:
+            Объект CacheLookup.
+        """
+        known = self._version
+        raw_version, raw = await self.redis.mget(
+            self.version_key, self._key(known, key)
+        )
+        version = int(raw_version or 0)
+        if version != known:
+            self._version = version
+            raw = await self.redis.get(self._key(version, key))
+        if raw is None:
+            return CacheLookup(version=version, hit=False, value=None)
+        return CacheLookup(version=version, hit=True, value=json.loads(raw)["v"])
+
+    async def set(self, version: int, key: str, value: Any) -> None:
+        """
+        Сохраняет значение под версией, прочитанной до запроса к БД.
+
+        Если данные успели измениться, значение окажется под устаревшей
+        версией и никогда не будет прочитано.
+
+        Args:
+            version: Версия из CacheLookup.
+            key: Ключ внутри пространства товаров.
+            value: JSON-сериализуемое значение.
+        """
+        await self.redis.set(
+            self._key(version, key), json.dumps({"v": value}), ex=self.ttl
+        )
+
+    async def invalidate(self) -> None:
+        """
+        Делает недействительными все закэшированные данные о товарах.
+        """
+        self.local.clear()
+        self._version = await self.redis.incr(self.version_key)
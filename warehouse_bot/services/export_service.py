@@ -0,0 +1,95 @@
+"""Сервисный слой выгрузки каталога товаров в CSV."""
+
+import csv
+import gzip
+import io
+from collections.abc import AsyncIterator, Sequence
+from typing import IO, Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID, Product
+from warehouse_bot.db.routing import replica_read
+
+# Сколько строк читается с сервера БД за один раз.
+EXPORT_BATCH_SIZE = 1000
+# Колонки выгрузки в порядке следования в CSV.
+EXPORT_COLUMNS = ("id", "name", "quantity", "created_at")
+
+
+async def iter_product_batches(
+    session: AsyncSession,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> AsyncIterator[Sequence[Any]]:
+    """
+    Читает все товары склада пачками через серверный курсор.
+
+    В памяти одновременно находится не больше одной пачки строк,
+    независимо от размера таблицы.
+
+    Args:
+        session: Сессия базы данных.
+        batch_size: Размер пачки.
+        warehouse_id: ID склада.
+
+    Yields:
+        Пачки строк (id, name, quantity, created_at) в порядке ID.
+    """
+    statement = (
+        select(
+            col(Product.id),
+            col(Product.name),
+            col(Product.quantity),
+            col(Product.created_at),
+        )
+        .where(col(Product.warehouse_id) == warehouse_id)
+        .order_by(col(Product.id))
+        .execution_options(yield_per=batch_size)
+    )
+    result = await session.stream(statement)
+    async for partition in result.partitions():
+        yield partition
+
+
+@replica_read
+async def export_products_csv(
+    session: AsyncSession,
+    output: IO[bytes],
+    compress: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> int:
+    """
+    Записывает все товары склада в CSV (UTF-8, с заголовком) по мере чтения.
+
+    Args:
+        session: Сессия базы данных.
+        output: Двоичный файл для записи; не закрывается.
+        compress: Сжимать ли CSV в gzip.
+        batch_size: Сколько строк читать из БД за один раз.
+        warehouse_id: ID склада.
+
+    Returns:
+        Количество выгруженных товаров.
+    """
+    gzip_file = gzip.GzipFile(fileobj=output, mode="wb") if compress else None
+    text = io.TextIOWrapper(gzip_file or output, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    try:
+        async for rows in iter_product_batches(session, batch_size, warehouse_id):
+            writer.writerows(
+                (product_id, name, quantity, created_at.isoformat())
+                for product_id, name, quantity, created_at in rows
+            )
+            count += len(rows)
+    finally:
+        text.flush()
+        # Отсоединяем обертку, чтобы ее закрытие не закрыло `output`
+        text.detach()
+        if gzip_file is not None:
+            gzip_file.close()
+    return count
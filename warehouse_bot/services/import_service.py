@@ -0,0 +1,306 @@
+"""Сервисный слой массового импорта товаров из CSV."""
+
+import csv
+import datetime
+import io
+import itertools
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import IO
+
+from sqlalchemy import (
+    BigInteger,
+    BindParameter,
+    Column,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    delete,
+    func,
+    insert,
+    select,
+    true,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID, Product, StockMovement
+from warehouse_bot.services import product_service
+from warehouse_bot.services.cache import ProductCache
+
+# Сколько строк вставляется в промежуточную таблицу за один запрос,
+# если COPY недоступен.
+IMPORT_BATCH_SIZE = 1000
+# Ограничения строки: длина названия как у колонки product.name,
+# количество должно помещаться в INTEGER.
+MAX_NAME_LENGTH = 100
+MAX_QUANTITY = 2**31 - 1
+
+# Допустимые названия колонок в строке заголовка.
+_NAME_COLUMNS = frozenset({"name", "название"})
+_QUANTITY_COLUMNS = frozenset({"quantity", "количество"})
+
+# Временная таблица для загрузки файла; не входит в метаданные моделей,
+# поэтому не попадает в миграции. В PostgreSQL удаляется при commit.
+_STAGING_TABLE = Table(
+    "product_import",
+    MetaData(),
+    Column("name", String),
+    Column("quantity", BigInteger),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ImportSummary:
+    """
+    Итог импорта.
+
+    Атрибуты:
+        created: Количество созданных товаров.
+        updated: Количество товаров, остаток которых увеличен.
+        rejected: Количество отклоненных строк файла.
+    """
+
+    created: int
+    updated: int
+    rejected: int
+
+
+class CsvRows:
+    """
+    Потоковый разбор CSV с колонками названия и количества.
+
+    Первая строка считается заголовком, если содержит колонки `name` и
+    `quantity` (или `название` и `количество`), иначе — данными с
+    названием в первой колонке и количеством во второй. Разделитель —
+    запятая или точка с запятой. Некорректные строки пропускаются и
+    подсчитываются в `rejected`.
+    """
+
+    def __init__(self, file: IO[bytes]):
+        """
+        Args:
+            file: Двоичный файл в UTF-8; читается с текущей позиции.
+        """
+        self.file = file
+        self.rejected = 0
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        text = io.TextIOWrapper(self.file, encoding="utf-8-sig", newline="")
+        try:
+            first_line = text.readline()
+            delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+            reader = csv.reader(
+                itertools.chain([first_line], text), delimiter=delimiter
+            )
+            name_index, quantity_index = 0, 1
+            for line_number, row in enumerate(reader, 1):
+                cells = [cell.strip() for cell in row]
+                if not any(cells):
+                    continue
+                if line_number == 1:
+                    header = [cell.lower() for cell in cells]
+                    name_columns = [c for c in header if c in _NAME_COLUMNS]
+                    quantity_columns = [c for c in header if c in _QUANTITY_COLUMNS]
+                    if name_columns and quantity_columns:
+                        name_index = header.index(name_columns[0])
+                        quantity_index = header.index(quantity_columns[0])
+                        continue
+                parsed = _parse_row(cells, name_index, quantity_index)
+                if parsed is None:
+                    self.rejected += 1
+                else:
+                    yield parsed
+        finally:
+            # Не даем обертке закрыть файл вызывающего кода
+            text.detach()
+
+
+def _parse_row(
+    cells: list[str], name_index: int, quantity_index: int
+) -> tuple[str, int] | None:
+    """
+    Проверяет строку файла.
+
+    Returns:
+        Пара (название, количество) или None, если строка некорректна.
+    """
+    try:
+        name = cells[name_index]
+        quantity = int(cells[quantity_index])
+    except (IndexError, ValueError):
+        return None
+    if not name or len(name) > MAX_NAME_LENGTH or not 0 < quantity <= MAX_QUANTITY:
+        return None
+    return name, quantity
+
+
+async def _load_staging_rows(
+    session: AsyncSession, rows: CsvRows, batch_size: int
+) -> None:
+    """
+    Загружает строки файла в промежуточную таблицу.
+
+    В PostgreSQL используется бинарный `COPY` драйвера asyncpg: строки
+    передаются потоком по мере разбора файла. В остальных БД (и если
+    соединение драйвера недоступно) строки вставляются пачками.
+    """
+    connection = await session.connection()
+    if connection.dialect.name == "postgresql":
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        if driver_connection is not None:
+            await driver_connection.copy_records_to_table(
+                _STAGING_TABLE.name, records=rows, columns=["name", "quantity"]
+            )
+            return
+
+    row_iterator = iter(rows)
+    while batch := list(itertools.islice(row_iterator, batch_size)):
+        await session.execute(
+            insert(_STAGING_TABLE),
+            [{"name": name, "quantity": quantity} for name, quantity in batch],
+        )
+
+
+async def import_products_csv(
+    session: AsyncSession,
+    file: IO[bytes],
+    cache: ProductCache | None = None,
+    user_id: int | None = None,
+    update_id: int | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> ImportSummary:
+    """
+    Импортирует товары из CSV на склад: создает новые и увеличивает
+    остаток существующих.
+
+    Файл загружается во временную таблицу, после чего сливается с
+    `product` одним `INSERT ... SELECT ... ON CONFLICT (warehouse_id, name)
+    DO UPDATE`;
+    повторы одного названия в файле суммируются. Товары, остаток которых
+    после импорта не поместится в INTEGER, пропускаются, а их строки
+    считаются отклоненными. Журнал движений
+    пополняется одним `INSERT ... SELECT`. Все изменения выполняются в
+    одной транзакции.
+
+    Args:
+        session: Сессия базы данных.
+        file: Двоичный файл CSV в UTF-8; не закрывается.
+        cache: Кэш товаров, который нужно инвалидировать.
+        user_id: ID пользователя Telegram для журнала движений.
+        update_id: ID обновления Telegram для журнала движений.
+        batch_size: Размер пачки вставки, если COPY недоступен.
+        warehouse_id: ID склада.
+
+    Returns:
+        Объект ImportSummary.
+
+    Raises:
+        UnicodeDecodeError: Если файл не в кодировке UTF-8.
+        csv.Error: Если файл не удается разобрать как CSV.
+    """
+    connection = await session.connection()
+    dialect_name = connection.dialect.name
+    if dialect_name != "postgresql":
+        # Временная таблица SQLite живет до закрытия соединения, и DDL
+        # не откатывается: убираем остатки прерванного импорта.
+        await connection.run_sync(_STAGING_TABLE.drop, checkfirst=True)
+    await connection.run_sync(_STAGING_TABLE.create)
+
+    rows = CsvRows(file)
+    await _load_staging_rows(session, rows, batch_size)
+
+    warehouse: BindParameter[int] = bindparam("warehouse", warehouse_id)
+    totals = (
+        select(
+            _STAGING_TABLE.c.name,
+            func.sum(_STAGING_TABLE.c.quantity).label("quantity"),
+        )
+        .group_by(_STAGING_TABLE.c.name)
+        .subquery("totals")
+    )
+    # Сумма повторов вместе с текущим остатком тоже должна помещаться
+    # в INTEGER: такие товары убираем из загрузки до слияния
+    overflowing = (
+        select(totals.c.name)
+        .outerjoin(
+            Product,
+            (col(Product.warehouse_id) == warehouse)
+            & (col(Product.name) == totals.c.name),
+        )
+        .where(
+            totals.c.quantity + func.coalesce(col(Product.quantity), 0) > MAX_QUANTITY
+        )
+    )
+    overflow_result = await session.execute(
+        delete(_STAGING_TABLE).where(_STAGING_TABLE.c.name.in_(overflowing))
+    )
+    staged = (
+        select(
+            _STAGING_TABLE.c.name,
+            func.sum(_STAGING_TABLE.c.quantity).label("quantity"),
+        )
+        .group_by(_STAGING_TABLE.c.name)
+        .subquery("staged")
+    )
+    created_at: BindParameter[datetime.datetime] = bindparam(
+        "created_at", datetime.datetime.now(datetime.UTC)
+    )
+    insert_into = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    upsert = insert_into(Product).from_select(
+        ["warehouse_id", "name", "quantity", "created_at"],
+        # WHERE нужен SQLite, чтобы не принять ON CONFLICT за условие JOIN
+        select(
+            warehouse.label("warehouse_id"),
+            staged.c.name,
+            staged.c.quantity,
+            created_at.label("created_at"),
+        ).where(true()),
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[col(Product.warehouse_id), col(Product.name)],
+        set_={"quantity": col(Product.quantity) + upsert.excluded.quantity},
+    )
+    # Как и в одиночном upsert, совпадение created_at означает вставку.
+    result = await session.execute(
+        upsert.returning(col(Product.created_at) == created_at)
+    )
+    created_flags = result.scalars().all()
+    created = sum(1 for flag in created_flags if flag)
+
+    movements = select(
+        col(Product.id),
+        staged.c.quantity,
+        bindparam("user_id", user_id, type_=BigInteger),
+        bindparam("update_id", update_id, type_=BigInteger),
+        created_at,
+    ).join_from(
+        staged,
+        Product,
+        (col(Product.warehouse_id) == warehouse) & (col(Product.name) == staged.c.name),
+    )
+    await session.execute(
+        insert(StockMovement).from_select(
+            ["product_id", "delta", "user_id", "update_id", "created_at"], movements
+        )
+    )
+    if dialect_name != "postgresql":
+        await connection.run_sync(_STAGING_TABLE.drop)
+    await session.commit()
+
+    # Товары изменены в обход ORM: загруженные в сессию объекты устарели
+    session.expire_all()
+    product_service.reset_name_index(session)
+    if cache is not None:
+        await cache.invalidate()
+    return ImportSummary(
+        created=created,
+        updated=len(created_flags) - created,
+        rejected=rows.rejected + overflow_result.rowcount,
+    )
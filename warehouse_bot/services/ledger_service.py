@@ -0,0 +1,240 @@
+"""Сервисный слой журнала движения товаров и снимков остатков."""
+
+import asyncio
+import datetime
+import logging
+from collections.abc import Sequence
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import col, select
+
+from warehouse_bot.db.models import StockMovement, StockSnapshot
+
+# Сколько ждать блокировку журнала при чтении границы (см.
+# `committed_movement_id`); пишущие транзакции ждут столько же.
+BOUNDARY_LOCK_TIMEOUT_MS = 1000
+
+# Ключ advisory-блокировки PostgreSQL: снимок строится поверх предыдущего,
+# поэтому два воркера не должны свернуть один и тот же хвост дважды
+_COMPACTION_LOCK_ID = 0x736E6170
+# То же в пределах процесса (и для БД без advisory-блокировок)
+_compaction_lock = asyncio.Lock()
+
+
+def add_movement(
+    session: AsyncSession,
+    product_id: int,
+    delta: int,
+    user_id: int | None = None,
+    update_id: int | None = None,
+) -> StockMovement:
+    """
+    Добавляет запись о движении товара в текущую транзакцию.
+
+    Запись сохраняется вместе с изменением остатка при `commit` вызывающего
+    кода.
+
+    Args:
+        session: Сессия базы данных.
+        product_id: ID товара.
+        delta: Изменение остатка.
+        user_id: ID пользователя Telegram, выполнившего изменение.
+        update_id: ID обновления Telegram, вызвавшего изменение.
+
+    Returns:
+        Объект StockMovement.
+    """
+    movement = StockMovement(
+        product_id=product_id, delta=delta, user_id=user_id, update_id=update_id
+    )
+    session.add(movement)
+    return movement
+
+
+async def get_product_movements(
+    session: AsyncSession,
+    product_id: int,
+    before_id: int | None = None,
+    limit: int = 20,
+) -> Sequence[StockMovement]:
+    """
+    Возвращает историю движений товара от новых к старым.
+
+    Args:
+        session: Сессия базы данных.
+        product_id: ID товара.
+        before_id: Вернуть движения с ID меньше этого (keyset-пагинация).
+        limit: Максимальное количество записей.
+
+    Returns:
+        Последовательность объектов StockMovement.
+    """
+    statement = select(StockMovement).where(StockMovement.product_id == product_id)
+    if before_id is not None:
+        statement = statement.where(col(StockMovement.id) < before_id)
+    statement = statement.order_by(col(StockMovement.id).desc()).limit(limit)
+    result = await session.execute(statement)
+    return result.scalars().all()
+
+
+async def get_stock_at(
+    session: AsyncSession, product_id: int, at: datetime.datetime
+) -> int:
+    """
+    Вычисляет остаток товара на заданный момент времени.
+
+    Берется последний снимок не позже `at`, к нему прибавляется только
+    хвост журнала после снимка, поэтому стоимость запроса не растет
+    вместе с историей.
+
+    Args:
+        session: Сессия базы данных.
+        product_id: ID товара.
+        at: Момент времени.
+
+    Returns:
+        Остаток товара на момент `at`.
+    """
+    snapshot_statement = (
+        select(StockSnapshot)
+        .where(
+            StockSnapshot.product_id == product_id,
+            col(StockSnapshot.taken_at) <= at,
+        )
+        .order_by(col(StockSnapshot.movement_id).desc())
+        .limit(1)
+    )
+    snapshot = (await session.execute(snapshot_statement)).scalar_one_or_none()
+    base_quantity = snapshot.quantity if snapshot else 0
+    base_movement_id = snapshot.movement_id if snapshot else 0
+
+    tail_statement = select(func.coalesce(func.sum(StockMovement.delta), 0)).where(
+        StockMovement.product_id == product_id,
+        col(StockMovement.id) > base_movement_id,
+        col(StockMovement.created_at) <= at,
+    )
+    tail = (await session.execute(tail_statement)).scalar_one()
+    return base_quantity + int(tail)
+
+
+async def committed_movement_id(session: AsyncSession) -> int | None:
+    """
+    Возвращает ID, до которого включительно журнал движений закоммичен.
+
+    ID движений выдаются при вставке, а транзакции коммитятся в любом
+    порядке, поэтому сам по себе max(id) не граница: движение с меньшим ID
+    может появиться позже. В PostgreSQL граница читается под блокировкой
+    таблицы в режиме SHARE: она дожидается транзакций, уже вставляющих
+    движения, и не дает начать новые, пока граница не прочитана. SQLite
+    выполняет пишущие транзакции по очереди, там блокировка не нужна.
+
+    Завершает текущую транзакцию сессии.
+
+    Args:
+        session: Сессия базы данных.
+
+    Returns:
+        ID последнего движения (0 для пустого журнала) или None, если
+        блокировку не удалось получить за `BOUNDARY_LOCK_TIMEOUT_MS`.
+    """
+    try:
+        if session.get_bind().dialect.name == "postgresql":
+            await session.execute(
+                text(f"SET LOCAL lock_timeout = {BOUNDARY_LOCK_TIMEOUT_MS}")
+            )
+            await session.execute(
+                text(f"LOCK TABLE {StockMovement.__tablename__} IN SHARE MODE")
+            )
+        boundary = (
+            await session.execute(select(func.max(StockMovement.id)))
+        ).scalar_one_or_none()
+    except DBAPIError:
+        await session.rollback()
+        logging.warning("Stock movement boundary lock timed out, skipping run")
+        return None
+    await session.commit()
+    return boundary or 0
+
+
+async def compact_snapshots(session: AsyncSession) -> int:
+    """
+    Сворачивает новый хвост журнала в снимки остатков.
+
+    Для каждого товара, по которому были движения после последней
+    компактизации, добавляется снимок: предыдущий остаток плюс сумма
+    новых движений. Читается только хвост журнала по первичному ключу
+    и только до границы закоммиченных движений (см.
+    `committed_movement_id`), поэтому поздно закоммиченное движение
+    попадает в следующий снимок, а не теряется за ним. Запуски в разных
+    воркерах выполняются по очереди: в PostgreSQL под транзакционной
+    advisory-блокировкой, внутри процесса — под asyncio.Lock.
+
+    Args:
+        session: Сессия базы данных.
+
+    Returns:
+        Количество добавленных снимков.
+    """
+    async with _compaction_lock:
+        upper = await committed_movement_id(session)
+        if upper is None:
+            return 0
+        if session.get_bind().dialect.name == "postgresql":
+            await session.execute(
+                select(func.pg_advisory_xact_lock(_COMPACTION_LOCK_ID))
+            )
+        watermark = (
+            await session.execute(
+                select(func.coalesce(func.max(StockSnapshot.movement_id), 0))
+            )
+        ).scalar_one()
+        if upper <= watermark:
+            await session.commit()
+            return 0
+
+        previous_quantity = (
+            select(StockSnapshot.quantity)
+            .where(StockSnapshot.product_id == StockMovement.product_id)
+            .order_by(col(StockSnapshot.movement_id).desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        tail = (
+            select(
+                StockMovement.product_id,
+                func.coalesce(previous_quantity, 0) + func.sum(StockMovement.delta),
+                func.max(StockMovement.id),
+                func.max(StockMovement.created_at),
+            )
+            .where(col(StockMovement.id) > watermark, col(StockMovement.id) <= upper)
+            .group_by(col(StockMovement.product_id))
+        )
+        result = await session.execute(
+            insert(StockSnapshot).from_select(
+                ["product_id", "quantity", "movement_id", "taken_at"], tail
+            )
+        )
+        await session.commit()
+        return result.rowcount or 0
+
+
+async def run_snapshot_compaction(
+    session_pool: async_sessionmaker[AsyncSession], interval: float
+) -> None:
+    """
+    Периодически запускает компактизацию снимков до отмены задачи.
+
+    Args:
+        session_pool: Фабрика сессий.
+        interval: Пауза между запусками, в секундах.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_pool() as session:
+                created = await compact_snapshots(session)
+            logging.info("Stock snapshot compaction added %s snapshots", created)
+        except Exception:
+            logging.exception("Error during stock snapshot compaction")
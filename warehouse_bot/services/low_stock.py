@@ -0,0 +1,140 @@
+"""Уведомления о товарах, остаток которых опустился ниже порога."""
+
+import asyncio
+import logging
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from warehouse_bot.core.send_scheduler import bulk_sends
+from warehouse_bot.db.models import Product
+from warehouse_bot.services import product_service
+from warehouse_bot.services.product_service import LowStockItem
+
+
+def crossed_below_minimum(product: Product, change: int) -> bool:
+    """
+    Проверяет, опустился ли остаток ниже порога именно этим изменением.
+
+    Args:
+        product: Товар с остатком после изменения.
+        change: Примененное изменение остатка.
+
+    Returns:
+        True, если до изменения остаток был не ниже порога, а после — ниже.
+    """
+    return product.quantity < product.min_quantity <= product.quantity - change
+
+
+class LowStockNotifier:
+    """
+    Отправляет в заданный чат уведомления о падении остатков ниже порога.
+
+    Проверка выполняется по результату каждого изменения остатка, без
+    просмотра каталога. Первое срабатывание открывает окно `delay`,
+    товары, упавшие ниже порога в пределах окна, попадают в то же
+    сообщение, поэтому серия списаний дает одно уведомление. Уведомления
+    отправляются с низким приоритетом (см. `bulk_sends`).
+
+    Пополнения проходят мимо `check` (агрегатор приращений, импорт CSV,
+    другие процессы), поэтому перед отправкой остатки перечитываются из
+    БД: пополненные до порога товары в уведомление не попадают.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int | str,
+        delay: float = 5.0,
+        session_pool: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        """
+        Args:
+            bot: Экземпляр бота для отправки уведомлений.
+            chat_id: Чат для уведомлений.
+            delay: Окно объединения уведомлений, в секундах.
+            session_pool: Фабрика сессий для проверки остатков перед
+                          отправкой; без нее отправляются остатки,
+                          известные на момент списания.
+        """
+        self.bot = bot
+        self.chat_id = chat_id
+        self.delay = delay
+        self.session_pool = session_pool
+        self._pending: dict[int, LowStockItem] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def check(self, product: Product, change: int) -> bool:
+        """
+        Ставит товар в очередь уведомления, если изменение опустило его
+        остаток ниже порога.
+
+        Для товара, уже ожидающего уведомления, запоминается последний
+        остаток; если его успели пополнить до порога, уведомление о нем
+        отменяется.
+
+        Args:
+            product: Товар с остатком после изменения.
+            change: Примененное изменение остатка.
+
+        Returns:
+            True, если товар ожидает уведомления.
+        """
+        if product.id is None:
+            return False
+        if product.id in self._pending:
+            if product.quantity >= product.min_quantity:
+                del self._pending[product.id]
+                return False
+        elif not crossed_below_minimum(product, change):
+            return False
+        self._pending[product.id] = LowStockItem(
+            product.id, product.name, product.quantity, product.min_quantity
+        )
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.delay, self._schedule_flush
+            )
+        return True
+
+    def _schedule_flush(self) -> None:
+        self._timer = None
+        task = asyncio.create_task(self._flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self) -> None:
+        items, self._pending = self._pending, {}
+        if items and self.session_pool is not None:
+            try:
+                async with self.session_pool() as session:
+                    current = await product_service.get_products_below_minimum(
+                        session, list(items)
+                    )
+            except Exception:
+                logging.exception("Failed to re-check low stock for %s", list(items))
+            else:
+                items = {item.id: item for item in current}
+        if not items:
+            return
+        lines = ["Остаток ниже минимального:"]
+        for item in sorted(items.values(), key=lambda item: item.name):
+            lines.append(
+                f"- {item.name}: {item.quantity} шт. (минимум {item.min_quantity})"
+            )
+        try:
+            with bulk_sends():
+                await self.bot.send_message(self.chat_id, "\n".join(lines))
+        except Exception:
+            logging.exception("Failed to send low stock alert for %s", list(items))
+
+    async def close(self) -> None:
+        """
+        Немедленно отправляет накопленные уведомления.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._flush()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,14 +1,231 @@
 """Сервисный слой для управления товарами."""
 
+import contextlib
+import datetime
+import functools
+import weakref
 from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, NamedTuple
 
+from sqlalchemy import Connection, Engine, Integer, bindparam, func, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlalchemy.sql.dml import Insert
+from sqlmodel import col, select
 
-from warehouse_bot.db.models import Product
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID, Product
+from warehouse_bot.db.routing import (
+    primary_reads,
+    primary_reads_active,
+    replica_read,
+)
+from warehouse_bot.services import ledger_service
+from warehouse_bot.services.cache import MISSING, ProductCache
+from warehouse_bot.services.search_index import NameTrie, normalize_name
 
+if TYPE_CHECKING:
+    from warehouse_bot.services.low_stock import LowStockNotifier
 
-async def create_product(session: AsyncSession, name: str, quantity: int) -> Product:
+# Количество товаров на одной странице /list.
+PRODUCTS_PAGE_SIZE = 20
+# Количество вариантов, предлагаемых при поиске по названию.
+SEARCH_RESULTS_LIMIT = 5
+# Максимальное количество товаров в списке /low.
+LOW_STOCK_LIMIT = 50
+
+# Индексы названий для БД без pg_trgm: по одному на движок и склад.
+_name_indexes: "weakref.WeakKeyDictionary[Engine | Connection, dict[int, NameTrie]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class StockIncrement(NamedTuple):
+    """Одно приращение остатка вместе с данными для журнала движений."""
+
+    quantity: int
+    user_id: int | None = None
+    update_id: int | None = None
+
+
+class ProductListItem(NamedTuple):
+    """Строка списка товаров: только нужные для вывода колонки."""
+
+    id: int
+    name: str
+    quantity: int
+
+
+class LowStockItem(NamedTuple):
+    """Товар с остатком ниже минимального."""
+
+    id: int
+    name: str
+    quantity: int
+    min_quantity: int
+
+
+@dataclass(frozen=True, slots=True)
+class ProductPage:
+    """
+    Страница списка товаров, упорядоченного по названию.
+
+    Атрибуты:
+        items: Товары текущей страницы.
+        has_prev: Есть ли товары перед первым элементом страницы.
+        has_next: Есть ли товары после последнего элемента страницы.
+    """
+
+    items: Sequence[ProductListItem]
+    has_prev: bool
+    has_next: bool
+
+
+# Горячие запросы собираются один раз при импорте, а значения передаются
+# через bindparam: на каждый вызов не тратится построение выражения, ключ
+# кэша скомпилированного SQL всегда один и тот же, а asyncpg переиспользует
+# подготовленное выражение соединения (и план запроса на сервере).
+# Каждый запрос ограничен складом: условие `warehouse_id = :warehouse`
+# вместе с сортировкой по названию обслуживается индексом
+# (warehouse_id, name).
+_PRODUCT_COLUMNS = (col(Product.id), col(Product.name), col(Product.quantity))
+
+_IN_WAREHOUSE = col(Product.warehouse_id) == bindparam("warehouse")
+
+_SELECT_ALL_PRODUCTS = select(Product).where(_IN_WAREHOUSE).order_by(Product.name)
+
+_SELECT_PRODUCT_BY_NAME = select(Product).where(
+    _IN_WAREHOUSE, col(Product.name) == bindparam("name")
+)
+
+_SELECT_PAGE_FIRST = (
+    select(*_PRODUCT_COLUMNS)
+    .where(_IN_WAREHOUSE)
+    .order_by(Product.name)
+    .limit(bindparam("limit", type_=Integer))
+)
+_SELECT_PAGE_AFTER = (
+    select(*_PRODUCT_COLUMNS)
+    .where(
+        _IN_WAREHOUSE,
+        col(Product.name)
+        > select(Product.name)
+        .where(Product.id == bindparam("cursor_id"))
+        .scalar_subquery(),
+    )
+    .order_by(Product.name)
+    .limit(bindparam("limit", type_=Integer))
+)
+_SELECT_PAGE_BEFORE = (
+    select(*_PRODUCT_COLUMNS)
+    .where(
+        _IN_WAREHOUSE,
+        col(Product.name)
+        < select(Product.name)
+        .where(Product.id == bindparam("cursor_id"))
+        .scalar_subquery(),
+    )
+    .order_by(col(Product.name).desc())
+    .limit(bindparam("limit", type_=Integer))
+)
+
+_UPDATE_PRODUCT_QUANTITY = (
+    update(Product)
+    .where(
+        col(Product.id) == bindparam("product_id"),
+        _IN_WAREHOUSE,
+        col(Product.quantity) + bindparam("change", type_=Integer) >= 0,
+    )
+    .values(quantity=col(Product.quantity) + bindparam("change", type_=Integer))
+    .returning(Product)
+    .execution_options(populate_existing=True, synchronize_session=False)
+)
+
+
+# Условие совпадает с условием частичного индекса ix_product_low_stock,
+# поэтому запрос читает только товары ниже порога.
+_SELECT_LOW_STOCK = (
+    select(*_PRODUCT_COLUMNS, col(Product.min_quantity))
+    .where(_IN_WAREHOUSE, col(Product.quantity) < col(Product.min_quantity))
+    .order_by(Product.name)
+    .limit(bindparam("limit", type_=Integer))
+)
+
+_UPDATE_MIN_QUANTITY = (
+    update(Product)
+    .where(col(Product.id) == bindparam("product_id"), _IN_WAREHOUSE)
+    .values(min_quantity=bindparam("min_quantity", type_=Integer))
+    .returning(Product)
+    .execution_options(populate_existing=True, synchronize_session=False)
+)
+
+
+@functools.cache
+def _upsert_statement(dialect_name: str) -> Insert:
+    """
+    Возвращает собранный один раз upsert остатка для диалекта БД.
+
+    Args:
+        dialect_name: Имя диалекта SQLAlchemy (`postgresql` или `sqlite`).
+
+    Returns:
+        `INSERT ... ON CONFLICT (warehouse_id, name) DO UPDATE ... RETURNING`
+        с параметрами `warehouse`, `name`, `quantity` и `created_at`.
+    """
+    insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    statement = insert(Product).values(
+        warehouse_id=bindparam("warehouse"),
+        name=bindparam("name"),
+        quantity=bindparam("quantity"),
+        created_at=bindparam("created_at"),
+    )
+    return (
+        statement.on_conflict_do_update(
+            index_elements=[col(Product.warehouse_id), col(Product.name)],
+            set_={"quantity": col(Product.quantity) + statement.excluded.quantity},
+        )
+        # При вставке created_at совпадает с переданным значением,
+        # при обновлении остается прежним.
+        .returning(Product, col(Product.created_at) == bindparam("created_at"))
+        .execution_options(populate_existing=True)
+    )
+
+
+def _index_name(session: AsyncSession, warehouse_id: int, name: str) -> None:
+    """
+    Добавляет название в in-memory индекс склада, если он уже построен.
+
+    Args:
+        session: Сессия базы данных.
+        warehouse_id: ID склада.
+        name: Название товара.
+    """
+    name_index = _name_indexes.get(session.get_bind(), {}).get(warehouse_id)
+    if name_index is not None:
+        name_index.add(name)
+
+
+def reset_name_index(session: AsyncSession) -> None:
+    """
+    Сбрасывает in-memory индексы названий после массовой записи товаров.
+
+    Индексы будут заново построены при следующем поиске.
+
+    Args:
+        session: Сессия базы данных.
+    """
+    _name_indexes.pop(session.get_bind(), None)
+
+
+async def create_product(
+    session: AsyncSession,
+    name: str,
+    quantity: int,
+    cache: ProductCache | None = None,
+    user_id: int | None = None,
+    update_id: int | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> Product:
     """
     Создает новый товар в базе данных.
 
@@ -16,61 +233,449 @@ async def create_product(session: AsyncSession, name: str, quantity: int) -> Pro
         session: Сессия базы данных.
         name: Название товара.
         quantity: Начальное количество товара.
+        cache: Кэш товаров, который нужно инвалидировать.
+        user_id: ID пользователя Telegram для журнала движений.
+        update_id: ID обновления Telegram для журнала движений.
+        warehouse_id: ID склада.
 
     Returns:
         Созданный объект товара.
     """
-    db_product = Product(name=name, quantity=quantity)
+    db_product = Product(name=name, quantity=quantity, warehouse_id=warehouse_id)
     session.add(db_product)
+    await session.flush()
+    if db_product.id is None:
+        raise RuntimeError(f"Product {name!r} got no id on flush")
+    ledger_service.add_movement(
+        session, db_product.id, quantity, user_id=user_id, update_id=update_id
+    )
     await session.commit()
     await session.refresh(db_product)
+    _index_name(session, warehouse_id, name)
+    if cache is not None:
+        await cache.invalidate()
     return db_product
 
 
-async def get_all_products(session: AsyncSession) -> Sequence[Product]:
+async def add_product_stock(
+    session: AsyncSession,
+    name: str,
+    quantity: int,
+    cache: ProductCache | None = None,
+    user_id: int | None = None,
+    update_id: int | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> tuple[Product, bool]:
     """
-    Возвращает список всех товаров.
+    Создает товар или увеличивает его остаток одним запросом.
+
+    Выполняет `INSERT ... ON CONFLICT (warehouse_id, name) DO UPDATE
+    ... RETURNING`,
+    поэтому одновременные добавления одного и того же товара не приводят
+    к `IntegrityError` и не теряют приращения.
 
     Args:
         session: Сессия базы данных.
+        name: Название товара.
+        quantity: Добавляемое количество (больше нуля).
+        cache: Кэш товаров, который нужно инвалидировать.
+        user_id: ID пользователя Telegram для журнала движений.
+        update_id: ID обновления Telegram для журнала движений.
+        warehouse_id: ID склада.
+
+    Returns:
+        Кортеж из обновленного объекта Product и признака того,
+        что товар был создан этим запросом.
+    """
+    return await add_product_stock_batch(
+        session,
+        name,
+        [StockIncrement(quantity=quantity, user_id=user_id, update_id=update_id)],
+        cache=cache,
+        warehouse_id=warehouse_id,
+    )
+
+
+async def add_product_stock_batch(
+    session: AsyncSession,
+    name: str,
+    increments: Sequence[StockIncrement],
+    cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> tuple[Product, bool]:
+    """
+    Применяет несколько приращений одного товара одним upsert.
+
+    Остаток меняется одним запросом на сумму приращений, а в журнал
+    движений попадает отдельная запись на каждое приращение.
+
+    Args:
+        session: Сессия базы данных.
+        name: Название товара.
+        increments: Приращения (каждое больше нуля).
+        cache: Кэш товаров, который нужно инвалидировать.
+        warehouse_id: ID склада.
+
+    Returns:
+        Кортеж из обновленного объекта Product и признака того,
+        что товар был создан этим запросом.
+    """
+    quantity = sum(increment.quantity for increment in increments)
+    statement = _upsert_statement(session.get_bind().dialect.name)
+    result = await session.execute(
+        statement,
+        {
+            "warehouse": warehouse_id,
+            "name": name,
+            "quantity": quantity,
+            "created_at": datetime.datetime.now(datetime.UTC),
+        },
+    )
+    db_product, created = result.one()
+    for increment in increments:
+        ledger_service.add_movement(
+            session,
+            db_product.id,
+            increment.quantity,
+            user_id=increment.user_id,
+            update_id=increment.update_id,
+        )
+    await session.commit()
+    if created:
+        _index_name(session, warehouse_id, name)
+    if cache is not None:
+        await cache.invalidate()
+    return db_product, bool(created)
+
+
+def _cache_fill_reads(
+    cache: ProductCache | None,
+) -> contextlib.AbstractContextManager[None]:
+    """
+    Направляет чтение, результат которого попадет в кэш, в основную базу.
+
+    Версия кэша увеличивается сразу после записи, а реплика может еще не
+    содержать ее: прочитанные с реплики данные оказались бы под новой
+    версией и отдавались бы всем, включая автора записи, до истечения TTL.
+    Значение из основной базы, сохраненное под версией, прочитанной до
+    запроса, не старше этой версии, поэтому попадания в Redis безопасны
+    и для пользователей, читающих из основной базы после своей записи.
+    Без кэша чтение, как обычно, может уйти на реплику.
+    """
+    return primary_reads() if cache is not None else contextlib.nullcontext()
+
+
+@replica_read
+async def get_all_products(
+    session: AsyncSession,
+    cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> Sequence[Product]:
+    """
+    Возвращает список всех товаров склада.
+
+    Args:
+        session: Сессия базы данных.
+        cache: Кэш товаров; при промахе результат запроса сохраняется в него.
+        warehouse_id: ID склада.
 
     Returns:
         Последовательность объектов Product.
     """
-    statement = select(Product).order_by(Product.name)
-    # ИСПРАВЛЕНО: .exec() заменен на .execute()
-    result = await session.execute(statement)
-    return result.scalars().all()
+    cache_key = f"{warehouse_id}:all"
+    if cache is not None:
+        lookup = await cache.get(cache_key)
+        if lookup.hit:
+            return [Product.model_validate(data) for data in lookup.value]
+
+    with _cache_fill_reads(cache):
+        result = await session.execute(
+            _SELECT_ALL_PRODUCTS, {"warehouse": warehouse_id}
+        )
+    products = result.scalars().all()
+
+    if cache is not None:
+        await cache.set(
+            lookup.version,
+            cache_key,
+            [product.model_dump(mode="json") for product in products],
+        )
+    return products
+
+
+@replica_read
+async def get_products_page(
+    session: AsyncSession,
+    *,
+    after_id: int | None = None,
+    before_id: int | None = None,
+    limit: int = PRODUCTS_PAGE_SIZE,
+    cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> ProductPage:
+    """
+    Возвращает страницу товаров с keyset-пагинацией по названию.
 
+    Курсором служит ID крайнего товара соседней страницы: его название
+    подставляется подзапросом по первичному ключу, а сама выборка идет
+    по уникальному индексу (warehouse_id, name) с `LIMIT`, поэтому стоимость запроса
+    не зависит от номера страницы и размера каталога.
+
+    Args:
+        session: Сессия базы данных.
+        after_id: ID товара, после которого начинается страница.
+        before_id: ID товара, перед которым заканчивается страница.
+        limit: Максимальное количество товаров на странице.
+        cache: Кэш товаров; при промахе страница сохраняется в него.
+        warehouse_id: ID склада.
 
-async def get_product_by_name(session: AsyncSession, name: str) -> Product | None:
+    Returns:
+        Объект ProductPage.
     """
-    Находит товар по его уникальному имени.
+    cache_key = f"{warehouse_id}:page:{after_id}:{before_id}:{limit}"
+    if cache is not None:
+        lookup = await cache.get(cache_key)
+        if lookup.hit:
+            return ProductPage(
+                items=[ProductListItem(*item) for item in lookup.value["items"]],
+                has_prev=lookup.value["has_prev"],
+                has_next=lookup.value["has_next"],
+            )
+
+    # Берем на одну строку больше, чтобы узнать, есть ли следующая страница.
+    params: dict[str, Any] = {"warehouse": warehouse_id, "limit": limit + 1}
+    if before_id is not None:
+        statement = _SELECT_PAGE_BEFORE
+        params["cursor_id"] = before_id
+    elif after_id is not None:
+        statement = _SELECT_PAGE_AFTER
+        params["cursor_id"] = after_id
+    else:
+        statement = _SELECT_PAGE_FIRST
+    with _cache_fill_reads(cache):
+        result = await session.execute(statement, params)
+    items = [ProductListItem(*row) for row in result.all()]
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    if before_id is not None:
+        items.reverse()
+        page = ProductPage(items=items, has_prev=has_more, has_next=True)
+    else:
+        page = ProductPage(
+            items=items, has_prev=after_id is not None, has_next=has_more
+        )
+
+    if cache is not None:
+        await cache.set(
+            lookup.version,
+            cache_key,
+            {
+                "items": [list(item) for item in page.items],
+                "has_prev": page.has_prev,
+                "has_next": page.has_next,
+            },
+        )
+    return page
+
+
+@replica_read
+async def get_product_by_name(
+    session: AsyncSession,
+    name: str,
+    cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> Product | None:
+    """
+    Находит товар по его уникальному в пределах склада имени.
 
     Args:
         session: Сессия базы данных.
         name: Название товара для поиска.
+        cache: Кэш товаров; кэшируется и отсутствие товара.
+        warehouse_id: ID склада.
 
     Returns:
         Объект Product или None, если товар не найден.
     """
-    statement = select(Product).where(Product.name == name)
-    # ИСПРАВЛЕНО: .exec() заменен на .execute()
-    result = await session.execute(statement)
-    return result.scalar_one_or_none()
+    cache_key = f"{warehouse_id}:name:{name}"
+    if cache is not None:
+        lookup = await cache.get(cache_key)
+        if lookup.hit:
+            return (
+                None if lookup.value is None else Product.model_validate(lookup.value)
+            )
+
+    with _cache_fill_reads(cache):
+        result = await session.execute(
+            _SELECT_PRODUCT_BY_NAME, {"warehouse": warehouse_id, "name": name}
+        )
+    product = result.scalar_one_or_none()
+
+    if cache is not None:
+        await cache.set(
+            lookup.version,
+            cache_key,
+            None if product is None else product.model_dump(mode="json"),
+        )
+    return product
+
+
+async def get_product(
+    session: AsyncSession, product_id: int, warehouse_id: int = DEFAULT_WAREHOUSE_ID
+) -> Product | None:
+    """
+    Находит товар по ID.
+
+    Args:
+        session: Сессия базы данных.
+        product_id: ID товара.
+        warehouse_id: ID склада.
+
+    Returns:
+        Объект Product или None, если товар не найден на этом складе.
+    """
+    product = await session.get(Product, product_id)
+    if product is None or product.warehouse_id != warehouse_id:
+        return None
+    return product
+
+
+@replica_read
+async def search_products(
+    session: AsyncSession,
+    query: str,
+    limit: int = SEARCH_RESULTS_LIMIT,
+    cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> list[ProductListItem]:
+    """
+    Ищет товары по префиксу названия и с учетом опечаток.
+
+    В PostgreSQL запрос обслуживается GIN-индексом pg_trgm
+    (`ILIKE 'query%'` и оператор схожести `%`). В остальных БД
+    используется in-memory префиксное дерево, которое строится один раз
+    на движок и склад и пополняется при создании товаров.
+
+    Args:
+        session: Сессия базы данных.
+        query: Введенное пользователем название.
+        limit: Максимальное количество результатов.
+        cache: Кэш товаров; результаты кэшируются по нормализованному запросу
+               сначала в памяти процесса, затем в Redis.
+        warehouse_id: ID склада.
+
+    Returns:
+        Найденные товары: сначала совпадения по префиксу, затем похожие.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    cache_key = f"{warehouse_id}:search:{limit}:{normalize_name(query)}"
+    if cache is not None:
+        # Локальный уровень не знает о версиях и может отставать от записи,
+        # сделанной в другом процессе: после своей записи пользователь его
+        # не читает
+        local_items = MISSING if primary_reads_active() else cache.local.get(cache_key)
+        if local_items is not MISSING:
+            return list(local_items)
+        lookup = await cache.get(cache_key)
+        if lookup.hit:
+            items = [ProductListItem(*item) for item in lookup.value]
+            cache.local.set(cache_key, items)
+            return items
+
+    with _cache_fill_reads(cache):
+        items = await _search_products(session, query, limit, warehouse_id)
+
+    if cache is not None:
+        cache.local.set(cache_key, items)
+        await cache.set(lookup.version, cache_key, [list(item) for item in items])
+    return items
+
+
+async def _search_products(
+    session: AsyncSession, query: str, limit: int, warehouse_id: int
+) -> list[ProductListItem]:
+    """
+    Выполняет поиск товаров в БД или in-memory индексе без кэша.
+    """
+
+    columns = _PRODUCT_COLUMNS
+    bind = session.get_bind()
+
+    if bind.dialect.name == "postgresql":
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        is_prefix = col(Product.name).ilike(f"{escaped}%")
+        statement = (
+            select(*columns)
+            .where(
+                col(Product.warehouse_id) == warehouse_id,
+                or_(is_prefix, col(Product.name).op("%")(query)),
+            )
+            .order_by(
+                is_prefix.desc(),
+                func.similarity(Product.name, query).desc(),
+                Product.name,
+            )
+            .limit(limit)
+        )
+        result = await session.execute(statement)
+        return [ProductListItem(*row) for row in result.all()]
+
+    warehouse_indexes = _name_indexes.setdefault(bind, {})
+    name_index = warehouse_indexes.get(warehouse_id)
+    if name_index is None:
+        name_index = NameTrie()
+        names_result = await session.execute(
+            select(col(Product.name)).where(col(Product.warehouse_id) == warehouse_id)
+        )
+        for name in names_result.scalars():
+            name_index.add(name)
+        warehouse_indexes[warehouse_id] = name_index
+
+    names = name_index.search(query, limit)
+    if not names:
+        return []
+    result = await session.execute(
+        select(*columns).where(
+            col(Product.warehouse_id) == warehouse_id, col(Product.name).in_(names)
+        )
+    )
+    items = {row.name: ProductListItem(*row) for row in result.all()}
+    return [items[name] for name in names if name in items]
 
 
 async def update_product_quantity(
-    session: AsyncSession, product_id: int, quantity_change: int
+    session: AsyncSession,
+    product_id: int,
+    quantity_change: int,
+    cache: ProductCache | None = None,
+    user_id: int | None = None,
+    update_id: int | None = None,
+    low_stock: "LowStockNotifier | None" = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
 ) -> Product:
     """
     Обновляет количество товара, обеспечивая атомарность.
 
+    Изменение выполняется одним условным запросом
+    `UPDATE ... SET quantity = quantity + :d WHERE id = :id
+    AND quantity + :d >= 0 RETURNING ...`, поэтому конкурентные списания
+    не могут увести остаток в минус и не теряют друг друга.
+
     Args:
         session: Сессия базы данных.
         product_id: ID товара для обновления.
         quantity_change: Изменение количества (может быть положительным или
                          отрицательным).
+        cache: Кэш товаров, который нужно инвалидировать.
+        user_id: ID пользователя Telegram для журнала движений.
+        update_id: ID обновления Telegram для журнала движений.
+        low_stock: Уведомления о падении остатка ниже порога; проверяется
+                   остаток, возвращенный этим же запросом.
+        warehouse_id: ID склада.
 
     Returns:
         Обновленный объект Product.
@@ -79,16 +684,120 @@ async def update_product_quantity(
         ValueError: Если товар не найден или если итоговое количество
                     становится отрицательным.
     """
-    db_product = await session.get(Product, product_id)
-    if not db_product:
-        raise ValueError(f"Товар с ID {product_id} не найден.")
+    result = await session.execute(
+        _UPDATE_PRODUCT_QUANTITY,
+        {
+            "product_id": product_id,
+            "warehouse": warehouse_id,
+            "change": quantity_change,
+        },
+    )
+    db_product = result.scalar_one_or_none()
 
-    if db_product.quantity + quantity_change < 0:
+    if db_product is None:
+        # Запрос ничего не изменил: выясняем причину только на этом пути.
+        await session.rollback()
+        if await get_product(session, product_id, warehouse_id) is None:
+            raise ValueError(f"Товар с ID {product_id} не найден.")
         raise ValueError("Недостаточно товара на складе для списания.")
 
-    db_product.quantity += quantity_change
-    session.add(db_product)
+    ledger_service.add_movement(
+        session, product_id, quantity_change, user_id=user_id, update_id=update_id
+    )
     await session.commit()
-    await session.refresh(db_product)
+    if cache is not None:
+        await cache.invalidate()
+    if low_stock is not None:
+        low_stock.check(db_product, quantity_change)
+    return db_product
+
 
+async def set_min_quantity(
+    session: AsyncSession,
+    product_id: int,
+    min_quantity: int,
+    cache: ProductCache | None = None,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> Product:
+    """
+    Задает минимальный остаток товара.
+
+    Args:
+        session: Сессия базы данных.
+        product_id: ID товара.
+        min_quantity: Минимальный остаток; 0 отключает уведомления.
+        cache: Кэш товаров, который нужно инвалидировать.
+        warehouse_id: ID склада.
+
+    Returns:
+        Обновленный объект Product.
+
+    Raises:
+        ValueError: Если товар не найден или порог отрицательный.
+    """
+    if min_quantity < 0:
+        raise ValueError("Минимальный остаток не может быть отрицательным.")
+    result = await session.execute(
+        _UPDATE_MIN_QUANTITY,
+        {
+            "product_id": product_id,
+            "warehouse": warehouse_id,
+            "min_quantity": min_quantity,
+        },
+    )
+    db_product = result.scalar_one_or_none()
+    if db_product is None:
+        await session.rollback()
+        raise ValueError(f"Товар с ID {product_id} не найден.")
+    await session.commit()
+    if cache is not None:
+        await cache.invalidate()
     return db_product
+
+
+@replica_read
+async def get_low_stock_products(
+    session: AsyncSession,
+    limit: int = LOW_STOCK_LIMIT,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+) -> list[LowStockItem]:
+    """
+    Возвращает товары склада, остаток которых ниже минимального.
+
+    Args:
+        session: Сессия базы данных.
+        limit: Максимальное количество товаров.
+        warehouse_id: ID склада.
+
+    Returns:
+        Товары ниже порога, упорядоченные по названию.
+    """
+    result = await session.execute(
+        _SELECT_LOW_STOCK, {"warehouse": warehouse_id, "limit": limit}
+    )
+    return [LowStockItem(*row) for row in result.all()]
+
+
+async def get_products_below_minimum(
+    session: AsyncSession, product_ids: Sequence[int]
+) -> list[LowStockItem]:
+    """
+    Возвращает те из указанных товаров, остаток которых сейчас ниже порога.
+
+    Читает основную БД: результат используется, чтобы не уведомлять о
+    товарах, которые уже успели пополнить.
+
+    Args:
+        session: Сессия базы данных.
+        product_ids: ID проверяемых товаров.
+
+    Returns:
+        Товары ниже порога с текущими остатками.
+    """
+    result = await session.execute(
+        select(*_PRODUCT_COLUMNS, col(Product.min_quantity)).where(
+            col(Product.id).in_(product_ids),
+            col(Product.quantity) < col(Product.min_quantity),
+        )
+    )
+    return [LowStockItem(*row) for row in result.all()]
@@ -0,0 +1,248 @@
+"""Сервисный слой отчетов по остаткам и движениям товаров."""
+
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from sqlalchemy import Date, case, func, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import col
+
+from warehouse_bot.db.models import (
+    DEFAULT_WAREHOUSE_ID,
+    Product,
+    StockDailyRollup,
+    StockMovement,
+)
+from warehouse_bot.db.routing import replica_read
+from warehouse_bot.services import ledger_service
+
+# Сколько последних дней показывает /report.
+REPORT_DAYS = 7
+# Сколько товаров с наибольшим оборотом показывает /report.
+TOP_MOVERS_LIMIT = 5
+
+# Ключ advisory-блокировки PostgreSQL: сворачивание прибавляет суммы,
+# поэтому два воркера не должны свернуть один и тот же хвост дважды
+_ROLLUP_LOCK_ID = 0x726F6C6C
+
+# День движения (UTC) и суммы прихода и расхода по группе движений
+_MOVEMENT_DAY = func.date(col(StockMovement.created_at), type_=Date)
+_INFLOW = func.sum(
+    case((col(StockMovement.delta) > 0, col(StockMovement.delta)), else_=0)
+)
+_OUTFLOW = func.sum(
+    case((col(StockMovement.delta) < 0, -col(StockMovement.delta)), else_=0)
+)
+# Граница свернутой части журнала
+_WATERMARK = select(func.coalesce(func.max(StockDailyRollup.movement_id), 0))
+
+
+class DailyFlow(NamedTuple):
+    """Приход и расход склада за день."""
+
+    day: datetime.date
+    inflow: int
+    outflow: int
+
+
+class TopMover(NamedTuple):
+    """Товар с наибольшим оборотом за период."""
+
+    name: str
+    inflow: int
+    outflow: int
+
+
+@dataclass(frozen=True, slots=True)
+class StockReport:
+    """
+    Сводка по складу для /report.
+
+    Атрибуты:
+        products: Количество товаров на складе.
+        total_quantity: Суммарный остаток всех товаров.
+        days: Приход и расход по дням, от новых к старым (только дни
+              с движениями).
+        top_movers: Товары с наибольшим оборотом за период.
+    """
+
+    products: int
+    total_quantity: int
+    days: list[DailyFlow]
+    top_movers: list[TopMover]
+
+
+async def rollup_movements(session: AsyncSession) -> int:
+    """
+    Сворачивает новый хвост журнала в дневные суммы по товарам.
+
+    Движения после последнего сворачивания группируются по товару и дню
+    и прибавляются к существующим строкам. Читается только хвост журнала
+    по первичному ключу и только до границы закоммиченных движений (см.
+    `ledger_service.committed_movement_id`), поэтому все движения до
+    границы свернутой части уже учтены в ней, а остальные отчет берет из
+    хвоста. В PostgreSQL запуски в разных воркерах выполняются по очереди
+    под транзакционной advisory-блокировкой.
+
+    Args:
+        session: Сессия базы данных.
+
+    Returns:
+        Количество добавленных или обновленных дневных строк.
+    """
+    upper = await ledger_service.committed_movement_id(session)
+    if upper is None:
+        return 0
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        await session.execute(select(func.pg_advisory_xact_lock(_ROLLUP_LOCK_ID)))
+    watermark = (await session.execute(_WATERMARK)).scalar_one()
+    if upper <= watermark:
+        await session.commit()
+        return 0
+
+    tail = (
+        select(
+            col(StockMovement.product_id),
+            _MOVEMENT_DAY,
+            col(Product.warehouse_id),
+            _INFLOW,
+            _OUTFLOW,
+            func.max(StockMovement.id),
+        )
+        .join(Product, col(Product.id) == col(StockMovement.product_id))
+        .where(col(StockMovement.id) > watermark, col(StockMovement.id) <= upper)
+        .group_by(
+            col(StockMovement.product_id), _MOVEMENT_DAY, col(Product.warehouse_id)
+        )
+    )
+    insert_into = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    statement = insert_into(StockDailyRollup).from_select(
+        ["product_id", "day", "warehouse_id", "inflow", "outflow", "movement_id"],
+        tail,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[col(StockDailyRollup.product_id), col(StockDailyRollup.day)],
+        set_={
+            "inflow": col(StockDailyRollup.inflow) + statement.excluded.inflow,
+            "outflow": col(StockDailyRollup.outflow) + statement.excluded.outflow,
+            "movement_id": statement.excluded.movement_id,
+        },
+    )
+    result = await session.execute(statement)
+    await session.commit()
+    return result.rowcount or 0
+
+
+async def run_rollup(
+    session_pool: async_sessionmaker[AsyncSession], interval: float
+) -> None:
+    """
+    Периодически сворачивает журнал в дневные суммы до отмены задачи.
+
+    Args:
+        session_pool: Фабрика сессий.
+        interval: Пауза между запусками, в секундах.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_pool() as session:
+                updated = await rollup_movements(session)
+            logging.info("Stock rollup updated %s daily rows", updated)
+        except Exception:
+            logging.exception("Error during stock rollup")
+
+
+@replica_read
+async def get_stock_report(
+    session: AsyncSession,
+    days: int = REPORT_DAYS,
+    top_limit: int = TOP_MOVERS_LIMIT,
+    warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+    today: datetime.date | None = None,
+) -> StockReport:
+    """
+    Собирает сводку по складу: остатки, движение по дням и лидеров оборота.
+
+    Движение читается из дневных сумм и дополняется еще не свернутым
+    хвостом журнала в том же запросе, поэтому отчет точен на момент
+    запроса, а его стоимость не зависит от длины истории.
+
+    Args:
+        session: Сессия базы данных.
+        days: За сколько последних дней (включая сегодня) считать движение.
+        top_limit: Сколько товаров с наибольшим оборотом вернуть.
+        warehouse_id: ID склада.
+        today: Текущий день (UTC); по умолчанию определяется по часам.
+
+    Returns:
+        Объект StockReport.
+    """
+    if today is None:
+        today = datetime.datetime.now(datetime.UTC).date()
+    since = today - datetime.timedelta(days=days - 1)
+
+    totals = await session.execute(
+        select(
+            func.count(col(Product.id)), func.coalesce(func.sum(Product.quantity), 0)
+        ).where(col(Product.warehouse_id) == warehouse_id)
+    )
+    products, total_quantity = totals.one()
+
+    rolled = select(
+        col(StockDailyRollup.product_id),
+        col(StockDailyRollup.day),
+        col(StockDailyRollup.inflow),
+        col(StockDailyRollup.outflow),
+    ).where(
+        col(StockDailyRollup.warehouse_id) == warehouse_id,
+        col(StockDailyRollup.day) >= since,
+    )
+    tail = (
+        select(col(StockMovement.product_id), _MOVEMENT_DAY, _INFLOW, _OUTFLOW)
+        .join(Product, col(Product.id) == col(StockMovement.product_id))
+        .where(
+            col(StockMovement.id) > _WATERMARK.scalar_subquery(),
+            col(Product.warehouse_id) == warehouse_id,
+            since <= _MOVEMENT_DAY,
+        )
+        .group_by(col(StockMovement.product_id), _MOVEMENT_DAY)
+    )
+    result = await session.execute(union_all(rolled, tail))
+
+    flows: dict[datetime.date, list[int]] = {}
+    movers: dict[int, list[int]] = {}
+    for product_id, day, inflow, outflow in result.all():
+        day_flow = flows.setdefault(day, [0, 0])
+        day_flow[0] += inflow
+        day_flow[1] += outflow
+        product_flow = movers.setdefault(product_id, [0, 0])
+        product_flow[0] += inflow
+        product_flow[1] += outflow
+
+    top_ids = sorted(movers, key=lambda product_id: -sum(movers[product_id]))
+    top_ids = top_ids[:top_limit]
+    names: dict[int, str] = {}
+    if top_ids:
+        names_result = await session.execute(
+            select(col(Product.id), col(Product.name)).where(
+                col(Product.id).in_(top_ids)
+            )
+        )
+        names = {row.id: row.name for row in names_result}
+
+    return StockReport(
+        products=products,
+        total_quantity=int(total_quantity),
+        days=[DailyFlow(day, *flows[day]) for day in sorted(flows, reverse=True)],
+        top_movers=[
+            TopMover(names[product_id], *movers[product_id])
+            for product_id in top_ids
+            if product_id in names
+        ],
+    )
@@ -0,0 +1,142 @@
+"""In-memory префиксное дерево названий товаров для нечеткого поиска."""
+
+from dataclasses import dataclass, field
+
+
+def normalize_name(name: str) -> str:
+    """
+    Приводит название к виду, в котором оно хранится в индексе.
+
+    Args:
+        name: Исходное название.
+
+    Returns:
+        Название без крайних пробелов и без учета регистра.
+    """
+    return name.strip().casefold()
+
+
+@dataclass(slots=True)
+class _TrieNode:
+    children: dict[str, "_TrieNode"] = field(default_factory=dict)
+    # Оригинальные названия, нормализованная форма которых заканчивается здесь
+    names: list[str] = field(default_factory=list)
+
+
+class NameTrie:
+    """
+    Префиксное дерево названий товаров.
+
+    Используется как запасной поисковый индекс там, где нет pg_trgm
+    (SQLite в тестах и локальной разработке). Поиск по префиксу стоит
+    O(длина запроса + размер ответа), нечеткий поиск обходит только
+    ветви, расстояние Левенштейна до которых не превышает порог.
+    """
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, name: str) -> None:
+        """
+        Добавляет название в индекс (повторное добавление игнорируется).
+
+        Args:
+            name: Название товара.
+        """
+        node = self._root
+        for char in normalize_name(name):
+            node = node.children.setdefault(char, _TrieNode())
+        if name not in node.names:
+            node.names.append(name)
+            self._size += 1
+
+    def _collect(self, node: _TrieNode, limit: int, found: list[str]) -> None:
+        found.extend(node.names[: limit - len(found)])
+        for char in sorted(node.children):
+            if len(found) >= limit:
+                return
+            self._collect(node.children[char], limit, found)
+
+    def starts_with(self, prefix: str, limit: int) -> list[str]:
+        """
+        Ищет названия, начинающиеся с префикса.
+
+        Args:
+            prefix: Префикс без учета регистра.
+            limit: Максимальное количество результатов.
+
+        Returns:
+            Названия в алфавитном порядке нормализованной формы.
+        """
+        node = self._root
+        for char in normalize_name(prefix):
+            next_node = node.children.get(char)
+            if next_node is None:
+                return []
+            node = next_node
+        found: list[str] = []
+        self._collect(node, limit, found)
+        return found
+
+    def similar(self, query: str, max_distance: int, limit: int) -> list[str]:
+        """
+        Ищет названия на расстоянии Левенштейна не больше порога.
+
+        Args:
+            query: Строка запроса без учета регистра.
+            max_distance: Максимальное расстояние редактирования.
+            limit: Максимальное количество результатов.
+
+        Returns:
+            Названия, упорядоченные по возрастанию расстояния.
+        """
+        query = normalize_name(query)
+        first_row = list(range(len(query) + 1))
+        matches: list[tuple[int, str]] = []
+
+        def walk(node: _TrieNode, char: str, previous_row: list[int]) -> None:
+            row = [previous_row[0] + 1]
+            for column in range(1, len(query) + 1):
+                row.append(
+                    min(
+                        row[column - 1] + 1,
+                        previous_row[column] + 1,
+                        previous_row[column - 1] + (query[column - 1] != char),
+                    )
+                )
+            if row[-1] <= max_distance:
+                matches.extend((row[-1], name) for name in node.names)
+            # Значения в строке не уменьшаются с глубиной: ветвь можно отсечь
+            if min(row) <= max_distance:
+                for next_char, child in node.children.items():
+                    walk(child, next_char, row)
+
+        for char, child in self._root.children.items():
+            walk(child, char, first_row)
+
+        matches.sort(key=lambda match: (match[0], normalize_name(match[1])))
+        return [name for _, name in matches[:limit]]
+
+    def search(self, query: str, limit: int) -> list[str]:
+        """
+        Комбинированный поиск: сначала совпадения по префиксу, затем опечатки.
+
+        Args:
+            query: Строка запроса.
+            limit: Максимальное количество результатов.
+
+        Returns:
+            Уникальные названия товаров, не больше `limit`.
+        """
+        max_distance = 1 if len(normalize_name(query)) <= 4 else 2
+        found = self.starts_with(query, limit)
+        for name in self.similar(query, max_distance, limit):
+            if len(found) >= limit:
+                break
+            if name not in found:
+                found.append(name)
+        return found
@@ -0,0 +1,138 @@
+"""Write-behind агрегация приращений остатков для «горячих» товаров."""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from warehouse_bot.db.models import DEFAULT_WAREHOUSE_ID, Product
+from warehouse_bot.db.routing import note_primary_write
+from warehouse_bot.services import product_service
+from warehouse_bot.services.cache import ProductCache
+from warehouse_bot.services.product_service import StockIncrement
+
+
+@dataclass(slots=True)
+class _PendingIncrement:
+    increment: StockIncrement
+    future: asyncio.Future[tuple[Product, bool]]
+
+
+class StockCoalescer:
+    """
+    Объединяет приращения одного товара, пришедшие за короткое окно.
+
+    Первое приращение товара открывает окно, все последующие в пределах
+    окна присоединяются к нему, а по окончании окна выполняется один
+    upsert на сумму приращений. Каждый вызывающий получает остаток,
+    подтвержденный этим запросом, с учетом только своего и предшествующих
+    ему приращений. Списания через агрегатор не проходят, поэтому проверка
+    неотрицательного остатка остается синхронной.
+    """
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        window: float = 0.05,
+        cache: ProductCache | None = None,
+    ):
+        self.session_pool = session_pool
+        self.window = window
+        self.cache = cache
+        # Ключ — (ID склада, название товара)
+        self._pending: dict[tuple[int, str], list[_PendingIncrement]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def add(
+        self,
+        name: str,
+        quantity: int,
+        user_id: int | None = None,
+        update_id: int | None = None,
+        warehouse_id: int = DEFAULT_WAREHOUSE_ID,
+    ) -> tuple[Product, bool]:
+        """
+        Добавляет приращение и ждет его записи в БД.
+
+        Args:
+            name: Название товара.
+            quantity: Добавляемое количество (больше нуля).
+            user_id: ID пользователя Telegram для журнала движений.
+            update_id: ID обновления Telegram для журнала движений.
+            warehouse_id: ID склада.
+
+        Returns:
+            Кортеж из товара с остатком после этого приращения и признака
+            того, что товар был создан этим приращением.
+        """
+        loop = asyncio.get_running_loop()
+        pending = _PendingIncrement(
+            increment=StockIncrement(quantity, user_id, update_id),
+            future=loop.create_future(),
+        )
+        key = (warehouse_id, name)
+        batch = self._pending.get(key)
+        if batch is None:
+            self._pending[key] = [pending]
+            loop.call_later(self.window, self._schedule_flush, key)
+        else:
+            batch.append(pending)
+        result = await pending.future
+        # Запись выполнена сессией агрегатора, а не сессией обновления
+        note_primary_write()
+        return result
+
+    def _schedule_flush(self, key: tuple[int, str]) -> None:
+        task = asyncio.create_task(self._flush(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, key: tuple[int, str]) -> None:
+        warehouse_id, name = key
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        try:
+            async with self.session_pool() as session:
+                product, created = await product_service.add_product_stock_batch(
+                    session,
+                    name,
+                    [pending.increment for pending in batch],
+                    cache=self.cache,
+                    warehouse_id=warehouse_id,
+                )
+        except Exception as e:
+            logging.exception("Error while flushing coalesced stock for %r", name)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        # Восстанавливаем остаток после каждого приращения по порядку
+        quantity = product.quantity - sum(p.increment.quantity for p in batch)
+        for index, pending in enumerate(batch):
+            quantity += pending.increment.quantity
+            if pending.future.done():
+                continue
+            pending.future.set_result(
+                (
+                    Product(
+                        id=product.id,
+                        warehouse_id=product.warehouse_id,
+                        name=product.name,
+                        quantity=quantity,
+                        min_quantity=product.min_quantity,
+                        created_at=product.created_at,
+                    ),
+                    created and index == 0,
+                )
+            )
+
+    async def close(self) -> None:
+        """
+        Немедленно записывает все накопленные приращения.
+        """
+        for key in list(self._pending):
+            await self._flush(key)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
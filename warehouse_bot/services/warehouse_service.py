@@ -0,0 +1,81 @@
+"""Сервисный слой для управления складами."""
+
+from collections.abc import Sequence
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from warehouse_bot.db.models import Warehouse
+
+# Длина названия как у колонки warehouse.name
+MAX_NAME_LENGTH = 100
+
+
+async def get_warehouses(session: AsyncSession) -> Sequence[Warehouse]:
+    """
+    Возвращает список всех складов.
+
+    Args:
+        session: Сессия базы данных.
+
+    Returns:
+        Последовательность объектов Warehouse, упорядоченная по названию.
+    """
+    result = await session.execute(select(Warehouse).order_by(Warehouse.name))
+    return result.scalars().all()
+
+
+async def get_warehouse(session: AsyncSession, warehouse_id: int) -> Warehouse | None:
+    """
+    Находит склад по ID.
+
+    Args:
+        session: Сессия базы данных.
+        warehouse_id: ID склада.
+
+    Returns:
+        Объект Warehouse или None, если склад не найден.
+    """
+    return await session.get(Warehouse, warehouse_id)
+
+
+async def get_warehouse_by_name(session: AsyncSession, name: str) -> Warehouse | None:
+    """
+    Находит склад по его уникальному названию.
+
+    Args:
+        session: Сессия базы данных.
+        name: Название склада.
+
+    Returns:
+        Объект Warehouse или None, если склад не найден.
+    """
+    result = await session.execute(select(Warehouse).where(col(Warehouse.name) == name))
+    return result.scalar_one_or_none()
+
+
+async def create_warehouse(session: AsyncSession, name: str) -> int:
+    """
+    Создает новый склад.
+
+    Args:
+        session: Сессия базы данных.
+        name: Название склада.
+
+    Returns:
+        ID созданного склада.
+
+    Raises:
+        ValueError: Если склад с таким названием уже существует.
+    """
+    warehouse = Warehouse(name=name)
+    session.add(warehouse)
+    try:
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        raise ValueError(f"Склад '{name}' уже существует.") from e
+    if warehouse.id is None:
+        raise RuntimeError(f"Warehouse {name!r} got no id on commit")
+    return warehouse.id